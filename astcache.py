@@ -0,0 +1,110 @@
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+# modules whose code decides the shape of a cached syntax tree, a change in any of them invalidates the cache
+syntax_tree_modules = ['lexer.py', 'schemetoken.py', 'parser.py', 'schemeexpression.py', 'derivedexpression.py',
+                       'optimizer.py', 'interpreter.py', 'schemeobject.py', 'schemebuiltins.py']
+
+
+def interpreter_version():
+    digest = hashlib.sha256(repr(sys.version_info).encode())
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for module in syntax_tree_modules:
+        with open(os.path.join(directory, module), 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+def default_cache_directory():
+    cache_home = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'my-scheme')
+
+
+# parsed, and optionally optimized, syntax trees pickled on disk, keyed by the hash of the program text
+# and of the interpreter version. files are written atomically, and the least recently used ones are
+# evicted once the directory grows past max_size bytes. only the optimized trees of programs run in a fresh
+# global environment are cached, as the optimizer folds calls depending on the built ins in the environment
+class AstCache:
+    suffix = '.ast'
+
+    def __init__(self, directory=None, max_size=64 * 1024 * 1024):
+        self.directory = default_cache_directory() if directory is None else directory
+        self.max_size = max_size
+        self.version = interpreter_version()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, program, optimized):
+        digest = hashlib.sha256(self.version.encode())
+        digest.update(b'optimized' if optimized else b'parsed')
+        digest.update(program.encode())
+        return digest.hexdigest()
+
+    def path(self, program, optimized):
+        return os.path.join(self.directory, self.key(program, optimized) + self.suffix)
+
+    def load(self, program, optimized):
+        path = self.path(program, optimized)
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # truncated or written by an incompatible version
+            self.remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def store(self, program, optimized, value):
+        try:
+            data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, RecursionError):
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            descriptor, temporary_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        except OSError:
+            return
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                file.write(data)
+            os.replace(temporary_path, self.path(program, optimized))
+        except OSError:
+            self.remove(temporary_path)
+            return
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*' + self.suffix)):
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            self.remove(path)
+            total_size -= size
+
+    def clear(self):
+        for path in glob.glob(os.path.join(self.directory, '*' + self.suffix)):
+            self.remove(path)
+
+    @staticmethod
+    def remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
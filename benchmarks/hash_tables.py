@@ -0,0 +1,44 @@
+# times looking up every key of a table kept as an association list and as a hash table, run from the top
+# directory: python -m benchmarks.hash_tables [number of keys]
+import sys
+import timeit
+
+from environment import Environment
+from main import engines, init_global_environment, scan_evaluate
+from schemeobject import SchemeNumber, SchemePair, SchemeString, make_scheme_list
+
+KEYS = 500
+REPEAT = 3
+
+DEFINITIONS = """
+(define (assoc key alist)
+  (cond ((null? alist) #f)
+        ((equal? key (car (car alist))) (car alist))
+        (else (assoc key (cdr alist)))))
+(define table (make-hash-table))
+(for-each (lambda (entry) (hash-table-set! table (car entry) (cdr entry))) alist)
+"""
+
+EXPRESSIONS = [
+    "(for-each (lambda (key) (cdr (assoc key alist))) keys)",
+    "(for-each (lambda (key) (hash-table-ref table key)) keys)",
+]
+
+
+def main(args):
+    number_of_keys = int(args[1]) if len(args) > 1 else KEYS
+    for engine in engines:
+        environment = Environment()
+        init_global_environment(environment)
+        keys = [make_scheme_list([SchemeString(f"key{value}"), SchemeNumber(value)]) for value in range(number_of_keys)]
+        environment.add('keys', make_scheme_list(keys))
+        alist = [SchemePair(key, SchemeNumber(index)) for index, key in enumerate(keys)]
+        environment.add('alist', make_scheme_list(alist))
+        scan_evaluate(DEFINITIONS, environment, engine)
+        for expression in EXPRESSIONS:
+            seconds = min(timeit.repeat(lambda: scan_evaluate(expression, environment, engine), number=1, repeat=REPEAT))
+            print(f"{engine} {expression}, {number_of_keys} keys: {seconds * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,38 @@
+# lexer throughput over the sample programs concatenated many times, run from the top directory:
+# python -m benchmarks.lexer_throughput [copies]
+import glob
+import os
+import sys
+import time
+
+from lexer import Lexer
+
+COPIES = 50
+REPEAT = 3
+
+SAMPLE_PROGRAMS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_programs')
+
+
+def load_corpus(copies):
+    programs = []
+    for filename in sorted(glob.glob(os.path.join(SAMPLE_PROGRAMS, '*.scm'))):
+        with open(filename) as file:
+            programs.append(file.read())
+    return '\n'.join(programs * copies)
+
+
+def main(args):
+    copies = int(args[1]) if len(args) > 1 else COPIES
+    corpus = load_corpus(copies)
+    megabytes = len(corpus.encode()) / (1024 * 1024)
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        tokens = Lexer(corpus).scan()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    print(f"{megabytes:.2f} MB, {len(tokens)} tokens: {best:.3f} s, {megabytes / best:.2f} MB/s")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
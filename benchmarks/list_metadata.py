@@ -0,0 +1,42 @@
+# times length and list? on long lists, run from the top directory: python -m benchmarks.list_metadata
+import sys
+import timeit
+
+from environment import Environment
+from main import init_global_environment, scan_evaluate
+from schemeobject import SchemeEmptyList, SchemeNumber, SchemePair
+
+LIST_LENGTH = 100000
+REPEAT = 100
+
+
+def build_list(length):
+    scheme_list = SchemeEmptyList()
+    for value in range(length):
+        scheme_list = SchemePair(SchemeNumber(value), scheme_list)
+    return scheme_list
+
+
+def time_expression(environment, expression, number):
+    seconds = timeit.timeit(lambda: scan_evaluate(expression, environment), number=number)
+    return seconds / number
+
+
+def main(args):
+    length = int(args[1]) if len(args) > 1 else LIST_LENGTH
+    environment = Environment()
+    init_global_environment(environment)
+    environment.add('big', build_list(length))
+
+    first_length = time_expression(environment, "(length big)", 1)
+    print(f"first (length big), {length} elements: {first_length * 1000:.3f} ms")
+    print(f"repeated (length big): {time_expression(environment, '(length big)', REPEAT) * 1000:.3f} ms")
+    print(f"repeated (list? big): {time_expression(environment, '(list? big)', REPEAT) * 1000:.3f} ms")
+    print(f"(length (cons 0 big)): {time_expression(environment, '(length (cons 0 big))', REPEAT) * 1000:.3f} ms")
+
+    scan_evaluate("(set-cdr! big (cdr big))", environment)
+    print(f"(length big) after set-cdr!: {time_expression(environment, '(length big)', 1) * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
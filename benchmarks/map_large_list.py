@@ -0,0 +1,33 @@
+# times map, for-each and apply over a long list on each engine, run from the top directory:
+# python -m benchmarks.map_large_list [length]
+import sys
+import timeit
+
+from environment import Environment
+from main import engines, init_global_environment, scan_evaluate
+from schemeobject import SchemeNumber, scheme_list_from_iterable
+
+LIST_LENGTH = 100000
+REPEAT = 3
+
+EXPRESSIONS = [
+    "(map (lambda (x) (+ x 1)) big)",
+    "(map + big big)",
+    "(for-each (lambda (x) x) big)",
+    "(apply + big)",
+]
+
+
+def main(args):
+    length = int(args[1]) if len(args) > 1 else LIST_LENGTH
+    for engine in engines:
+        environment = Environment()
+        init_global_environment(environment)
+        environment.add('big', scheme_list_from_iterable(SchemeNumber(value) for value in range(length)))
+        for expression in EXPRESSIONS:
+            seconds = min(timeit.repeat(lambda: scan_evaluate(expression, environment, engine), number=1, repeat=REPEAT))
+            print(f"{engine} {expression}, {length} elements: {seconds * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,44 @@
+# times numeric kernels written as scheme loops over lists against the bulk f64vector procedures,
+# run from the top directory: python -m benchmarks.numeric_vectors [length]
+import sys
+import timeit
+
+from environment import Environment
+from main import engines, init_global_environment, scan_evaluate
+from schemeobject import SchemeNumber, scheme_list_from_iterable
+
+LENGTH = 100000
+REPEAT = 3
+
+DEFINITIONS = """
+(define (list-sum l acc) (if (null? l) acc (list-sum (cdr l) (+ acc (car l)))))
+(define (list-dot l1 l2 acc) (if (null? l1) acc (list-dot (cdr l1) (cdr l2) (+ acc (* (car l1) (car l2))))))
+(define numbers-vector (list->f64vector numbers))
+"""
+
+EXPRESSIONS = [
+    "(list-sum numbers 0)",
+    "(f64vector-sum numbers-vector)",
+    "(list-dot numbers numbers 0)",
+    "(f64vector-dot numbers-vector numbers-vector)",
+    "(map + numbers numbers)",
+    "(f64vector-add numbers-vector numbers-vector)",
+    "(list->f64vector numbers)",
+    "(f64vector->list numbers-vector)",
+]
+
+
+def main(args):
+    length = int(args[1]) if len(args) > 1 else LENGTH
+    for engine in engines:
+        environment = Environment()
+        init_global_environment(environment)
+        environment.add('numbers', scheme_list_from_iterable(SchemeNumber(float(value)) for value in range(length)))
+        scan_evaluate(DEFINITIONS, environment, engine)
+        for expression in EXPRESSIONS:
+            seconds = min(timeit.repeat(lambda: scan_evaluate(expression, environment, engine), number=1, repeat=REPEAT))
+            print(f"{engine} {expression}, {length} elements: {seconds * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
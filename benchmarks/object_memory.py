@@ -0,0 +1,78 @@
+# bytes per pair and per number of a list built with cons, run from the top directory:
+# python -m benchmarks.object_memory [number of elements]
+# the dict based classes replicate the object model before it moved to __slots__, for comparison
+import sys
+import tracemalloc
+
+from schemebuiltins import cons
+from schemeobject import SchemeEmptyList, SchemeNumber
+
+LIST_LENGTH = 1000000
+
+
+class DictBasedNumber:
+    def __init__(self, value):
+        self.value = value
+
+
+class DictBasedPair:
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+        self.cached_list_length = -1
+        self.cached_list_length_epoch = -1
+
+
+def measure(build, length):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept_alive = build(length)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept_alive
+    return (after - before) / length
+
+
+def dict_based_numbers(length):
+    return [DictBasedNumber(value + 0.5) for value in range(length)]
+
+
+def slotted_numbers(length):
+    return [SchemeNumber(value + 0.5) for value in range(length)]
+
+
+def small_integers(length):
+    return [SchemeNumber(value % 100) for value in range(length)]
+
+
+def list_of_numbers(length):
+    return [None] * length
+
+
+def dict_based_list(length):
+    scheme_list = SchemeEmptyList()
+    for _ in range(length):
+        scheme_list = DictBasedPair(None, scheme_list)
+    return scheme_list
+
+
+def consed_list(length):
+    scheme_list = SchemeEmptyList()
+    for _ in range(length):
+        scheme_list = cons(None, scheme_list)
+    return scheme_list
+
+
+def main(args):
+    length = int(args[1]) if len(args) > 1 else LIST_LENGTH
+    python_list_overhead = measure(list_of_numbers, length)
+    print(f"{length} elements")
+    print(f"pair, dict based: {measure(dict_based_list, length):.1f} bytes")
+    print(f"pair, consed: {measure(consed_list, length):.1f} bytes")
+    print(f"number, dict based: {measure(dict_based_numbers, length) - python_list_overhead:.1f} bytes")
+    print(f"number: {measure(slotted_numbers, length) - python_list_overhead:.1f} bytes")
+    print(f"small integer: {measure(small_integers, length) - python_list_overhead:.1f} bytes")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,47 @@
+;symbolic differentiation, SICP 2.3.2, quoted data, symbols and list construction
+
+(define (variable? x) (and (not (number? x)) (not (pair? x))))
+(define (same-variable? v1 v2) (and (variable? v1) (variable? v2) (eq? v1 v2)))
+(define (=number? exp num) (and (number? exp) (= exp num)))
+
+(define (make-sum a1 a2)
+  (cond ((=number? a1 0) a2)
+        ((=number? a2 0) a1)
+        ((and (number? a1) (number? a2)) (+ a1 a2))
+        (else (list '+ a1 a2))))
+
+(define (make-product m1 m2)
+  (cond ((or (=number? m1 0) (=number? m2 0)) 0)
+        ((=number? m1 1) m2)
+        ((=number? m2 1) m1)
+        ((and (number? m1) (number? m2)) (* m1 m2))
+        (else (list '* m1 m2))))
+
+(define (sum? x) (and (pair? x) (eq? (car x) '+)))
+(define (addend s) (cadr s))
+(define (augend s) (caddr s))
+(define (product? x) (and (pair? x) (eq? (car x) '*)))
+(define (multiplier p) (cadr p))
+(define (multiplicand p) (caddr p))
+
+(define (deriv exp var)
+  (cond ((number? exp) 0)
+        ((variable? exp) (if (same-variable? exp var) 1 0))
+        ((sum? exp) (make-sum (deriv (addend exp) var)
+                              (deriv (augend exp) var)))
+        ((product? exp)
+         (make-sum (make-product (multiplier exp)
+                                 (deriv (multiplicand exp) var))
+                   (make-product (deriv (multiplier exp) var)
+                                 (multiplicand exp))))
+        (else 'unknown-expression)))
+
+(define polynomial '(+ (* 3 (* x (* x x))) (+ (* a (* x x)) (+ (* b x) c))))
+
+(define (repeat-deriv n result)
+  (if (= n 0)
+      result
+      (repeat-deriv (- n 1) (deriv polynomial 'x))))
+
+;expected:( + ( * 3 ( + ( * x ( + x x ) ) ( * x x ) ) ) ( + ( * a ( + x x ) ) b ) )
+(repeat-deriv 60 '())
@@ -0,0 +1,42 @@
+;destructive list operations, set-car! and set-cdr! on lists built in place
+
+(define (iota n)
+  (define (build i result)
+    (if (< i 0)
+        result
+        (build (- i 1) (cons i result))))
+  (build (- n 1) '()))
+
+(define (reverse! lst)
+  (define (loop rest result)
+    (if (null? rest)
+        result
+        (let ((next (cdr rest)))
+          (set-cdr! rest result)
+          (loop next rest))))
+  (loop lst '()))
+
+(define (last-pair lst)
+  (if (null? (cdr lst)) lst (last-pair (cdr lst))))
+
+(define (append! a b)
+  (set-cdr! (last-pair a) b)
+  a)
+
+(define (increment! lst)
+  (if (not (null? lst))
+      (begin (set-car! lst (+ (car lst) 1))
+             (increment! (cdr lst)))))
+
+(define (sum lst total)
+  (if (null? lst) total (sum (cdr lst) (+ total (car lst)))))
+
+(define (churn n lst)
+  (if (= n 0)
+      lst
+      (begin (increment! lst)
+             (churn (- n 1) (reverse! lst)))))
+
+;expected:( 400 43000 )
+(define numbers (churn 8 (append! (iota 200) (iota 200))))
+(list (length numbers) (sum numbers 0))
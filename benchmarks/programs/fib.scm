@@ -0,0 +1,9 @@
+;doubly recursive fibonacci, procedure calls and integer arithmetic
+
+(define (fib n)
+  (if (< n 2)
+      n
+      (+ (fib (- n 1)) (fib (- n 2)))))
+
+;expected:2584
+(fib 18)
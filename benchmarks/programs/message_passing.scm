@@ -0,0 +1,41 @@
+;bank accounts as closures dispatching on messages, SICP 3.1.1, assignment to captured variables
+
+(define (make-account balance)
+  (define (withdraw amount)
+    (if (>= balance amount)
+        (begin (set! balance (- balance amount))
+               balance)
+        'insufficient-funds))
+  (define (deposit amount)
+    (set! balance (+ balance amount))
+    balance)
+  (define (dispatch m)
+    (cond ((eq? m 'withdraw) withdraw)
+          ((eq? m 'deposit) deposit)
+          ((eq? m 'balance) balance)
+          (else 'unknown-request)))
+  dispatch)
+
+(define (transfer from to amount)
+  (if (eq? ((from 'withdraw) amount) 'insufficient-funds)
+      #f
+      (begin ((to 'deposit) amount) #t)))
+
+(define (shuffle accounts other n failures)
+  (if (= n 0)
+      failures
+      (shuffle accounts other (- n 1)
+               (if (transfer (car accounts) (car other) (remainder n 7))
+                   failures
+                   (+ failures 1)))))
+
+(define (rounds a b n failures)
+  (if (= n 0)
+      failures
+      (rounds b a (- n 1) (shuffle (list a) (list b) 50 failures))))
+
+(define a (make-account 100))
+(define b (make-account 100))
+
+;expected:( 15 148 52 )
+(list (rounds a b 40 0) (a 'balance) (b 'balance))
@@ -0,0 +1,25 @@
+;counts the placements of n queens on an n by n board, list building and backtracking
+
+(define (safe? row distance placed)
+  (or (null? placed)
+      (and (not (= (car placed) row))
+           (not (= (car placed) (+ row distance)))
+           (not (= (car placed) (- row distance)))
+           (safe? row (+ distance 1) (cdr placed)))))
+
+(define (queens board-size)
+  (define (place k placed)
+    (if (= k 0)
+        1
+        (try-rows board-size k placed 0)))
+  (define (try-rows row k placed total)
+    (if (= row 0)
+        total
+        (try-rows (- row 1) k placed
+                  (if (safe? row 1 placed)
+                      (+ total (place (- k 1) (cons row placed)))
+                      total))))
+  (place board-size '()))
+
+;expected:4
+(queens 6)
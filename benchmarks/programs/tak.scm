@@ -0,0 +1,11 @@
+;the takeuchi function, deep non tail recursion on small integers
+
+(define (tak x y z)
+  (if (not (< y x))
+      z
+      (tak (tak (- x 1) y z)
+           (tak (- y 1) z x)
+           (tak (- z 1) x y))))
+
+;expected:5
+(tak 12 8 4)
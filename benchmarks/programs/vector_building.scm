@@ -0,0 +1,45 @@
+;fills, copies and converts vectors, the growing buffer pattern of string building on vectors
+
+(define (make-buffer) (cons 0 (make-vector 4 0)))
+(define (buffer-size buffer) (car buffer))
+
+(define (buffer-append! buffer value)
+  (let ((size (car buffer))
+        (storage (cdr buffer)))
+    (if (= size (vector-length storage))
+        (let ((larger (make-vector (* 2 size) 0)))
+          (copy! storage larger 0 size)
+          (set-cdr! buffer larger)))
+    (vector-set! (cdr buffer) size value)
+    (set-car! buffer (+ size 1))))
+
+(define (copy! from to i n)
+  (if (< i n)
+      (begin (vector-set! to i (vector-ref from i))
+             (copy! from to (+ i 1) n))))
+
+(define (fill-buffer! buffer i n)
+  (if (< i n)
+      (begin (buffer-append! buffer (* i i))
+             (fill-buffer! buffer (+ i 1) n))))
+
+(define (buffer->list buffer)
+  (define (loop i result)
+    (if (< i 0)
+        result
+        (loop (- i 1) (cons (vector-ref (cdr buffer) i) result))))
+  (loop (- (buffer-size buffer) 1) '()))
+
+(define (build n)
+  (let ((buffer (make-buffer)))
+    (fill-buffer! buffer 0 n)
+    (list->vector (buffer->list buffer))))
+
+(define (sum-vector v i total)
+  (if (= i (vector-length v))
+      total
+      (sum-vector v (+ i 1) (+ total (vector-ref v i)))))
+
+;expected:( 800 170346800 )
+(define squares (build 800))
+(list (vector-length squares) (sum-vector squares 0 0))
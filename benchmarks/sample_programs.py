@@ -0,0 +1,37 @@
+# times sample programs run repeatedly on each engine, run from the top directory:
+# python -m benchmarks.sample_programs [program ...]
+import os
+import sys
+import timeit
+
+from environment import Environment
+from main import engines, evaluate, init_global_environment, optimize, scan
+
+PROGRAMS = ['factrial', 'pie_approximation']
+NUMBER = 200
+REPEAT = 5
+
+SAMPLE_PROGRAMS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sample_programs')
+
+
+def time_program(program, engine):
+    environment = Environment()
+    init_global_environment(environment)
+    syntax_tree = scan(program)
+    optimize(syntax_tree, environment)
+    # the definitions are evaluated again on every run, in the same environment
+    seconds = min(timeit.repeat(lambda: evaluate(syntax_tree, environment, engine), number=NUMBER, repeat=REPEAT))
+    return seconds / NUMBER
+
+
+def main(args):
+    names = args[1:] if len(args) > 1 else PROGRAMS
+    for name in names:
+        with open(os.path.join(SAMPLE_PROGRAMS, name + '.scm')) as file:
+            program = file.read()
+        for engine in engines:
+            print(f"{name} {engine}: {time_program(program, engine) * 1000:.3f} ms")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
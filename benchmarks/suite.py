@@ -0,0 +1,115 @@
+# runs the scheme programs of benchmarks/programs on every engine, with and without the optimizer, and compares
+# the medians with a baseline saved by an earlier run, run from the top directory:
+# python -m benchmarks.suite [--engine ENGINE] [--mode MODE] [--save FILE] [--baseline FILE] [program ...]
+# exits with status 1 when a median is slower than its baseline by more than the threshold
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from environment import Environment
+from main import engines, init_global_environment, scan_evaluate
+
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'programs')
+MODES = {'optimized': True, 'unoptimized': False}
+WARMUP = 1
+REPEAT = 7
+THRESHOLD = 0.10
+
+
+def find_expected(program_text):
+    for line in program_text.splitlines():
+        line = line.strip()
+        if line.startswith(";expected:"):
+            return line.split(':')[1].strip()
+
+
+# the program is scanned, optimized and evaluated in a new global environment on every run
+def run_once(program_text, engine, optimize):
+    environment = Environment()
+    init_global_environment(environment)
+    start = time.perf_counter()
+    value = scan_evaluate(program_text, environment, engine, optimize)
+    return time.perf_counter() - start, str(value)
+
+
+def time_program(name, program_text, engine, mode, warmup, repeat):
+    expected = find_expected(program_text)
+    for _ in range(warmup):
+        seconds, value = run_once(program_text, engine, MODES[mode])
+        if value != expected:
+            raise RuntimeError(f"{name} on {engine} {mode} returned {value}, expected {expected}")
+    times = [run_once(program_text, engine, MODES[mode])[0] for _ in range(repeat)]
+    return {'median': statistics.median(times), 'min': min(times), 'max': max(times), 'times': times}
+
+
+# the relative difference between the slowest and the fastest runs
+def spread(result):
+    return (result['max'] - result['min']) / result['median']
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for key, result in results.items():
+        baseline_result = baseline['results'].get(key)
+        if baseline_result is None:
+            continue
+        change = result['median'] / baseline_result['median'] - 1
+        print(f"{key}: {change * 100:+.1f}% against the baseline")
+        if change > threshold:
+            regressions.append(key)
+    return regressions
+
+
+def parse_command_line(args):
+    argument_parser = argparse.ArgumentParser(description="scheme benchmark suite")
+    argument_parser.add_argument('programs', nargs='*', help="program names, all the programs if omitted")
+    argument_parser.add_argument('--engine', action='append', choices=engines.keys(),
+                                 help="engine to run, can be repeated, every engine if omitted")
+    argument_parser.add_argument('--mode', action='append', choices=MODES.keys(),
+                                 help="optimizer mode to run, can be repeated, both if omitted")
+    argument_parser.add_argument('--warmup', type=int, default=WARMUP,
+                                 help="untimed runs before timing, they check the result, defaults to %(default)s")
+    argument_parser.add_argument('--repeat', type=int, default=REPEAT,
+                                 help="timed runs of every program, defaults to %(default)s")
+    argument_parser.add_argument('--save', metavar='FILE', help="write the results to FILE as json")
+    argument_parser.add_argument('--baseline', metavar='FILE', help="compare the medians with the results in FILE")
+    argument_parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                                 help="slowdown against the baseline counted as a regression, defaults to "
+                                      "%(default)s")
+    return argument_parser.parse_args(args)
+
+
+def main(args):
+    options = parse_command_line(args[1:])
+    names = options.programs or sorted(file_name[:-len('.scm')] for file_name in os.listdir(PROGRAMS)
+                                       if file_name.endswith('.scm'))
+    results = {}
+    print(f"{'program':<18} {'engine':<12} {'mode':<12} {'median ms':>10} {'spread':>8}")
+    for name in names:
+        with open(os.path.join(PROGRAMS, name + '.scm')) as file:
+            program_text = file.read()
+        for engine in options.engine or engines:
+            for mode in options.mode or MODES:
+                result = time_program(name, program_text, engine, mode, options.warmup, options.repeat)
+                results[f"{name}/{engine}/{mode}"] = result
+                print(f"{name:<18} {engine:<12} {mode:<12} {result['median'] * 1000:>10.2f} "
+                      f"{spread(result) * 100:>7.1f}%")
+    if options.save is not None:
+        with open(options.save, 'w') as file:
+            json.dump({'python': platform.python_version(), 'results': results}, file, indent=2)
+    if options.baseline is not None:
+        with open(options.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, options.threshold)
+        if regressions:
+            print(f"regressed past {options.threshold * 100:.0f}%: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
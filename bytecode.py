@@ -0,0 +1,271 @@
+import array
+
+from interpreter import bool_literal_value, char_literal_value, number_literal_value, string_literal_value
+from parser import SyntaxTreeVisitor
+from schemeobject import SchemeBool, SchemeEmptyList, SchemeSymbol, UnAssigned
+
+# an instruction is an opcode followed by its operands in the flat instructions array of a CodeObject,
+# jump targets are offsets in that array
+CONSTANT = 0  # index in constants: pushes the constant
+LOAD_LOCAL = 1  # slot: pushes a variable of the current frame
+LOAD_FREE = 2  # depth slot: pushes a variable of an enclosing frame
+LOAD_GLOBAL = 3  # index in names: pushes a global variable
+STORE_LOCAL = 4  # depth slot: stores the value on top in a frame variable, replacing it with None
+STORE_GLOBAL = 5  # index in names: set! of a global variable, replacing the value on top with None
+DEFINE_GLOBAL = 6  # index in names: defines a global variable, replacing the value on top with None
+POP = 7
+JUMP = 8  # target
+JUMP_IF_FALSE = 9  # target: pops the value on top, jumps if it is #f
+JUMP_IF_FALSE_OR_POP = 10  # target: jumps keeping the value on top if it is #f, pops it otherwise
+JUMP_IF_TRUE_OR_POP = 11  # target: jumps keeping the value on top unless it is #f, pops it otherwise
+CALL = 12  # number of arguments: pops the procedure and its arguments, pushes the value of the call
+TAIL_CALL = 13  # number of arguments: calls replacing the current procedure, returns the value to its caller
+RETURN = 14  # returns the value on top to the caller
+MAKE_CLOSURE = 15  # index in constants of a CodeObject: pushes a procedure closing over the current frame
+BUILD_LIST = 16  # number of elements: pops the elements, pushes a list of them
+BUILD_VECTOR = 17  # number of elements: pops the elements, pushes a vector of them
+ENTER_FRAME = 18  # number of variables: pops their values into a new frame, nested in the current one
+LEAVE_FRAME = 19  # makes the parent of the current frame current again
+
+opcode_names = ['CONSTANT', 'LOAD_LOCAL', 'LOAD_FREE', 'LOAD_GLOBAL', 'STORE_LOCAL', 'STORE_GLOBAL',
+                'DEFINE_GLOBAL', 'POP', 'JUMP', 'JUMP_IF_FALSE', 'JUMP_IF_FALSE_OR_POP', 'JUMP_IF_TRUE_OR_POP', 'CALL',
+                'TAIL_CALL', 'RETURN', 'MAKE_CLOSURE', 'BUILD_LIST', 'BUILD_VECTOR', 'ENTER_FRAME', 'LEAVE_FRAME']
+
+operand_counts = [1, 1, 2, 1, 2, 1, 1, 0, 1, 1, 1, 1, 1, 1, 0, 1, 1, 1, 1, 0]
+
+
+# the compiled code of a procedure body or of a top level form, with its own pools of constants and global names
+class CodeObject:
+    __slots__ = ('name', 'position', 'formals', 'body', 'instructions', 'constants', 'names', 'local_names')
+
+    def __init__(self, name, position=None, formals=None, body=None):
+        # the name of the procedure, None if anonymous, and the (line, column) of its lambda
+        self.name = name
+        self.position = position
+        self.formals = formals
+        self.body = body
+        self.instructions = array.array('l')
+        self.constants = []
+        self.names = []
+        # the variable name of every local load, by offset, for error messages and listings
+        self.local_names = {}
+
+
+# compiles a resolved syntax tree node to a CodeObject, locals are addressed by the (depth, slot) of the Resolver.
+# every expression leaves exactly one value on the stack, expressions in tail position are followed by RETURN
+class BytecodeCompiler(SyntaxTreeVisitor):
+    def __init__(self):
+        self.code = None
+        self.tail_position = False
+
+    def compile_top_level(self, expression):
+        return self.compile_code(CodeObject('top level'), [expression])
+
+    def compile_code(self, code, body):
+        old_code = self.code
+        self.code = code
+        self.compile_sequence(body, tail_position=True)
+        self.emit(RETURN)
+        self.code = old_code
+        return code
+
+    def compile(self, expression, tail_position=False):
+        old_tail_position = self.tail_position
+        self.tail_position = tail_position
+        expression.accept(self)
+        self.tail_position = old_tail_position
+
+    def compile_sequence(self, expressions, tail_position):
+        for expression in expressions[:len(expressions) - 1]:
+            self.compile(expression)
+            self.emit(POP)
+        self.compile(expressions[len(expressions) - 1], tail_position)
+
+    def emit(self, opcode, *operands):
+        instructions = self.code.instructions
+        instructions.append(opcode)
+        instructions.extend(operands)
+
+    # emits a jump to a target not known yet, returns the offset of its operand for patch
+    def emit_jump(self, opcode):
+        self.emit(opcode, 0)
+        return len(self.code.instructions) - 1
+
+    def patch(self, operand_offset):
+        self.code.instructions[operand_offset] = len(self.code.instructions)
+
+    def constant_index(self, value):
+        constants = self.code.constants
+        for index, constant in enumerate(constants):
+            if constant is value:
+                return index
+        constants.append(value)
+        return len(constants) - 1
+
+    def name_index(self, name):
+        names = self.code.names
+        if name not in names:
+            names.append(name)
+        return names.index(name)
+
+    def emit_constant(self, value):
+        self.emit(CONSTANT, self.constant_index(value))
+
+    def visit_number_literal(self, number_literal):
+        self.emit_constant(number_literal_value(number_literal))
+
+    def visit_bool_literal(self, bool_literal):
+        self.emit_constant(bool_literal_value(bool_literal))
+
+    def visit_char_literal(self, char_literal):
+        self.emit_constant(char_literal_value(char_literal))
+
+    def visit_string_literal(self, string_literal):
+        self.emit_constant(string_literal_value(string_literal))
+
+    def visit_constant(self, constant):
+        self.emit_constant(constant.value)
+
+    def visit_symbol(self, symbol):
+        self.emit_constant(SchemeSymbol(symbol.symbol))
+
+    # quoted lists are built on every evaluation, they can be mutated with set-car!
+    def visit_list(self, quoted_list):
+        for element in quoted_list.elements:
+            self.compile(element)
+        self.emit(BUILD_LIST, len(quoted_list.elements))
+
+    def visit_vector(self, quoted_vector):
+        for element in quoted_vector.elements:
+            self.compile(element)
+        self.emit(BUILD_VECTOR, len(quoted_vector.elements))
+
+    def visit_conditional(self, conditional):
+        self.compile(conditional.test)
+        to_alternate = self.emit_jump(JUMP_IF_FALSE)
+        self.compile(conditional.consequent, self.tail_position)
+        to_end = self.emit_jump(JUMP)
+        self.patch(to_alternate)
+        if conditional.alternate is not None:
+            self.compile(conditional.alternate, self.tail_position)
+        else:
+            self.emit_constant(SchemeEmptyList())
+        self.patch(to_end)
+
+    def visit_variable_reference(self, variable_reference):
+        address = variable_reference.address
+        if address.is_global:
+            self.emit(LOAD_GLOBAL, self.name_index(variable_reference.variable_name))
+        else:
+            self.code.local_names[len(self.code.instructions)] = variable_reference.variable_name
+            if address.depth == 0:
+                self.emit(LOAD_LOCAL, address.slot)
+            else:
+                self.emit(LOAD_FREE, address.depth, address.slot)
+
+    def visit_call(self, call):
+        self.compile(call.callee)
+        for arg in call.args.args:
+            self.compile(arg)
+        self.emit(TAIL_CALL if self.tail_position else CALL, len(call.args.args))
+
+    def visit_lambda(self, lambda_expression):
+        code = CodeObject(lambda_expression.name, lambda_expression.position, lambda_expression.formals,
+                          lambda_expression.body)
+        self.emit(MAKE_CLOSURE, self.constant_index(self.compile_code(code, lambda_expression.body)))
+
+    def visit_definition(self, definition):
+        self.compile(definition.expression)
+        self.emit(DEFINE_GLOBAL, self.name_index(definition.name))
+
+    def visit_assignment(self, assignment):
+        self.compile(assignment.expression)
+        address = assignment.address
+        if address.is_global:
+            self.emit(STORE_GLOBAL, self.name_index(assignment.name))
+        else:
+            self.emit(STORE_LOCAL, address.depth, address.slot)
+
+    def visit_sequence(self, sequence):
+        self.compile_sequence(sequence.expressions, self.tail_position)
+
+    # the frame of a let in tail position is dropped by the RETURN following it
+    def visit_let(self, let):
+        for binding in let.bindings:
+            self.compile(binding.init)
+        self.emit(ENTER_FRAME, len(let.bindings))
+        self.compile_sequence(let.body, self.tail_position)
+        if not self.tail_position:
+            self.emit(LEAVE_FRAME)
+
+    def visit_and(self, and_expression):
+        self.compile_tests(and_expression.tests, JUMP_IF_FALSE_OR_POP)
+
+    def visit_or(self, or_expression):
+        self.compile_tests(or_expression.tests, JUMP_IF_TRUE_OR_POP)
+
+    def compile_tests(self, tests, jump_opcode):
+        to_end = []
+        for test in tests[:len(tests) - 1]:
+            self.compile(test)
+            to_end.append(self.emit_jump(jump_opcode))
+        self.compile(tests[len(tests) - 1], self.tail_position)
+        for operand_offset in to_end:
+            self.patch(operand_offset)
+
+    def visit_cond(self, cond):
+        to_end = []
+        has_else = False
+        for clause in cond.clauses:
+            if clause.is_else:
+                self.compile_sequence(clause.sequence, self.tail_position)
+                has_else = True
+                break
+            self.compile(clause.condition)
+            if len(clause.sequence) == 0:
+                to_end.append(self.emit_jump(JUMP_IF_TRUE_OR_POP))
+                continue
+            to_next_clause = self.emit_jump(JUMP_IF_FALSE)
+            self.compile_sequence(clause.sequence, self.tail_position)
+            to_end.append(self.emit_jump(JUMP))
+            self.patch(to_next_clause)
+        if not has_else:
+            self.emit_constant(SchemeBool(False))
+        for operand_offset in to_end:
+            self.patch(operand_offset)
+
+    def visit_unassigned(self, unassigned):
+        self.emit_constant(UnAssigned())
+
+
+def code_name(code):
+    return 'lambda' if code.name is None else code.name
+
+
+# a listing of the instructions of a CodeObject, then of the code objects in its constants
+def disassemble(code):
+    lines = [f"code {code_name(code)}:"]
+    nested_codes = []
+    instructions = code.instructions
+    offset = 0
+    while offset < len(instructions):
+        opcode = instructions[offset]
+        operands = list(instructions[offset + 1:offset + 1 + operand_counts[opcode]])
+        line = f"{offset:6} {opcode_names[opcode]:<22}{' '.join(str(operand) for operand in operands)}"
+        if opcode == CONSTANT or opcode == MAKE_CLOSURE:
+            constant = code.constants[operands[0]]
+            if type(constant) is CodeObject:
+                nested_codes.append(constant)
+                line += f" (code {code_name(constant)})"
+            else:
+                line += f" ({constant})"
+        elif opcode == LOAD_GLOBAL or opcode == STORE_GLOBAL or opcode == DEFINE_GLOBAL:
+            line += f" ({code.names[operands[0]]})"
+        elif opcode == LOAD_LOCAL or opcode == LOAD_FREE:
+            line += f" ({code.local_names[offset]})"
+        lines.append(line.rstrip())
+        offset += 1 + operand_counts[opcode]
+    for nested_code in nested_codes:
+        lines.append('')
+        lines.append(disassemble(nested_code))
+    return '\n'.join(lines)
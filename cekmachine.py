@@ -0,0 +1,353 @@
+from interpreter import *
+from parser import SyntaxTreeVisitor
+from resolver import Resolver
+from schemeexpression import BoolLiteral, CharLiteral, Constant, Lambda, NumberLiteral, StringLiteral, Symbol, \
+    VariableReference
+
+false = SchemeBool(False)
+
+# returned by a step that left the next expression to evaluate in CekMachine.expression, instead of a value
+pending = object()
+
+# expressions evaluated in one step, without pushing a frame
+simple_expressions = frozenset([Constant, VariableReference, Lambda, NumberLiteral, BoolLiteral, CharLiteral,
+                                StringLiteral, Symbol])
+
+
+# continuation frames, each resumes the evaluation of its expression with the value of a sub expression,
+# in the environment it was pushed from
+
+class IfFrame:
+    __slots__ = ('conditional', 'environment')
+
+    def __init__(self, conditional, environment):
+        self.conditional = conditional
+        self.environment = environment
+
+    def resume(self, machine, value):
+        machine.environment = self.environment
+        if value is not false:
+            return machine.evaluate(self.conditional.consequent)
+        if self.conditional.alternate is None:
+            return SchemeEmptyList()
+        return machine.evaluate(self.conditional.alternate)
+
+
+# evaluates the callee then the arguments of a call, left to right, then applies the callee
+class CallFrame:
+    __slots__ = ('call', 'environment', 'values')
+
+    def __init__(self, call, environment):
+        self.call = call
+        self.environment = environment
+        self.values = []
+
+    def resume(self, machine, value):
+        values = self.values
+        values.append(value)
+        if len(values) == 1 and not isinstance(value, SchemeProcedure):
+            raise SchemeRuntimeError(f"{value} is not a procedure")
+        machine.environment = self.environment
+        args = self.call.args.args
+        while len(values) <= len(args):
+            arg = args[len(values) - 1]
+            if type(arg) in simple_expressions:
+                values.append(arg.accept(machine))
+                continue
+            machine.push(self)
+            return machine.evaluate(arg)
+        return machine.apply(values[0], values[1:])
+
+
+class SequenceFrame:
+    __slots__ = ('expressions', 'index', 'environment')
+
+    def __init__(self, expressions, environment):
+        self.expressions = expressions
+        self.index = 0
+        self.environment = environment
+
+    def resume(self, machine, value):
+        machine.environment = self.environment
+        self.index += 1
+        if self.index < len(self.expressions) - 1:
+            machine.push(self)
+        return machine.evaluate(self.expressions[self.index])
+
+
+class LetFrame:
+    __slots__ = ('let', 'environment', 'values')
+
+    def __init__(self, let, environment):
+        self.let = let
+        self.environment = environment
+        self.values = []
+
+    def resume(self, machine, value):
+        values = self.values
+        values.append(value)
+        bindings = self.let.bindings
+        machine.environment = self.environment
+        if len(values) < len(bindings):
+            machine.push(self)
+            return machine.evaluate(bindings[len(values)].init)
+        let_environment = Environment(self.environment)
+        for binding, binding_value in zip(bindings, values):
+            let_environment.add(binding.variable, binding_value)
+        machine.environment = let_environment
+        return machine.evaluate_sequence(self.let.body)
+
+
+# and, or: the tests are evaluated until one value decides, the last test is in tail position
+class TestsFrame:
+    __slots__ = ('tests', 'index', 'environment', 'is_and')
+
+    def __init__(self, tests, environment, is_and):
+        self.tests = tests
+        self.index = 0
+        self.environment = environment
+        self.is_and = is_and
+
+    def resume(self, machine, value):
+        if (value is false) == self.is_and:
+            return value
+        machine.environment = self.environment
+        self.index += 1
+        if self.index < len(self.tests) - 1:
+            machine.push(self)
+        return machine.evaluate(self.tests[self.index])
+
+
+class CondFrame:
+    __slots__ = ('clauses', 'index', 'environment')
+
+    def __init__(self, clauses, environment):
+        self.clauses = clauses
+        self.index = 0
+        self.environment = environment
+
+    def resume(self, machine, value):
+        machine.environment = self.environment
+        if value is not false:
+            clause = self.clauses[self.index]
+            if len(clause.sequence) == 0:
+                return value
+            return machine.evaluate_sequence(clause.sequence)
+        self.index += 1
+        return machine.next_cond_clause(self)
+
+
+class DefineFrame:
+    __slots__ = ('name', 'environment')
+
+    def __init__(self, name, environment):
+        self.name = name
+        self.environment = environment
+
+    def resume(self, machine, value):
+        machine.environment = self.environment
+        self.environment.add(self.name, value)
+
+
+class AssignFrame:
+    __slots__ = ('name', 'environment')
+
+    def __init__(self, name, environment):
+        self.name = name
+        self.environment = environment
+
+    def resume(self, machine, value):
+        machine.environment = self.environment
+        self.environment.set(self.name, value)
+
+
+# evaluates with the continuation kept as a stack of frames in the heap instead of python recursion,
+# the depth of non tail recursion is bounded by max_depth frames, not by the python stack.
+# calls in tail position push no frame, as the frame of the calling expression is popped before the call
+class CekMachine(SyntaxTreeVisitor):
+    default_max_depth = 1000000
+
+    def __init__(self, environment=None, max_depth=None):
+        self.environment = Environment() if environment is None else environment
+        self.max_depth = CekMachine.default_max_depth if max_depth is None else max_depth
+        self.stack = []
+        # the expression to evaluate next, when a step returns pending
+        self.expression = None
+
+    def interpret_syntax_tree(self, syntax_tree):
+        result = None
+        resolver = Resolver()
+        environment = self.environment
+        try:
+            for expression in syntax_tree.nodes:
+                resolver.resolve(expression)
+                # calls leave the machine in the environment of the callee
+                self.environment = environment
+                result = self.run(expression.accept(self), 0)
+            return result
+        except SchemeRuntimeError as error:
+            self.stack.clear()
+            return SchemeString(error.message)
+        finally:
+            self.environment = environment
+
+    # steps until the stack is back to base frames, returning the value of the computation
+    def run(self, value, base):
+        stack = self.stack
+        while True:
+            if value is pending:
+                value = self.expression.accept(self)
+            elif len(stack) == base:
+                return value
+            else:
+                value = stack.pop().resume(self, value)
+
+    def push(self, frame):
+        if len(self.stack) >= self.max_depth:
+            raise SchemeRuntimeError(f"maximum recursion depth of {self.max_depth} frames exceeded")
+        self.stack.append(frame)
+
+    def evaluate(self, expression):
+        self.expression = expression
+        return pending
+
+    def evaluate_sequence(self, expressions):
+        if len(expressions) > 1:
+            self.push(SequenceFrame(expressions, self.environment))
+        return self.evaluate(expressions[0])
+
+    def apply(self, procedure, arguments_values):
+        while True:
+            if isinstance(procedure, BuiltInProcedure):
+                value = procedure.call(arguments_values, self.apply_procedure)
+                if type(value) is Evaluation:
+                    # evaluated on this stack, the frames of the caller give back their environment
+                    self.environment = value.environment
+                    return self.evaluate(value.expression)
+            elif isinstance(procedure, (CompiledProcedure, BytecodeProcedure)):
+                value = procedure.call(Interpreter.prepare_args(procedure, arguments_values))
+            elif isinstance(procedure, InterpretedProcedure):
+                value = Interpreter().apply_procedure(procedure, arguments_values)
+            else:
+                args = Interpreter.prepare_args(procedure, arguments_values)
+                self.environment = self.prepare_call_environment(args, procedure)
+                return self.evaluate_sequence(procedure.body)
+            if not isinstance(value, TailCall):
+                return value
+            procedure = value.procedure
+            arguments_values = value.arguments_values
+
+    @staticmethod
+    def prepare_call_environment(args, procedure):
+        call_environment = Environment(procedure.environment)
+        for parameter, argument in zip(procedure.parameters, args):
+            call_environment.add(parameter, argument)
+        return call_environment
+
+    # runs a procedure to its value, for built ins calling procedures, on top of the current stack
+    def apply_procedure(self, procedure, arguments_values):
+        environment = self.environment
+        base = len(self.stack)
+        value = self.run(self.apply(procedure, arguments_values), base)
+        self.environment = environment
+        return value
+
+    def visit_number_literal(self, number_literal):
+        return number_literal_value(number_literal)
+
+    def visit_bool_literal(self, bool_literal):
+        return bool_literal_value(bool_literal)
+
+    def visit_char_literal(self, char_literal):
+        return char_literal_value(char_literal)
+
+    def visit_string_literal(self, string_literal):
+        return string_literal_value(string_literal)
+
+    def visit_constant(self, constant):
+        return constant.value
+
+    # quoted data contain no calls, their elements are values right away
+    def visit_list(self, quoted_list):
+        return make_scheme_list([element.accept(self) for element in quoted_list.elements])
+
+    def visit_vector(self, quoted_vector):
+        return SchemeVector([element.accept(self) for element in quoted_vector.elements])
+
+    def visit_symbol(self, symbol):
+        return SchemeSymbol(symbol.symbol)
+
+    def visit_conditional(self, conditional):
+        self.push(IfFrame(conditional, self.environment))
+        return self.evaluate(conditional.test)
+
+    def visit_variable_reference(self, variable_reference):
+        name = variable_reference.variable_name
+        address = variable_reference.address
+        if address is not None and address.is_global:
+            value = self.environment.root.dictionary.get(name)
+        else:
+            value = self.environment.get(name)
+        if value is None:
+            raise SchemeRuntimeError(f"variable {name} not found")
+        if isinstance(value, UnAssigned):
+            raise SchemeRuntimeError(f"variable {name} Unassigned")
+        return value
+
+    def visit_call(self, call):
+        frame = CallFrame(call, self.environment)
+        callee = call.callee
+        if type(callee) in simple_expressions:
+            return frame.resume(self, callee.accept(self))
+        self.push(frame)
+        return self.evaluate(callee)
+
+    def visit_lambda(self, lambda_expression):
+        return UserDefinedProcedure(lambda_expression.formals, lambda_expression.body, self.environment,
+                                    lambda_expression.name, lambda_expression.position)
+
+    def visit_definition(self, definition):
+        self.push(DefineFrame(definition.name, self.environment))
+        return self.evaluate(definition.expression)
+
+    def visit_assignment(self, assignment):
+        if self.environment.get(assignment.name) is None:
+            raise SchemeRuntimeError(f"variable {assignment.name} not bound")
+        self.push(AssignFrame(assignment.name, self.environment))
+        return self.evaluate(assignment.expression)
+
+    def visit_sequence(self, sequence):
+        return self.evaluate_sequence(sequence.expressions)
+
+    def visit_let(self, let):
+        if len(let.bindings) == 0:
+            self.environment = Environment(self.environment)
+            return self.evaluate_sequence(let.body)
+        self.push(LetFrame(let, self.environment))
+        return self.evaluate(let.bindings[0].init)
+
+    def visit_and(self, and_expression):
+        return self.evaluate_tests(and_expression.tests, True)
+
+    def visit_or(self, or_expression):
+        return self.evaluate_tests(or_expression.tests, False)
+
+    def evaluate_tests(self, tests, is_and):
+        if len(tests) > 1:
+            self.push(TestsFrame(tests, self.environment, is_and))
+        return self.evaluate(tests[0])
+
+    def visit_cond(self, cond):
+        return self.next_cond_clause(CondFrame(cond.clauses, self.environment))
+
+    def next_cond_clause(self, frame):
+        if frame.index == len(frame.clauses):
+            return false
+        clause = frame.clauses[frame.index]
+        if clause.is_else:
+            return self.evaluate_sequence(clause.sequence)
+        self.push(frame)
+        return self.evaluate(clause.condition)
+
+    def visit_unassigned(self, unassigned):
+        return UnAssigned()
@@ -0,0 +1,288 @@
+from interpreter import *
+from parser import SyntaxTreeVisitor
+from resolver import Resolver
+
+
+def apply_procedure(procedure, arguments_values):
+    while True:
+        if isinstance(procedure, BuiltInProcedure):
+            value = procedure.call(arguments_values, apply_procedure)
+            if type(value) is Evaluation:
+                value = ClosureCompiler(value.environment).compile(value.expression)(None)
+        elif isinstance(procedure, (CompiledProcedure, BytecodeProcedure)):
+            value = procedure.call(Interpreter.prepare_args(procedure, arguments_values))
+        else:
+            value = Interpreter().apply_procedure(procedure, arguments_values)
+        if not isinstance(value, TailCall):
+            return value
+        procedure = value.procedure
+        arguments_values = value.arguments_values
+
+
+def check_procedure(procedure):
+    if not isinstance(procedure, SchemeProcedure):
+        raise SchemeRuntimeError(f"{procedure} is not a procedure")
+    return procedure
+
+
+def check_assigned(name, value):
+    if isinstance(value, UnAssigned):
+        raise SchemeRuntimeError(f"variable {name} Unassigned")
+    return value
+
+
+# every node is compiled once into a python closure taking the current Frame (None at top level),
+# calls in tail position return a TailCall that apply_procedure trampolines.
+# variables are resolved by the Resolver, locals live in Frame slots and globals in the environment dictionary
+class ClosureCompiler(SyntaxTreeVisitor):
+    def __init__(self, environment=None):
+        self.environment = Environment() if environment is None else environment
+        self.tail_position = False
+
+    def interpret_syntax_tree(self, syntax_tree):
+        result = None
+        resolver = Resolver()
+        try:
+            for expression in syntax_tree.nodes:
+                resolver.resolve(expression)
+                result = self.compile(expression)(None)
+            return result
+        except SchemeRuntimeError as error:
+            return SchemeString(error.message)
+
+    def compile(self, expression, tail_position=False):
+        old_tail_position = self.tail_position
+        self.tail_position = tail_position
+        compiled = expression.accept(self)
+        self.tail_position = old_tail_position
+        return compiled
+
+    def compile_body(self, body):
+        return self.compile_sequence(body, tail_position=True)
+
+    def compile_sequence(self, body, tail_position):
+        compiled_expressions = [self.compile(expression) for expression in body[:len(body) - 1]]
+        last_expression = self.compile(body[len(body) - 1], tail_position)
+        if len(compiled_expressions) == 0:
+            return last_expression
+
+        def sequence(frame):
+            for compiled_expression in compiled_expressions:
+                compiled_expression(frame)
+            return last_expression(frame)
+
+        return sequence
+
+    @staticmethod
+    def constant(value):
+        return lambda frame: value
+
+    def visit_number_literal(self, number_literal):
+        return self.constant(number_literal_value(number_literal))
+
+    def visit_bool_literal(self, bool_literal):
+        return self.constant(bool_literal_value(bool_literal))
+
+    def visit_char_literal(self, char_literal):
+        return self.constant(char_literal_value(char_literal))
+
+    def visit_string_literal(self, string_literal):
+        return self.constant(string_literal_value(string_literal))
+
+    def visit_constant(self, constant):
+        return self.constant(constant.value)
+
+    def visit_symbol(self, symbol):
+        return self.constant(SchemeSymbol(symbol.symbol))
+
+    def visit_list(self, quoted_list):
+        elements = [self.compile(element) for element in quoted_list.elements]
+
+        def quoted(frame):
+            return make_scheme_list([element(frame) for element in elements])
+
+        return quoted
+
+    def visit_vector(self, quoted_vector):
+        elements = [self.compile(element) for element in quoted_vector.elements]
+
+        def quoted(frame):
+            return SchemeVector([element(frame) for element in elements])
+
+        return quoted
+
+    def visit_conditional(self, conditional):
+        test = self.compile(conditional.test)
+        consequent = self.compile(conditional.consequent, self.tail_position)
+        if conditional.alternate is not None:
+            alternate = self.compile(conditional.alternate, self.tail_position)
+        else:
+            alternate = self.constant(SchemeEmptyList())
+
+        false = SchemeBool(False)
+
+        def if_expression(frame):
+            if test(frame) is false:
+                return alternate(frame)
+            return consequent(frame)
+
+        return if_expression
+
+    def visit_variable_reference(self, variable_reference):
+        name = variable_reference.variable_name
+        address = variable_reference.address
+        if address.is_global:
+            return self.global_reference(name)
+        slot = address.slot
+        if address.depth == 0:
+            def local_reference(frame):
+                return check_assigned(name, frame.slots[slot])
+
+            return local_reference
+        if address.depth == 1:
+            def parent_reference(frame):
+                return check_assigned(name, frame.parent.slots[slot])
+
+            return parent_reference
+        depth = address.depth
+
+        def ancestor_reference(frame):
+            return check_assigned(name, frame.ancestor(depth).slots[slot])
+
+        return ancestor_reference
+
+    def global_reference(self, name):
+        environment = self.environment
+        dictionary = environment.dictionary
+
+        def reference(frame):
+            value = dictionary.get(name)
+            if value is None:
+                value = environment.get(name)
+                if value is None:
+                    raise SchemeRuntimeError(f"variable {name} not found")
+            return check_assigned(name, value)
+
+        return reference
+
+    def visit_call(self, call):
+        callee = self.compile(call.callee)
+        args = [self.compile(arg) for arg in call.args.args]
+        if self.tail_position:
+            def tail_call(frame):
+                procedure = check_procedure(callee(frame))
+                return TailCall(procedure, [arg(frame) for arg in args])
+
+            return tail_call
+
+        def non_tail_call(frame):
+            procedure = check_procedure(callee(frame))
+            return apply_procedure(procedure, [arg(frame) for arg in args])
+
+        return non_tail_call
+
+    def visit_lambda(self, lambda_expression):
+        formals = lambda_expression.formals
+        body = lambda_expression.body
+        name = lambda_expression.name
+        position = lambda_expression.position
+        compiled_body = self.compile_body(body)
+
+        def make_procedure(frame):
+            return CompiledProcedure(formals, body, frame, compiled_body, name, position)
+
+        return make_procedure
+
+    def visit_definition(self, definition):
+        name = definition.name
+        expression = self.compile(definition.expression)
+        environment = self.environment
+
+        def define(frame):
+            environment.add(name, expression(frame))
+
+        return define
+
+    def visit_assignment(self, assignment):
+        name = assignment.name
+        address = assignment.address
+        expression = self.compile(assignment.expression)
+        if address.is_global:
+            environment = self.environment
+
+            def assign_global(frame):
+                if environment.get(name) is None:
+                    raise SchemeRuntimeError(f"variable {name} not bound")
+                environment.set(name, expression(frame))
+
+            return assign_global
+
+        depth = address.depth
+        slot = address.slot
+
+        def assign_local(frame):
+            frame.ancestor(depth).slots[slot] = expression(frame)
+
+        return assign_local
+
+    def visit_sequence(self, sequence):
+        return self.compile_sequence(sequence.expressions, self.tail_position)
+
+    def visit_let(self, let):
+        inits = [self.compile(binding.init) for binding in let.bindings]
+        body = self.compile_sequence(let.body, self.tail_position)
+
+        def let_expression(frame):
+            return body(Frame([init(frame) for init in inits], frame))
+
+        return let_expression
+
+    def visit_and(self, and_expression):
+        tests = [self.compile(test) for test in and_expression.tests[:len(and_expression.tests) - 1]]
+        last_test = self.compile(and_expression.tests[len(and_expression.tests) - 1], self.tail_position)
+        false = SchemeBool(False)
+
+        def and_tests(frame):
+            for test in tests:
+                value = test(frame)
+                if value is false:
+                    return value
+            return last_test(frame)
+
+        return and_tests
+
+    def visit_or(self, or_expression):
+        tests = [self.compile(test) for test in or_expression.tests[:len(or_expression.tests) - 1]]
+        last_test = self.compile(or_expression.tests[len(or_expression.tests) - 1], self.tail_position)
+        false = SchemeBool(False)
+
+        def or_tests(frame):
+            for test in tests:
+                value = test(frame)
+                if value is not false:
+                    return value
+            return last_test(frame)
+
+        return or_tests
+
+    def visit_cond(self, cond):
+        clauses = []
+        for clause in cond.clauses:
+            condition = None if clause.is_else else self.compile(clause.condition)
+            sequence = self.compile_sequence(clause.sequence, self.tail_position) if clause.sequence else None
+            clauses.append((condition, sequence))
+        false = SchemeBool(False)
+
+        def cond_clauses(frame):
+            for condition, sequence in clauses:
+                if condition is None:
+                    return sequence(frame)
+                value = condition(frame)
+                if value is not false:
+                    return value if sequence is None else sequence(frame)
+            return false
+
+        return cond_clauses
+
+    def visit_unassigned(self, unassigned):
+        return self.constant(UnAssigned())
@@ -2,7 +2,7 @@ from schemeexpression import *
 
 
 def make_begin(sequence):
-    return Call(Lambda(FormalParameters(), sequence))
+    return Sequence(sequence)
 
 
 class CondClause:
@@ -13,19 +13,7 @@ class CondClause:
 
 
 def make_cond(clauses):
-    number_of_clauses = len(clauses)
-    expression = BoolLiteral("#f")
-
-    for index in range(number_of_clauses - 1, -1, -1):
-        clause = clauses[index]
-        if clause.is_else:
-            expression = make_begin(clause.sequence)
-        else:
-            expression = Conditional(clause.condition,
-                                     make_begin(clause.sequence) if len(clause.sequence) > 0 else clause.condition,
-                                     expression)
-
-    return expression
+    return Cond(clauses)
 
 
 class LetBinding:
@@ -35,13 +23,7 @@ class LetBinding:
 
 
 def make_let(bindings, body):
-    parameters = FormalParameters()
-    arguments = Args()
-    for binding in bindings:
-        parameters.append_parameter(binding.variable)
-        arguments.add(binding.init)
-    lambda_expression = Lambda(parameters, body)
-    return Call(lambda_expression, arguments)
+    return Let(bindings, body)
 
 
 def make_letstar(bindings, body):
@@ -74,19 +56,15 @@ def make_and(tests):
         return BoolLiteral("#t")
     if len(tests) == 1:
         return tests[0]
-    test_result_variable_name = f"{str(len(tests))}_and"
-    test_result_variable_reference = VariableReference(test_result_variable_name)
-    let_body = [Conditional(test_result_variable_reference, make_and(tests[1:]), test_result_variable_reference)]
-    return make_let([LetBinding(test_result_variable_name, tests[0])], let_body)
+    return And(tests)
 
 
 def make_or(tests):
     if len(tests) == 0:
         return BoolLiteral("#f")
-    test_result_variable_name = f"{str(len(tests))}_or"
-    test_result_variable_reference = VariableReference(test_result_variable_name)
-    let_body = [Conditional(test_result_variable_reference, test_result_variable_reference, make_or(tests[1:]))]
-    return make_let([LetBinding(test_result_variable_name, tests[0])], let_body)
+    if len(tests) == 1:
+        return tests[0]
+    return Or(tests)
 
 
 def make_delay(exp):
@@ -1,21 +1,60 @@
+# the value of a global variable shared with the call sites that cache it, None while the variable is unbound
+class GlobalCell:
+    __slots__ = ('value',)
+
+    def __init__(self, value=None):
+        self.value = value
+
 
 class Environment:
     def __init__(self, parent=None):
         self.parent = parent
         self.dictionary = {}
+        # the global environment this one is nested in
+        self.root = self if parent is None else parent.root
+        self.cells = None
 
     def get(self, name):
-        if name in self.dictionary.keys():
-            return self.dictionary[name]
-        if self.parent is not None:
-            return self.parent.get(name)
+        environment = self
+        while environment is not None:
+            dictionary = environment.dictionary
+            if name in dictionary:
+                return dictionary[name]
+            environment = environment.parent
         return None
 
     def add(self, name, value):
         self.dictionary[name] = value
+        if self.cells is not None and name in self.cells:
+            self.cells[name].value = value
 
     def set(self, name, value):
-        if name in self.dictionary.keys():
-            self.dictionary[name] = value
+        if name in self.dictionary:
+            self.add(name, value)
         elif self.parent is not None:
             self.parent.set(name, value)
+
+    # the cell of a variable of this environment, kept up to date by add and set
+    def cell(self, name):
+        if self.cells is None:
+            self.cells = {}
+        cell = self.cells.get(name)
+        if cell is None:
+            cell = GlobalCell(self.dictionary.get(name))
+            self.cells[name] = cell
+        return cell
+
+
+# array backed environment of a procedure call, variables are addressed by (depth, slot) computed by the Resolver
+class Frame:
+    __slots__ = ('slots', 'parent')
+
+    def __init__(self, slots, parent=None):
+        self.slots = slots
+        self.parent = parent
+
+    def ancestor(self, depth):
+        frame = self
+        for _ in range(depth):
+            frame = frame.parent
+        return frame
@@ -1,5 +1,7 @@
-from environment import Environment
+from environment import Environment, Frame
 from parser import SyntaxTreeVisitor
+from resolver import Resolver
+from schemeexpression import VariableReference
 from schemeobject import *
 
 
@@ -9,15 +11,70 @@ class TailCall:
         self.arguments_values = arguments_values
 
 
+# an expression returned by the eval built in, the engine that called it evaluates it in the global environment
+# given to eval, like a tail call
+class Evaluation:
+    def __init__(self, expression, environment):
+        self.expression = expression
+        self.environment = environment
+
+
+def number_literal_value(number_literal):
+    literal = number_literal.lexeme
+    value = float(literal) if '.' in literal else int(literal)
+    return SchemeNumber(value)
+
+
+def bool_literal_value(bool_literal):
+    literal = bool_literal.lexeme[1:]
+    value = True if literal == 't' else False
+    return SchemeBool(value)
+
+
+def char_literal_value(char_literal):
+    literal = char_literal.lexeme[2:]
+    value = literal
+    if literal == "newline":
+        value = "\n"
+    if literal == "space":
+        value = ' '
+    return SchemeChar(value)
+
+
+def string_literal_value(string_literal):
+    literal = string_literal.lexeme[1:len(string_literal.lexeme) - 1]
+    return SchemeString(literal)
+
+
+class InlineCacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+
+
+# lookups of global callees answered by the cache of their call site, and the ones that had to fill it
+inline_cache_stats = InlineCacheStats()
+
+
+# walks the syntax tree. calls and lets bind their variables in array Frames, locals are read by the (depth, slot)
+# address of the Resolver and globals in the global environment
 class Interpreter(SyntaxTreeVisitor):
     def __init__(self, environment=None):
         self.environment = Environment() if environment is None else environment
+        # the frame of the call or let being evaluated, None at top level
+        self.frame = None
         self.tail_context = False
 
     def interpret_syntax_tree(self, syntax_tree):
         result = None
+        resolver = Resolver()
         try:
             for expression in syntax_tree.nodes:
+                resolver.resolve(expression)
                 result = self.interpret_expression(expression)
             return result
         except SchemeRuntimeError as error:
@@ -41,31 +98,26 @@ class Interpreter(SyntaxTreeVisitor):
         return value
 
     def visit_number_literal(self, number_literal):
-        literal = number_literal.lexeme
-        value = float(literal) if '.' in literal else int(literal)
-        return SchemeNumber(value)
+        return number_literal_value(number_literal)
 
     def visit_bool_literal(self, bool_literal):
-        literal = bool_literal.lexeme[1:]
-        value = True if literal == 't' else False
-        return SchemeBool(value)
+        return bool_literal_value(bool_literal)
 
     def visit_char_literal(self, char_literal):
-        literal = char_literal.lexeme[2:]
-        value = literal
-        if literal == "newline":
-            value = "\n"
-        if literal == "space":
-            value = ' '
-        return SchemeChar(value)
+        return char_literal_value(char_literal)
 
     def visit_string_literal(self, string_literal):
-        literal = string_literal.lexeme[1:len(string_literal.lexeme) - 1]
-        return SchemeString(literal)
+        return string_literal_value(string_literal)
+
+    def visit_constant(self, constant):
+        return constant.value
 
     def visit_list(self, quoted_list):
         return make_scheme_list([self.interpret_expression(element) for element in quoted_list.elements])
 
+    def visit_vector(self, quoted_vector):
+        return SchemeVector([self.interpret_expression(element) for element in quoted_vector.elements])
+
     def visit_symbol(self, symbol):
         return SchemeSymbol(symbol.symbol)
 
@@ -77,45 +129,98 @@ class Interpreter(SyntaxTreeVisitor):
             conditional.alternate) if conditional.alternate is not None else SchemeEmptyList()
 
     def visit_variable_reference(self, variable_reference):
-        value = self.environment.get(variable_reference.variable_name)
+        address = variable_reference.address
+        if address.is_global:
+            value = self.environment.root.dictionary.get(variable_reference.variable_name)
+        else:
+            value = self.frame.ancestor(address.depth).slots[address.slot]
+        return self.check_variable_value(variable_reference.variable_name, value)
+
+    def check_variable_value(self, name, value):
         if value is None:
-            self.raise_error(f"variable {variable_reference.variable_name} not found")
-        if value == UnAssigned():
-            self.raise_error(f"variable {variable_reference.variable_name} Unassigned")
+            self.raise_error(f"variable {name} not found")
+        if isinstance(value, UnAssigned):
+            self.raise_error(f"variable {name} Unassigned")
         return value
 
     def visit_call(self, call):
-        procedure = self.interpret_expression(call.callee)
+        callee = call.callee
+        if type(callee) is VariableReference and callee.address is not None and callee.address.is_global:
+            procedure = self.global_callee(call)
+        else:
+            procedure = self.interpret_expression(callee)
         if not isinstance(procedure, SchemeProcedure):
             self.raise_error(f"{procedure} is not a procedure")
         arguments_values = [self.interpret_expression(arg) for arg in call.args.args]
         return self.do_apply(procedure, arguments_values)
 
+    # the cell of a global callee is cached on its call site, define and set! keep the cell up to date,
+    # the cache is filled again when the call site runs in another global environment
+    def global_callee(self, call):
+        root = self.environment.root
+        if call.callee_cell_environment is root:
+            inline_cache_stats.hits += 1
+        else:
+            inline_cache_stats.misses += 1
+            call.callee_cell = root.cell(call.callee.variable_name)
+            call.callee_cell_environment = root
+        return self.check_variable_value(call.callee.variable_name, call.callee_cell.value)
+
     def do_apply(self, procedure, arguments_values):
         if self.tail_context:
             return TailCall(procedure, arguments_values)
-        args = self.prepare_args(procedure, arguments_values)
         if isinstance(procedure, BuiltInProcedure):
+            value = procedure.call(arguments_values, self.apply_procedure)
+            if type(value) is Evaluation:
+                return self.interpret_evaluation(value)
+            return value
+        args = self.prepare_args(procedure, arguments_values)
+        if isinstance(procedure, (CompiledProcedure, BytecodeProcedure)):
             return procedure.call(args)
         else:
             return self.interpret_scheme_procedure_call(procedure, args)
 
+    # runs a procedure to its value on this interpreter, for built ins calling procedures
+    def apply_procedure(self, procedure, arguments_values):
+        old_tail_context = self.tail_context
+        self.tail_context = False
+        value = self.trampoline(self.do_apply(procedure, arguments_values))
+        self.tail_context = old_tail_context
+        return value
+
+    def interpret_evaluation(self, evaluation):
+        old_environment = self.environment
+        old_frame = self.frame
+        self.environment = evaluation.environment
+        self.frame = None
+        value = self.interpret_expression(evaluation.expression)
+        self.environment = old_environment
+        self.frame = old_frame
+        return value
+
     def visit_lambda(self, lambda_expression):
-        return UserDefinedProcedure(lambda_expression.formals, lambda_expression.body, self.environment)
+        return InterpretedProcedure(lambda_expression.formals, lambda_expression.body, self.frame, self.environment,
+                                    lambda_expression.name, lambda_expression.position)
 
     def visit_definition(self, definition):
         self.environment.add(definition.name, self.interpret_expression(definition.expression))
 
     def visit_assignment(self, assignment):
+        address = assignment.address
+        if not address.is_global:
+            self.frame.ancestor(address.depth).slots[address.slot] = self.interpret_expression(assignment.expression)
+            return
         old_value = self.environment.get(assignment.name)
         if old_value is None:
             raise SchemeRuntimeError(f"variable {assignment.name} not bound")
         self.environment.set(assignment.name, self.interpret_expression(assignment.expression))
 
+    # the body runs in a frame of the arguments, and reads its globals in the environment the procedure was made in
     def interpret_scheme_procedure_call(self, procedure, args):
-        call_environment = self.prepare_call_environment(args, procedure)
         old_environment = self.environment
-        self.environment = call_environment
+        old_frame = self.frame
+        self.environment = procedure.global_environment
+        self.frame = self.prepare_call_frame(args, procedure)
         for expression in procedure.body[:len(procedure.body) - 1]:
             self.interpret_expression(expression)
 
@@ -124,15 +229,12 @@ class Interpreter(SyntaxTreeVisitor):
         value = self.interpret_expression_tail(last_expression)
         self.tail_context = False
         self.environment = old_environment
+        self.frame = old_frame
 
         return value
 
-    @staticmethod
-    def prepare_call_environment(args, procedure):
-        call_environment = Environment(procedure.environment)
-        for parameter, argument in zip(procedure.parameters, args):
-            call_environment.add(parameter, argument)
-        return call_environment
+    def prepare_call_frame(self, args, procedure):
+        return Frame(args, procedure.environment)
 
     @staticmethod
     def prepare_args(procedure, args):
@@ -144,6 +246,49 @@ class Interpreter(SyntaxTreeVisitor):
             raise SchemeRuntimeError(
                 f"procedure expects {procedure.arity} argument {'s' if procedure.arity > 1 else ''}, {len(args)} given")
 
+    def interpret_sequence_tail(self, expressions):
+        for expression in expressions[:len(expressions) - 1]:
+            self.interpret_expression(expression)
+        return self.interpret_expression_tail(expressions[len(expressions) - 1])
+
+    def visit_sequence(self, sequence):
+        return self.interpret_sequence_tail(sequence.expressions)
+
+    def visit_let(self, let):
+        let_frame = Frame([self.interpret_expression(binding.init) for binding in let.bindings], self.frame)
+        old_frame = self.frame
+        self.frame = let_frame
+        value = self.interpret_sequence_tail(let.body)
+        self.frame = old_frame
+        return value
+
+    def visit_and(self, and_expression):
+        tests = and_expression.tests
+        for test in tests[:len(tests) - 1]:
+            value = self.interpret_expression(test)
+            if not self.truth(value):
+                return value
+        return self.interpret_expression_tail(tests[len(tests) - 1])
+
+    def visit_or(self, or_expression):
+        tests = or_expression.tests
+        for test in tests[:len(tests) - 1]:
+            value = self.interpret_expression(test)
+            if self.truth(value):
+                return value
+        return self.interpret_expression_tail(tests[len(tests) - 1])
+
+    def visit_cond(self, cond):
+        for clause in cond.clauses:
+            if clause.is_else:
+                return self.interpret_sequence_tail(clause.sequence)
+            value = self.interpret_expression(clause.condition)
+            if self.truth(value):
+                if len(clause.sequence) == 0:
+                    return value
+                return self.interpret_sequence_tail(clause.sequence)
+        return SchemeBool(False)
+
     def visit_unassigned(self, unassigned):
         return UnAssigned()
 
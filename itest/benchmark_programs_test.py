@@ -0,0 +1,14 @@
+from pathlib import Path
+
+from itest.sample_programs_test import find_expected
+from itest.test_setup import ExpressionTest
+
+
+class BenchmarkProgramsTest(ExpressionTest):
+    def test_all_benchmark_programs(self):
+        programs_dir = Path(Path(__file__).parents[1], "benchmarks", "programs")
+        for program_file_path in sorted(programs_dir.glob("*.scm")):
+            with self.subTest(program=program_file_path.name):
+                self.setUp()
+                program_text = program_file_path.read_text()
+                self.assertEqual(find_expected(program_text), self.evaluate(program_text))
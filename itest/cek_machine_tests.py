@@ -0,0 +1,82 @@
+import sys
+
+from itest import definitions_tests, derivedexpressions_tests, lambda_tests, quotes_test, sample_programs_test, \
+    scheme_builtins_tests, stream_tests, tail_recursion_test
+from itest.test_setup import ExpressionTest
+from cekmachine import CekMachine
+
+
+class CekMachineDefinitionTests(definitions_tests.DefinitionTests):
+    engine = 'cek'
+
+
+class CekMachineDerivedExpressionsTest(derivedexpressions_tests.DerivedExpressionsTest):
+    engine = 'cek'
+
+
+class CekMachineLambdaTests(lambda_tests.LambdaTests):
+    engine = 'cek'
+
+
+class CekMachineQuotesTest(quotes_test.QuotesTest):
+    engine = 'cek'
+
+
+class CekMachineSampleProgramsTest(sample_programs_test.SampleProgramsTest):
+    engine = 'cek'
+
+
+class CekMachineSchemeBuiltinsTest(scheme_builtins_tests.SchemeBuiltinsTest):
+    engine = 'cek'
+
+
+class CekMachineStreamTest(stream_tests.StreamTest):
+    engine = 'cek'
+
+
+class CekMachineTailRecursionTest(tail_recursion_test.TailRecursionTest):
+    engine = 'cek'
+
+    # the machine keeps its continuation in the heap, non tail recursion does not use the python stack
+    def test_non_tail_recursive_counter(self):
+        self.expect_with_tight_recursion_limits("100", """(define (recursive-counter n)
+                        (cond ((<= n 0) 0)
+                              (else (+ 1 (recursive-counter (- n 1))))))
+                        (recursive-counter 100)""")
+
+
+class CekMachineDepthTest(ExpressionTest):
+    engine = 'cek'
+
+    def test_deep_non_tail_recursion(self):
+        self.assertEqual("100000", self.evaluate("""(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1)))))
+                                                  (count 100000)"""))
+
+    def test_deep_non_tail_recursion_in_eval(self):
+        self.assertEqual("100000", self.evaluate("""(define env (scheme-report-environment 5))
+        (eval '(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1))))) env)
+        (eval '(count 100000) env)"""))
+
+    def test_deep_recursion_in_arguments_and_let(self):
+        self.assertEqual("( 50000 . 50000 )", self.evaluate("""
+        (define (build n) (if (= n 0) '() (cons n (build (- n 1)))))
+        (define (depth n) (let ((rest (if (= n 0) 0 (depth (- n 1))))) (+ rest 1)))
+        (cons (length (build 50000)) (- (depth 50000) 1))"""))
+
+    def test_depth_limit_raises_scheme_error(self):
+        old_max_depth = CekMachine.default_max_depth
+        try:
+            CekMachine.default_max_depth = 1000
+            self.assertEqual('"maximum recursion depth of 1000 frames exceeded"', self.evaluate(
+                "(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1))))) (count 2000)"))
+            self.assertEqual("500", self.evaluate("(count 500)"))
+        finally:
+            CekMachine.default_max_depth = old_max_depth
+
+    def test_recursion_through_map(self):
+        old_recursion_limit = sys.getrecursionlimit()
+        try:
+            sys.setrecursionlimit(200)
+            self.assertEqual("( 2 3 4 )", self.evaluate("(map (lambda (x) (+ x 1)) '(1 2 3))"))
+        finally:
+            sys.setrecursionlimit(old_recursion_limit)
@@ -0,0 +1,34 @@
+from itest import definitions_tests, derivedexpressions_tests, lambda_tests, quotes_test, sample_programs_test, \
+    scheme_builtins_tests, stream_tests, tail_recursion_test
+
+
+class ClosureCompilerDefinitionTests(definitions_tests.DefinitionTests):
+    engine = 'closure'
+
+
+class ClosureCompilerDerivedExpressionsTest(derivedexpressions_tests.DerivedExpressionsTest):
+    engine = 'closure'
+
+
+class ClosureCompilerLambdaTests(lambda_tests.LambdaTests):
+    engine = 'closure'
+
+
+class ClosureCompilerQuotesTest(quotes_test.QuotesTest):
+    engine = 'closure'
+
+
+class ClosureCompilerSampleProgramsTest(sample_programs_test.SampleProgramsTest):
+    engine = 'closure'
+
+
+class ClosureCompilerSchemeBuiltinsTest(scheme_builtins_tests.SchemeBuiltinsTest):
+    engine = 'closure'
+
+
+class ClosureCompilerStreamTest(stream_tests.StreamTest):
+    engine = 'closure'
+
+
+class ClosureCompilerTailRecursionTest(tail_recursion_test.TailRecursionTest):
+    engine = 'closure'
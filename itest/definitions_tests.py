@@ -36,3 +36,13 @@ class DefinitionTests(ExpressionTest):
         expression = "(define a #t) (define (f) a) (define (g a) (f)) (g 1)"
         expected = "#t"
         self.assertEqual(expected, self.evaluate(expression))
+
+    def test_redefined_builtin_called_in_earlier_procedure(self):
+        self.evaluate("(define (f) (+ 1 2))")
+        self.evaluate("(define + -)")
+        self.assertEqual("-1", self.evaluate("(f)"))
+
+    def test_assigned_builtin_called_in_earlier_procedure(self):
+        self.evaluate("(define (f) (abs -1))")
+        self.evaluate("(set! abs (lambda (x) 42))")
+        self.assertEqual("42", self.evaluate("(f)"))
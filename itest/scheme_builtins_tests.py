@@ -36,6 +36,18 @@ class SchemeBuiltinsTest(ExpressionTest):
         self.assertEqual("#t", self.evaluate("(define (f x) x) (define g f) (equal? f g)"))
         self.assertEqual("#f", self.evaluate("(define (f x) x) (define (g x) (+ x 1)) (equal? f g)"))
 
+    def test_equal_of_circular_lists(self):
+        self.assertEqual('"cannot compare circular lists"', self.evaluate('''
+        (define a (list 1 2)) (set-cdr! (cdr a) a)
+        (define b (list 1 2)) (set-cdr! (cdr b) b)
+        (equal? a b)'''))
+        self.assertEqual("#f", self.evaluate("(equal? a (list 1 2 1 2))"))
+
+    def test_length_of_circular_list(self):
+        self.assertEqual('"argument ( 1 . ( 2 . ... ) ) is of incorrect type "', self.evaluate('''
+        (define a (list 1 2)) (set-cdr! (cdr a) a)
+        (length a)'''))
+
     # numeric operations
     def test_arithmetics(self):
         expression = "(+ 1 2 (- 3) (* 4 5) (/ 6 3 1) )"
@@ -96,6 +108,7 @@ class SchemeBuiltinsTest(ExpressionTest):
     def test_remainder(self):
         self.assertEqual("0", self.evaluate("(remainder 4 2 )"))
         self.assertEqual("1", self.evaluate("(remainder 4 3 )"))
+        self.assertIn("divison by zero", self.evaluate("(remainder 4 0)"))
 
     def test_abs(self):
         self.assertEqual("1001.6", self.evaluate("(abs -1001.6 )"))
@@ -183,6 +196,177 @@ class SchemeBuiltinsTest(ExpressionTest):
          6) 
          )"""))
 
+    # vectors
+    def test_vector_literal(self):
+        self.assertEqual("#( 1 a ( b c ) #( #t ) )", self.evaluate("#(1 a (b c) #(#t))"))
+        self.assertEqual("#( 1 2 )", self.evaluate("(quote #(1 2))"))
+        self.assertEqual("#()", self.evaluate("'#()"))
+
+    def test_is_vector(self):
+        self.assertEqual("#t", self.evaluate("(vector? #(1))"))
+        self.assertEqual("#f", self.evaluate("(vector? (list 1))"))
+
+    def test_make_vector(self):
+        self.assertEqual("#( a a a )", self.evaluate("(make-vector 3 'a)"))
+        self.assertEqual("3", self.evaluate("(vector-length (make-vector 3))"))
+        self.assertIn("at least 1 argument", self.evaluate("(make-vector)"))
+        self.assertIn("at most 2 arguments", self.evaluate("(make-vector 1 2 3)"))
+        self.assertIn("incorrect type", self.evaluate("(make-vector 1.5)"))
+
+    def test_vector(self):
+        self.assertEqual("#( 3 #t )", self.evaluate("(vector (+ 1 2) (not #f))"))
+        self.assertEqual("#()", self.evaluate("(vector)"))
+
+    def test_vector_ref_and_set(self):
+        self.assertEqual("b", self.evaluate("(vector-ref #(a b c) 1)"))
+        self.assertEqual("#( 1 x 3 )", self.evaluate("(define v (vector 1 2 3)) (vector-set! v 1 'x) v"))
+        self.assertIn("out of range", self.evaluate("(vector-ref #(a b c) 3)"))
+        self.assertIn("out of range", self.evaluate("(vector-set! (vector 1) -1 0)"))
+        self.assertIn("incorrect type", self.evaluate("(vector-ref (list 1) 0)"))
+
+    def test_vector_fill(self):
+        self.assertEqual("#( 0 0 )", self.evaluate("(define v (vector 1 2)) (vector-fill! v 0) v"))
+
+    def test_vector_list_conversions(self):
+        self.assertEqual("( 1 2 3 )", self.evaluate("(vector->list #(1 2 3))"))
+        self.assertEqual("#( 1 2 3 )", self.evaluate("(list->vector (list 1 2 3))"))
+        self.assertEqual("()", self.evaluate("(vector->list (vector))"))
+        self.assertIn("incorrect type", self.evaluate("(list->vector (cons 1 2))"))
+
+    def test_vector_map(self):
+        self.assertEqual("#( 1 4 9 )", self.evaluate("(vector-map (lambda (x) (* x x)) #(1 2 3))"))
+        self.assertEqual("#( 11 22 )", self.evaluate("(vector-map + #(1 2 3) #(10 20))"))
+        self.assertIn("incorrect type", self.evaluate("(vector-map + (list 1))"))
+
+    def test_vector_for_each(self):
+        self.assertEqual("( 3 2 1 )", self.evaluate(
+            "(define l '()) (vector-for-each (lambda (x) (set! l (cons x l))) #(1 2 3)) l"))
+        self.assertEqual("( 33 11 )", self.evaluate(
+            "(define l '()) (vector-for-each (lambda (x y) (set! l (cons (+ x y) l))) #(1 3) #(10 30 50)) l"))
+
+    def test_vector_equal(self):
+        self.assertEqual("#t", self.evaluate("(equal? #(1 (2)) (vector 1 (list 2)))"))
+        self.assertEqual("#f", self.evaluate("(eqv? (vector 1) (vector 1))"))
+
+    # homogeneous numeric vectors
+    def test_numeric_vector_construction(self):
+        self.assertEqual("#f64( 1.0 2.5 )", self.evaluate("(f64vector 1 2.5)"))
+        self.assertEqual("#s64( 7 7 7 )", self.evaluate("(make-s64vector 3 7)"))
+        self.assertEqual("#f64( 0.0 0.0 )", self.evaluate("(make-f64vector 2)"))
+        self.assertEqual("#s64()", self.evaluate("(s64vector)"))
+        self.assertIn("must be integers", self.evaluate("(s64vector 1 2.5)"))
+        self.assertIn("out of range", self.evaluate("(s64vector 9223372036854775808)"))
+        self.assertIn("incorrect type", self.evaluate("(f64vector 1 #t)"))
+
+    def test_numeric_vector_predicates(self):
+        self.assertEqual("#t", self.evaluate("(s64vector? (s64vector 1))"))
+        self.assertEqual("#f", self.evaluate("(s64vector? (f64vector 1))"))
+        self.assertEqual("#f", self.evaluate("(f64vector? (vector 1))"))
+
+    def test_numeric_vector_ref_and_set(self):
+        self.assertEqual("2", self.evaluate("(s64vector-ref (s64vector 1 2) 1)"))
+        self.assertEqual("#f64( 0.0 4.0 )", self.evaluate("(define v (make-f64vector 2 0)) (f64vector-set! v 1 4) v"))
+        self.assertEqual("2", self.evaluate("(f64vector-length (f64vector 1 2))"))
+        self.assertIn("out of range", self.evaluate("(s64vector-ref (s64vector 1) 1)"))
+        self.assertIn("must be integers", self.evaluate("(s64vector-set! (s64vector 1) 0 0.5)"))
+
+    def test_numeric_vector_list_conversions(self):
+        self.assertEqual("( 1 2 3 )", self.evaluate("(s64vector->list (list->s64vector (list 1 2 3)))"))
+        self.assertEqual("( 1.0 2.0 )", self.evaluate("(f64vector->list (list->f64vector (list 1 2)))"))
+        self.assertIn("incorrect type", self.evaluate("(list->f64vector (list 1 'a))"))
+
+    def test_numeric_vector_elementwise_operations(self):
+        self.assertEqual("#s64( 11 22 )", self.evaluate("(s64vector-add (s64vector 1 2) (s64vector 10 20))"))
+        self.assertEqual("#f64( 3.0 8.0 )", self.evaluate("(f64vector-mul (f64vector 1 2) (f64vector 3 4))"))
+        self.assertEqual("#f64( 1.5 3.0 )", self.evaluate("(f64vector-scale (f64vector 1 2) 1.5)"))
+        self.assertEqual("#s64( 1 3 6 )", self.evaluate("(s64vector-cumulative-sum (s64vector 1 2 3))"))
+        self.assertEqual("#f64( 1.0 3.0 6.0 )", self.evaluate("(f64vector-cumulative-sum (f64vector 1 2 3))"))
+        self.assertIn("different lengths", self.evaluate("(f64vector-add (f64vector 1) (f64vector 1 2))"))
+        self.assertIn("incorrect type", self.evaluate("(f64vector-add (f64vector 1) (s64vector 1))"))
+        self.assertIn("out of range", self.evaluate(
+            "(s64vector-add (s64vector 9223372036854775807) (s64vector 1))"))
+
+    def test_numeric_vector_reductions(self):
+        self.assertEqual("6", self.evaluate("(s64vector-sum (s64vector 1 2 3))"))
+        self.assertEqual("6.0", self.evaluate("(f64vector-sum (f64vector 1 2 3))"))
+        self.assertEqual("0.0", self.evaluate("(f64vector-sum (f64vector))"))
+        self.assertEqual("11.0", self.evaluate("(f64vector-dot (f64vector 1 2) (f64vector 3 4))"))
+        self.assertEqual("2", self.evaluate("(s64vector-min (s64vector 5 2 9))"))
+        self.assertEqual("9.0", self.evaluate("(f64vector-max (f64vector 5 2 9))"))
+        self.assertIn("empty", self.evaluate("(s64vector-max (s64vector))"))
+
+    # hash tables
+    def test_hash_table_set_and_ref(self):
+        self.assertEqual("( 1 2 3 )", self.evaluate("""
+        (define t (make-hash-table))
+        (hash-table-set! t '(a b) 1)
+        (hash-table-set! t "s" 2)
+        (hash-table-set! t #(1 (2)) 3)
+        (list (hash-table-ref t (list 'a 'b)) (hash-table-ref t "s") (hash-table-ref t (vector 1 (list 2))))"""))
+        self.assertEqual("#t", self.evaluate("(hash-table? (make-hash-table eqv?))"))
+        self.assertEqual("#f", self.evaluate("(hash-table? (list))"))
+
+    def test_hash_table_ref_missing_key(self):
+        self.assertIn("not found", self.evaluate("(hash-table-ref (make-hash-table) 'a)"))
+        self.assertEqual("none", self.evaluate("(hash-table-ref (make-hash-table) 'a (lambda () 'none))"))
+        self.assertEqual("none", self.evaluate("(hash-table-ref/default (make-hash-table) 'a 'none)"))
+
+    def test_hash_table_ref_of_unspecified_value(self):
+        self.assertEqual("#f", self.evaluate("""
+        (define y 0)
+        (define (f) (set! y 1))
+        (define t (make-hash-table))
+        (hash-table-set! t 'a (f))
+        (eq? (hash-table-ref t 'a (lambda () 'missing)) 'missing)"""))
+
+    def test_eq_hash_table_keys_by_identity(self):
+        self.assertEqual("( missing 1 2 )", self.evaluate("""
+        (define t (make-hash-table eq?))
+        (define key "s")
+        (hash-table-set! t key 1)
+        (hash-table-set! t 'symbol 2)
+        (list (hash-table-ref/default t "s" 'missing) (hash-table-ref t key) (hash-table-ref t 'symbol))"""))
+
+    def test_make_hash_table_equivalence(self):
+        self.assertIn("unsupported hash table equivalence", self.evaluate("(make-hash-table =)"))
+        self.assertIn("custom hash functions", self.evaluate("(make-hash-table equal? car)"))
+
+    def test_hash_table_update(self):
+        self.assertEqual("11", self.evaluate(
+            "(define t (make-hash-table)) (hash-table-set! t 'a 1) (hash-table-update! t 'a (lambda (x) (+ x 10)))"
+            "(hash-table-ref t 'a)"))
+        self.assertEqual("6", self.evaluate(
+            "(define t (make-hash-table)) (hash-table-update! t 'a (lambda (x) (+ x 1)) (lambda () 5))"
+            "(hash-table-ref t 'a)"))
+        self.assertEqual("2", self.evaluate(
+            "(define t (make-hash-table)) (hash-table-update!/default t 'a (lambda (x) (+ x 1)) 0)"
+            "(hash-table-update!/default t 'a (lambda (x) (+ x 1)) 0) (hash-table-ref t 'a)"))
+        self.assertIn("not found", self.evaluate("(hash-table-update! (make-hash-table) 'a (lambda (x) x))"))
+
+    def test_hash_table_delete_and_count(self):
+        self.assertEqual("( 2 1 #f )", self.evaluate("""
+        (define t (make-hash-table))
+        (hash-table-set! t 'a 1)
+        (hash-table-set! t 'b 2)
+        (define before (hash-table-count t))
+        (hash-table-delete! t 'a)
+        (list before (hash-table-size t) (hash-table-exists? t 'a))"""))
+
+    def test_hash_table_keys_values_and_walk(self):
+        self.assertEqual("( a b )", self.evaluate(
+            "(define t (make-hash-table)) (hash-table-set! t 'a 1) (hash-table-set! t 'b 2) (hash-table-keys t)"))
+        self.assertEqual("( 1 2 )", self.evaluate(
+            "(define t (make-hash-table)) (hash-table-set! t 'a 1) (hash-table-set! t 'b 2) (hash-table-values t)"))
+        self.assertEqual("( ( a . 1 ) )", self.evaluate(
+            "(define t (make-hash-table)) (hash-table-set! t 'a 1) (hash-table->alist t)"))
+        self.assertEqual("( ( b . 2 ) ( a . 1 ) )", self.evaluate("""
+        (define t (make-hash-table))
+        (hash-table-set! t 'a 1)
+        (hash-table-set! t 'b 2)
+        (define entries '())
+        (hash-table-walk t (lambda (k v) (hash-table-delete! t k) (set! entries (cons (cons k v) entries))))
+        entries"""))
+
     # control features
     def test_is_procedure(self):
         self.assertEqual("#f", self.evaluate("(procedure? #t)"))
@@ -260,6 +444,64 @@ class SchemeBuiltinsTest(ExpressionTest):
             '( '+ 1 2)
         {report_env})"""))
 
+    def test_eval_of_built_lists(self):
+        self.assertEqual("( 3 6 #t )", self.evaluate("""
+        (define env (scheme-report-environment 5))
+        (define code (list '+ 1 2))
+        (define before (eval code env))
+        (set-car! (cddr code) 5)
+        (list before (eval code env) (= (* 0.1 3) (eval (list '* 0.1 3) env)))"""))
+        self.assertEqual("9", self.evaluate("""
+        (define env (scheme-report-environment 5))
+        (eval '(define (square x) (* x x)) env)
+        (eval '(let* ((x 1) (y (+ x 2))) (square y)) env)"""))
+
+    def test_procedure_made_by_eval_reads_the_globals_of_its_environment(self):
+        self.assertEqual("( 1 . 3 )", self.evaluate("""
+        (define env (scheme-report-environment 5))
+        (eval '(define y 1) env)
+        (define y 2)
+        (define f (eval '(lambda (x) (let ((z x)) (set! x (+ z y)) (cons y x))) env))
+        (f 2)"""))
+
+    def test_eval_errors_stop_the_caller(self):
+        self.assertEqual('"variable y not found"', self.evaluate("""
+        (define x (eval 'y (scheme-report-environment 5)))
+        'continued"""))
+        self.assertEqual('"unexpected token )"', self.evaluate("(eval '(if) (scheme-report-environment 5))"))
+
+    def test_memoize(self):
+        self.assertEqual("( 102334155 ( ( hits . 38 ) ( misses . 41 ) ( evictions . 0 ) ( entries . 41 ) ) )",
+                         self.evaluate("""
+        (define fib (memoize (lambda (n) (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2)))))))
+        (list (fib 40) (memo-stats fib))"""))
+
+    def test_memoize_caches_unspecified_values(self):
+        self.assertEqual("( ( hits . 1 ) ( misses . 1 ) ( evictions . 0 ) ( entries . 1 ) )", self.evaluate("""
+        (define count 0)
+        (define bump (memoize (lambda (x) (set! count (+ count x)))))
+        (bump 1) (bump 1)
+        (memo-stats bump)"""))
+
+    def test_memoize_evicts_least_recently_used(self):
+        self.assertEqual("( ( hits . 1 ) ( misses . 4 ) ( evictions . 2 ) ( entries . 2 ) )", self.evaluate("""
+        (define square (memoize (lambda (x) (* x x)) 2))
+        (square 1) (square 2) (square 1) (square 3) (square 2)
+        (memo-stats square)"""))
+
+    def test_memoize_keys_on_argument_values(self):
+        self.assertEqual("( ( hits . 1 ) ( misses . 1 ) ( evictions . 0 ) ( entries . 1 ) )", self.evaluate("""
+        (define total (memoize (lambda numbers (apply + numbers)) 10 #t))
+        (total 1 2 3)
+        (total 1 2 3)
+        (memo-stats total)"""))
+
+    def test_memoize_arguments(self):
+        self.assertIn("incorrect type", self.evaluate("(memoize 1)"))
+        self.assertIn("at least 1 entry", self.evaluate("(memoize car 0)"))
+        self.assertIn("incorrect type", self.evaluate("(memo-stats car)"))
+        self.assertIn("expects 1 argument", self.evaluate("((memoize (lambda (x) x)) 1 2)"))
+
     def test_make_promise_force(self):
         self.assertEqual("11", self.evaluate(f"""
         (let ((x 0))
@@ -0,0 +1,45 @@
+import io
+import unittest
+
+from interpreter import Environment
+from main import init_global_environment, parse_command_line, run_stream
+
+
+class StreamTest(unittest.TestCase):
+    engine = 'interpreter'
+
+    def setUp(self):
+        self.env = Environment()
+        init_global_environment(self.env)
+        self.options = parse_command_line(['--engine', self.engine, '-'])
+
+    def run_program(self, lines):
+        return str(run_stream(lines, self.env, self.options))
+
+    def test_last_value(self):
+        program = '(define (square x)\n  (* x x))\n(define s "a\nb")\n(square 5)\n'
+        self.assertEqual("25", self.run_program(io.StringIO(program)))
+
+    def test_forms_are_evaluated_before_the_rest_is_read(self):
+        def lines():
+            yield '(define x 1)\n'
+            self.assertIsNotNone(self.env.get('x'))
+            yield '(+ x 1)\n'
+
+        self.assertEqual("2", self.run_program(lines()))
+
+    def test_runtime_error_stops_evaluation(self):
+        self.assertEqual('"variable y not found"', self.run_program(io.StringIO('(define x 1)\ny\n(define z 2)\n')))
+        self.assertIsNone(self.env.get('z'))
+
+    def test_scan_error_after_evaluated_forms(self):
+        value = self.run_program(io.StringIO('(define x 1)\n(f #y)\n'))
+        self.assertIn("boolean literal", value)
+        self.assertIsNotNone(self.env.get('x'))
+
+    def test_parse_error(self):
+        self.assertIn("unexpected end of file", self.run_program(io.StringIO('(define x 1)\n(f x\n')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -22,9 +22,11 @@ class TailRecursionTest(ExpressionTest):
         with self.assertRaises(RecursionError,
                                msg="maximum recursion depth exceeded while calling a Python object"):
             old_recursion_limit = sys.getrecursionlimit()
-            sys.setrecursionlimit(100)
-            self.evaluate(expression)
-            sys.setrecursionlimit(old_recursion_limit)
+            try:
+                sys.setrecursionlimit(100)
+                self.evaluate(expression)
+            finally:
+                sys.setrecursionlimit(old_recursion_limit)
 
     def test_tail_recursive_counter(self):
         expression = """(define (recursive-counter-iter n i)
@@ -61,3 +63,28 @@ class TailRecursionTest(ExpressionTest):
                         (recursive-counter 100)"""
         expected = "100"
         self.expect_with_tight_recursion_limits(expected, expression)
+
+    def test_tail_recursive_counter_in_let_and_or_expressions(self):
+        expression = """(define (recursive-counter-iter n i)
+                        (let ((next (- n 1)))
+                          (or (and (< n 0) 0)
+                              (if (= n 0) i (recursive-counter-iter next (+ i 1))))))
+                        (recursive-counter-iter 100 0)"""
+        expected = "100"
+        self.expect_with_tight_recursion_limits(expected, expression)
+
+    def test_tail_recursive_counter_through_apply(self):
+        expression = """(define (recursive-counter-iter n i)
+                        (if (= n 0) i (apply recursive-counter-iter (- n 1) (list (+ i 1)))))
+                        (recursive-counter-iter 200 0)"""
+        expected = "200"
+        self.expect_with_tight_recursion_limits(expected, expression)
+
+    def test_tail_recursive_procedure_in_for_each(self):
+        expression = """(define total 0)
+                        (define (add-up n)
+                          (if (= n 0) total (begin (set! total (+ total 1)) (add-up (- n 1)))))
+                        (for-each add-up (list 100 100))
+                        total"""
+        expected = "200"
+        self.expect_with_tight_recursion_limits(expected, expression)
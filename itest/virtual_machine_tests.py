@@ -0,0 +1,87 @@
+from itest import definitions_tests, derivedexpressions_tests, lambda_tests, quotes_test, sample_programs_test, \
+    scheme_builtins_tests, stream_tests, tail_recursion_test
+from itest.test_setup import ExpressionTest
+from virtualmachine import VirtualMachine
+
+
+class VirtualMachineDefinitionTests(definitions_tests.DefinitionTests):
+    engine = 'vm'
+
+
+class VirtualMachineDerivedExpressionsTest(derivedexpressions_tests.DerivedExpressionsTest):
+    engine = 'vm'
+
+
+class VirtualMachineLambdaTests(lambda_tests.LambdaTests):
+    engine = 'vm'
+
+
+class VirtualMachineQuotesTest(quotes_test.QuotesTest):
+    engine = 'vm'
+
+
+class VirtualMachineSampleProgramsTest(sample_programs_test.SampleProgramsTest):
+    engine = 'vm'
+
+
+class VirtualMachineSchemeBuiltinsTest(scheme_builtins_tests.SchemeBuiltinsTest):
+    engine = 'vm'
+
+
+class VirtualMachineStreamTest(stream_tests.StreamTest):
+    engine = 'vm'
+
+
+class VirtualMachineTailRecursionTest(tail_recursion_test.TailRecursionTest):
+    engine = 'vm'
+
+    # calls of compiled procedures do not use the python stack
+    def test_non_tail_recursive_counter(self):
+        self.expect_with_tight_recursion_limits("100", """(define (recursive-counter n)
+                        (cond ((<= n 0) 0)
+                              (else (+ 1 (recursive-counter (- n 1))))))
+                        (recursive-counter 100)""")
+
+
+class VirtualMachineDepthTest(ExpressionTest):
+    engine = 'vm'
+
+    def test_deep_non_tail_recursion(self):
+        self.assertEqual("100000", self.evaluate("""(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1)))))
+                                                  (count 100000)"""))
+
+    def test_deep_non_tail_recursion_in_eval(self):
+        self.assertEqual("100000", self.evaluate("""(define env (scheme-report-environment 5))
+        (eval '(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1))))) env)
+        (eval '(count 100000) env)"""))
+
+    def test_depth_limit_raises_scheme_error(self):
+        old_max_depth = VirtualMachine.default_max_depth
+        try:
+            VirtualMachine.default_max_depth = 1000
+            self.assertEqual('"maximum recursion depth of 1000 calls exceeded"', self.evaluate(
+                "(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1))))) (count 2000)"))
+            self.assertEqual("500", self.evaluate("(count 500)"))
+        finally:
+            VirtualMachine.default_max_depth = old_max_depth
+
+    def test_quoted_list_is_built_on_every_evaluation(self):
+        self.assertEqual("( 1 2 )", self.evaluate("""(define (f) '(1 2))
+                                                   (set-car! (f) 3)
+                                                   (f)"""))
+
+    def test_let_frame_is_left_after_its_body(self):
+        self.assertEqual("( 3 . 1 )", self.evaluate("(define (f x) (cons (let ((x 3)) x) x)) (f 1)"))
+
+    def test_procedures_are_called_by_eval(self):
+        self.assertEqual("( 42 6 )", self.evaluate("""(define (f x) (* 2 x))
+                                                    (define (adder n) (lambda (x) (+ x n)))
+                                                    (define env (scheme-report-environment 5))
+                                                    (list (eval (list f 21) env) (eval (list (adder 5) 1) env))"""))
+
+    def test_procedures_made_by_eval_run_on_their_machine(self):
+        self.assertEqual("( 1 1 )", self.evaluate("""(define env (scheme-report-environment 5))
+                                                   (eval '(define y 1) env)
+                                                   (define y 2)
+                                                   (define f (eval '(lambda () y) env))
+                                                   (list (f) (apply f '()))"""))
@@ -1,10 +1,12 @@
+import re
+
 from schemetoken import Token, TokenType, keywords_map
 
 
 # ##Lexical Grammar:##
 # reduced version of https://schemers.org/Documents/Standards/R5RS/HTML/r5rs-Z-H-10.html#%_sec_7.1.1
 #
-# token -> keyword | identifier | number | string | boolean | character | ( | ) | .
+# token -> keyword | identifier | number | string | boolean | character | ( | #( | ) | .
 # comment -> ; all characters until line break
 # keyword -> else | define | quote | lambda | if | set! | begin | cond | and | or | case | let
 # identifier -> initial subsequent* | + | -
@@ -23,248 +25,280 @@ from schemetoken import Token, TokenType, keywords_map
 # https://docs.microsoft.com/en-us/cpp/c-language/lexical-grammar?view=msvc-160
 
 
+initial_symbols = frozenset('!$%&*/:<=>?^_~')
+signs = frozenset('+-')
+delimiter_symbols = frozenset('();')
+
+# ascii runs are matched by the patterns, the few non ascii characters fall back to the str predicates
+subsequent_pattern = re.compile(r"[A-Za-z0-9!$%&*/:<=>?^_~+\-.]*")
+digits_pattern = re.compile(r"[0-9]*")
+character_name_pattern = re.compile(r"[^\s();]*")
+# the common well formed tokens in one match, anything else goes through the handlers
+token_pattern = re.compile(r"""\s*(?:
+    (?P<open>\()
+    |(?P<close>\))
+    |(?P<identifier>[A-Za-z!$%&*/:<=>?^_~][A-Za-z0-9!$%&*/:<=>?^_~+\-.]*(?=[\s();]|\Z))
+    |(?P<number>[0-9]+(?:\.[0-9]*)?(?=[\s();]|\Z))
+    )?""", re.VERBOSE)
+fast_token_types = {'open': TokenType.OPEN_PAREN, 'close': TokenType.CLOSE_PAREN, 'number': TokenType.NUMBER}
+
+
+def isinitial(char):
+    return char.isalpha() or char in initial_symbols
+
+
+def issubsequent(char):
+    return isinitial(char) or char.isdigit() or char in '+-.'
+
+
+def isdigit(char):
+    return char.isdigit()
+
+
+# lexemes are sliced out of the text, each token is recognized by a handler picked from the
+# table below with its first character, line and column are tracked by counting newlines between tokens
 class Lexer:
-    def __init__(self, text):
+    def __init__(self, text, first_line_number=1):
         self.text = text
         self.text_length = len(text)
         self.current_index = 0
-        self.current_line = 1
-        self.current_column = 1
-        self.current_line_begin = 0
-        self.current_line_end = self.text.find('\n', self.current_line_begin)
-        if self.current_line_end == -1:
-            self.current_line_end = len(self.text)
+        self.current_line = first_line_number
+        # index of the last newline before current_index
+        self.current_line_start = -1
+        self.unterminated_string = False
         self.errors = []
 
     def scan(self):
         tokens = []
-        while not self.isend():
-            while not self.isend() and self.iswhitespace():
-                self.advance()
-            if not self.isend():
-                next_token = self.token()
-                if next_token is not None:
-                    tokens.append(next_token)
+        text = self.text
+        text_length = self.text_length
+        handlers = self.handlers
+        while True:
+            match = token_pattern.match(text, self.current_index)
+            kind = match.lastgroup
+            if kind is not None:
+                start, end = match.span(kind)
+                if text.count('\n', self.current_index, start):
+                    self.move_to(start)
+                self.current_index = end
+                lexeme = text[start:end]
+                if kind == 'identifier':
+                    tokentype = keywords_map.get(lexeme, TokenType.IDENTIFIER)
+                else:
+                    tokentype = fast_token_types[kind]
+                tokens.append(Token(lexeme, tokentype, self.current_line, end - self.current_line_start))
+                continue
+            index = match.end()
+            self.move_to(index)
+            if index >= text_length:
+                break
+            handler = handlers.get(text[index])
+            if handler is None:
+                handler = self.non_ascii_handler(text[index])
+            next_token = handler(self, index)
+            if next_token is not None:
+                tokens.append(next_token)
         if self.haserrors():
             return self.errors
         return tokens
 
-    def token(self):
-        current_char = self.text[self.current_index]
-
-        if self.isinitial():
-            return self.identifier()
-
-        elif self.ispeculiaridentifier():
-            return self.peculiaridentifier()
-
-        elif current_char == '.':
-            if self.next() is not None and self.next().isdigit():
-                return self.number()
-            elif self.isnextdelimiter():
-                return self.dot()
-            else:
-                return self.identifier()
-
-        elif self.issign() or self.isdigit():
-            return self.number()
-
-        elif current_char == '"':
-            return self.string()
-
-        elif current_char == '#':
-            if self.next() is not None and self.next() == "\\":
-                return self.character()
-            else:
-                return self.boolean()
-        elif current_char == '(':
-            return self.openparenthesis()
-
-        elif current_char == ')':
-            return self.closeparenthesis()
-
-        elif current_char == "'":
-            return self.single_quote()
-
-        elif current_char == ';':
-            self.comment()
-
-        else:
-            self.raiseerror(f"unexpected character {current_char}")
-            self.advance()
-
-    def identifier(self):
-        lexeme = self.text[self.current_index]
-        self.advance()
-        while not self.isend() and self.issubsequent():
-            lexeme += self.text[self.current_index]
-            self.advance()
-        if not self.checkdelimiter():
-            self.raiseerror(f"expected delimiter after identifier name {lexeme}, got {self.text[self.current_index]}")
+    @staticmethod
+    def non_ascii_handler(char):
+        if isinitial(char):
+            return Lexer.identifier
+        elif char.isdigit():
+            return Lexer.number
+        return Lexer.unexpected
+
+    def identifier(self, start):
+        end = self.run(subsequent_pattern, issubsequent, start + 1)
+        lexeme = self.text[start:end]
+        self.move_to(end)
+        if not self.isdelimiter(end):
+            self.raiseerror(f"expected delimiter after identifier name {lexeme}, got {self.text[end]}")
         if lexeme in keywords_map:
             return self.maketoken(lexeme, keywords_map[lexeme])
         else:
             return self.maketoken(lexeme, TokenType.IDENTIFIER)
 
-    def peculiaridentifier(self):
-        token = self.maketoken(self.text[self.current_index], TokenType.IDENTIFIER)
-        self.advance()
-        if not self.checkdelimiter():
-            self.raiseerror(
-                f"expected delimiter after identifier name {token.lexeme}, got {self.text[self.current_index]}")
-        return token
-
-    def number(self):
-        dotcount = 0
-
-        def checkdot():
-            nonlocal dotcount
-            if self.text[self.current_index] == '.':
-                dotcount += 1
-                if dotcount > 1:
-                    self.raiseerror(f"multiple decimal points in number literal:{self.text[self.current_index]}")
-
-        lexeme = self.text[self.current_index]
-        checkdot()
-        self.advance()
-
-        while not self.isend() and self.text[self.current_index].isdigit():
-            lexeme += self.text[self.current_index]
-            self.advance()
-
-        if not self.isend():
-            checkdot()
-
-            if self.text[self.current_index] == '.':
-                lexeme += self.text[self.current_index]
-                self.advance()
-                while not self.isend() and self.text[self.current_index].isdigit():
-                    lexeme += self.text[self.current_index]
-                    self.advance()
-
-        if not self.checkdelimiter():
-            self.raiseerror(f"invalid character in number literal:{self.text[self.current_index]}")
-
-        return self.maketoken(lexeme, TokenType.NUMBER)
-
-    def dot(self):
-        self.advance()
-        return self.maketoken(".", TokenType.DOT)
-
-    def string(self):
-        lexeme = self.text[self.current_index]
-        self.advance()
-        while not self.isend() and not self.text[self.current_index] == '"':
-            lexeme += self.text[self.current_index]
-            self.advance()
-        if self.isend():
-            self.raiseerror('unbalanced "')
+    def sign(self, start):
+        if self.isdelimiter(start + 1):
+            token = self.maketoken(self.text[start], TokenType.IDENTIFIER)
+            self.move_to(start + 1)
+            return token
+        return self.number(start)
+
+    def dot(self, start):
+        if start + 1 < self.text_length and self.text[start + 1].isdigit():
+            return self.number(start)
+        elif self.isdelimiter(start + 1):
+            self.move_to(start + 1)
+            return self.maketoken(".", TokenType.DOT)
         else:
-            lexeme += self.text[self.current_index]
-            self.advance()
-            return self.maketoken(lexeme, TokenType.STRING)
-
-    def boolean(self):
-        lexeme = self.text[self.current_index]
-        self.advance()
-        if self.isend():
+            return self.identifier(start)
+
+    def number(self, start):
+        text = self.text
+        end = self.run(digits_pattern, isdigit, start + 1)
+        if end < self.text_length and text[end] == '.':
+            if text[start] == '.':
+                self.move_to(end)
+                self.raiseerror(f"multiple decimal points in number literal:{text[end]}")
+            end = self.run(digits_pattern, isdigit, end + 1)
+        self.move_to(end)
+        if not self.isdelimiter(end):
+            self.raiseerror(f"invalid character in number literal:{text[end]}")
+        return self.maketoken(text[start:end], TokenType.NUMBER)
+
+    def string(self, start):
+        end = self.text.find('"', start + 1)
+        if end == -1:
+            self.move_to(self.text_length)
+            self.unterminated_string = True
+            self.raiseerror('unbalanced "')
+            return None
+        self.move_to(end + 1)
+        return self.maketoken(self.text[start:end + 1], TokenType.STRING)
+
+    def hash(self, start):
+        if start + 1 < self.text_length and self.text[start + 1] == '\\':
+            return self.character(start)
+        if start + 1 < self.text_length and self.text[start + 1] == '(':
+            return self.openvector(start)
+        return self.boolean(start)
+
+    def boolean(self, start):
+        self.move_to(start + 1)
+        if start + 1 >= self.text_length:
             self.raiseerror("expected boolean literal")
-        if self.text[self.current_index] not in {'t', 'f'}:
+            return None
+        if self.text[start + 1] not in {'t', 'f'}:
             self.raiseerror("boolean literal should be either 't' or 'f'")
-        lexeme += self.text[self.current_index]
-        self.advance()
-        return self.maketoken(lexeme, TokenType.BOOLEAN)
-
-    def character(self):
-        lexeme = self.text[self.current_index:self.current_index + 2]
-        self.advance()
-        self.advance()
-
-        while not self.isend() and not self.checkdelimiter():
-            lexeme += self.text[self.current_index]
-            self.advance()
+        self.move_to(start + 2)
+        return self.maketoken(self.text[start:start + 2], TokenType.BOOLEAN)
+
+    def character(self, start):
+        end = character_name_pattern.match(self.text, start + 2).end()
+        lexeme = self.text[start:end]
+        self.move_to(end)
         if len(lexeme) > 3 and lexeme not in {'#\\space', '#\\newline'}:
             self.raiseerror(f"invalid character name {lexeme}")
         return self.maketoken(lexeme, TokenType.CHARACTER)
 
-    def openparenthesis(self):
-        self.advance()
+    def openparenthesis(self, start):
+        self.move_to(start + 1)
         return self.maketoken('(', TokenType.OPEN_PAREN)
 
-    def closeparenthesis(self):
-        self.advance()
+    def openvector(self, start):
+        self.move_to(start + 2)
+        return self.maketoken('#(', TokenType.OPEN_VECTOR)
+
+    def closeparenthesis(self, start):
+        self.move_to(start + 1)
         return self.maketoken(')', TokenType.CLOSE_PAREN)
 
-    def single_quote(self):
-        self.advance()
+    def single_quote(self, start):
+        self.move_to(start + 1)
         return self.maketoken("'", TokenType.SINGLE_QUOTE)
 
-    def comment(self):
-        lexeme = self.text[self.current_index]
-        self.advance()
+    def comment(self, start):
+        end = self.text.find('\n', start)
+        self.move_to(self.text_length if end == -1 else end)
 
-        while not self.isend() and not self.text[self.current_index] == '\n':
-            lexeme += self.text[self.current_index]
-            self.advance()
+    def unexpected(self, start):
+        self.raiseerror(f"unexpected character {self.text[start]}")
+        self.move_to(start + 1)
 
-        return self.maketoken(lexeme, TokenType.COMMENT)
-
-    def advance(self):
-        if self.text[self.current_index] == '\n':
-            self.current_line += 1
-            self.current_column = 1
-            self.current_line_begin = self.current_index
-            self.current_line_end = self.text.find('\n', self.current_line_begin)
-            if self.current_line_end == -1:
-                self.current_line_end = len(self.text)
-        else:
-            self.current_column += 1
-        self.current_index += 1
+    def run(self, pattern, predicate, index):
+        text = self.text
+        while True:
+            index = pattern.match(text, index).end()
+            if index < self.text_length and text[index] >= '\x80' and predicate(text[index]):
+                index += 1
+            else:
+                return index
 
-    def iswhitespace(self):
-        return self.text[self.current_index].isspace()
+    def move_to(self, index):
+        newlines = self.text.count('\n', self.current_index, index)
+        if newlines:
+            self.current_line += newlines
+            self.current_line_start = self.text.rfind('\n', self.current_index, index)
+        self.current_index = index
 
     def isend(self):
         return self.current_index >= self.text_length
 
     def raiseerror(self, message):
-        line = self.text[self.current_line_begin:self.current_line_end]
+        line_begin = self.current_line_start + 1
+        line_end = self.text.find('\n', line_begin)
+        if line_end == -1:
+            line_end = self.text_length
+        line = self.text[line_begin:line_end]
         self.errors.append(f"line {self.current_line}: {line}\n{message}")
 
-    def isinitial(self):
-        return self.text[self.current_index].isalpha() or \
-               self.text[self.current_index] in ['!', '$', '%', '&', '*', '/', ':', '<', '=', '>', '?', '^', '_', '~']
-
-    def issubsequent(self):
-        current_char = self.text[self.current_index]
-        return self.isinitial() or current_char.isdigit() or current_char in ['+', '-', '.']
-
-    def ispeculiaridentifier(self):
-        return self.text[self.current_index] in ['+', '-'] and self.isnextdelimiter()
-
     def haserrors(self):
         return len(self.errors) > 0
 
-    def checkdelimiter(self):
-        return self.isdelimiter(self.current_index)
+    def isdelimiter(self, index):
+        return index >= self.text_length or self.text[index].isspace() or self.text[index] in delimiter_symbols
 
-    def isnextdelimiter(self):
-        return self.isdelimiter(self.current_index + 1)
+    def maketoken(self, lexeme, tokentype):
+        return Token(lexeme, tokentype, self.current_line, self.current_index - self.current_line_start)
 
-    def isdelimiter(self, index):
-        return index >= self.text_length or self.text[index].isspace() or self.text[index] in ['(', ')', ';']
 
-    def issign(self):
-        return self.text[self.current_index] in ['+', '-']
+# scans a program read line by line, typically from a file object, yielding its tokens as they are scanned.
+# lines are scanned as soon as they do not end inside a string, which is the only token spanning lines,
+# scanning stops at the first lines with errors
+class StreamLexer:
+    def __init__(self, lines):
+        self.lines = lines
+        self.errors = []
 
-    def isdigit(self):
-        return self.text[self.current_index].isdigit()
+    def tokens(self):
+        pending_lines = []
+        line_number = 1
+        in_string = False
+        for line in self.lines:
+            pending_lines.append(line)
+            if in_string and '"' not in line:
+                continue
+            lexer = Lexer(''.join(pending_lines), line_number)
+            tokens = lexer.scan()
+            in_string = lexer.unterminated_string
+            if in_string:
+                continue
+            if lexer.haserrors():
+                self.errors.extend(lexer.errors)
+                return
+            yield from tokens
+            line_number += len(pending_lines)
+            pending_lines = []
+        if pending_lines:
+            lexer = Lexer(''.join(pending_lines), line_number)
+            tokens = lexer.scan()
+            if lexer.haserrors():
+                self.errors.extend(lexer.errors)
+                return
+            yield from tokens
 
-    def next(self):
-        if self.current_index + 1 < self.text_length:
-            return self.text[self.current_index + 1]
+    def haserrors(self):
+        return len(self.errors) > 0
+
+
+def make_handlers():
+    handlers = {}
+    for code in range(128):
+        char = chr(code)
+        if isinitial(char):
+            handlers[char] = Lexer.identifier
+        elif char.isdigit():
+            handlers[char] = Lexer.number
         else:
-            return None
+            handlers[char] = Lexer.unexpected
+    handlers.update({'+': Lexer.sign, '-': Lexer.sign, '.': Lexer.dot, '"': Lexer.string, '#': Lexer.hash,
+                     '(': Lexer.openparenthesis, ')': Lexer.closeparenthesis, "'": Lexer.single_quote,
+                     ';': Lexer.comment})
+    return handlers
 
-    def maketoken(self, lexeme, tokentype):
-        return Token(lexeme, tokentype, self.current_line, self.current_column)
+
+Lexer.handlers = make_handlers()
@@ -1,53 +1,251 @@
+import argparse
+import functools
+import json
 import sys
-
-from lexer import Lexer
-from parser import Parser
+import time
+from collections import OrderedDict
+
+from astcache import AstCache
+from cekmachine import CekMachine
+from closurecompiler import ClosureCompiler
+from interpreter import Evaluation, inline_cache_stats
+from lexer import Lexer, StreamLexer
+from optimizer import Optimizer
+from parser import DatumParser, Parser, StreamParser, SyntaxTree
+from profiler import AllocationTracker, CountingInterpreter, EvaluationCounters, Profile, ProfilingInterpreter, \
+    SamplingProfiler, count_nodes
 from schemebuiltins import *
-from schemeobject import BuiltInProcedure
+from resolver import Resolver
+from schemeobject import BuiltInProcedure, SchemePair, SchemeVector, make_scheme_list
+from virtualmachine import VirtualMachine
 from environment import Environment
 
 global_env = Environment()
 
+engines = {
+    'interpreter': Interpreter,
+    'closure': ClosureCompiler,
+    'cek': CekMachine,
+    'vm': VirtualMachine,
+}
+
 
 def main(args):
+    options = parse_command_line(args[1:])
+    CekMachine.default_max_depth = options.max_depth
+    VirtualMachine.default_max_depth = options.max_depth
+    if options.disassemble:
+        VirtualMachine.disassembly_file = sys.stderr
     init_global_environment(global_env)
-    if len(args) == 1:
-        repl()
+    profile = Profile(global_env) if options.profile else None
+    sampling_profiler = None
+    if options.sample is not None:
+        sampling_profiler = SamplingProfiler(global_env, options.sample_interval / 1000)
+        sampling_profiler.start()
+    allocation_tracker = None
+    if options.track_allocations:
+        allocation_tracker = AllocationTracker(global_env)
+        allocation_tracker.start()
+    if options.filename is None:
+        repl(options, profile)
+    elif options.filename == '-':
+        scheme_print(run_stream(sys.stdin, global_env, options, profile))
+    elif options.stream:
+        with open(options.filename, 'r') as program:
+            scheme_print(run_stream(program, global_env, options, profile))
+    elif options.timings:
+        with open(options.filename, 'r') as program:
+            value, timings = timed_scan_evaluate(program.read(), global_env, options.engine, options.optimize)
+        scheme_print(value)
+        print(json.dumps(timings), file=sys.stderr)
     else:
-        filename = args[1]
-        program = open(filename, 'r')
-        value = scan_evaluate(program.read(), global_env)
+        ast_cache = AstCache(options.cache_dir) if options.cache else None
+        program = open(options.filename, 'r')
+        value = run(program.read(), global_env, options, ast_cache, profile)
         scheme_print(value)
+    if options.inline_cache_stats:
+        print(f"inline caches: {inline_cache_stats.hits} hits, {inline_cache_stats.misses} misses", file=sys.stderr)
+    if allocation_tracker is not None:
+        allocation_tracker.stop()
+        print(allocation_tracker.report(), file=sys.stderr)
+    if profile is not None:
+        print(profile.report(), file=sys.stderr)
+    if sampling_profiler is not None:
+        sampling_profiler.stop()
+        with open(options.sample, 'w') as samples:
+            print(sampling_profiler.collapsed_stacks(), file=samples)
+
+
+def parse_command_line(args):
+    argument_parser = argparse.ArgumentParser(description="scheme interpreter")
+    argument_parser.add_argument('filename', nargs='?',
+                                 help="program to run, - reads it from stdin, starts a repl if omitted")
+    argument_parser.add_argument('--engine', choices=engines.keys(), default='interpreter',
+                                 help="evaluation engine")
+    argument_parser.add_argument('--max-depth', type=int, default=CekMachine.default_max_depth,
+                                 help="number of continuation frames the cek engine, or calls the vm engine, keeps "
+                                      "before non tail recursion fails with an error, defaults to %(default)s")
+    argument_parser.add_argument('--disassemble', action='store_true',
+                                 help="print the bytecode of every top level form on stderr before the vm engine "
+                                      "runs it")
+    argument_parser.add_argument('--no-optimize', dest='optimize', action='store_false',
+                                 help="skip constant folding and literal decoding before evaluation")
+    argument_parser.add_argument('--optimizer-stats', action='store_true',
+                                 help="report the number of nodes rewritten by the optimizer on stderr")
+    argument_parser.add_argument('--stream', action='store_true',
+                                 help="scan, parse and evaluate the program one top level form at a time, "
+                                      "always the case when reading from stdin")
+    argument_parser.add_argument('--inline-cache-stats', action='store_true',
+                                 help="report the hits and misses of the interpreter call site caches on stderr")
+    argument_parser.add_argument('--no-cache', dest='cache', action='store_false',
+                                 help="do not load or store the parsed program in the syntax tree cache")
+    argument_parser.add_argument('--cache-dir', help="syntax tree cache directory, "
+                                                     "defaults to $XDG_CACHE_HOME/my-scheme")
+    argument_parser.add_argument('--profile', action='store_true',
+                                 help="report the calls, tail calls, self and cumulative time of every procedure "
+                                      "on stderr, runs on the interpreter engine")
+    argument_parser.add_argument('--sample', metavar='FILE',
+                                 help="sample the scheme call stack periodically and write the samples to FILE in "
+                                      "the collapsed stack format of flame graph tools")
+    argument_parser.add_argument('--sample-interval', type=float, metavar='MS',
+                                 default=SamplingProfiler.default_interval * 1000,
+                                 help="milliseconds between samples, defaults to %(default)s")
+    argument_parser.add_argument('--track-allocations', action='store_true',
+                                 help="report on stderr the pairs, numbers, strings, frames, procedures, promises "
+                                      "and tail calls created by every procedure, and their approximate bytes")
+    argument_parser.add_argument('--timings', action='store_true',
+                                 help="report on stderr, as json, the time and the counts of the lexer, parser, "
+                                      "optimizer and evaluation phases, the evaluation counts are kept by the "
+                                      "interpreter engine only")
+    options = argument_parser.parse_args(args)
+    if options.profile and options.engine != 'interpreter':
+        argument_parser.error("--profile runs on the interpreter engine only")
+    if options.sample is not None and options.profile:
+        argument_parser.error("--sample and --profile cannot be combined")
+    if options.sample is not None and options.engine == 'cek':
+        argument_parser.error("--sample does not support the cek engine")
+    if options.track_allocations and options.engine == 'cek':
+        argument_parser.error("--track-allocations does not support the cek engine")
+    if options.timings and (options.filename in (None, '-') or options.stream):
+        argument_parser.error("--timings needs a program file, it does not time the repl or a stream")
+    if options.timings and options.profile:
+        argument_parser.error("--timings and --profile cannot be combined")
+    return options
+
+
+def run(program, environment, options, ast_cache=None, profile=None):
+    try:
+        syntax_tree, rewrites = load_syntax_tree(program, environment, options, ast_cache)
+        if options.optimize and options.optimizer_stats:
+            print(f"optimizer rewrote {rewrites} nodes", file=sys.stderr)
+        return evaluate(syntax_tree, environment, options.engine, profile)
+
+    except (ScanException, ParseException) as scan_exception:
+        return '\n'.join(scan_exception.errors)
+
+
+# the cache is only given for programs run in a fresh global environment, see AstCache
+def load_syntax_tree(program, environment, options, ast_cache=None):
+    cached = None if ast_cache is None else ast_cache.load(program, options.optimize)
+    if cached is not None:
+        return cached
+    syntax_tree = scan(program)
+    # a repl line is not the whole program, later lines may rebind the built ins called in its lambdas
+    rewrites = optimize(syntax_tree, environment, options.filename is not None) if options.optimize else 0
+    if ast_cache is not None:
+        ast_cache.store(program, options.optimize, (syntax_tree, rewrites))
+    return syntax_tree, rewrites
+
+
+def run_stream(lines, environment, options, profile=None):
+    lexer = StreamLexer(lines)
+    parser = StreamParser(lexer.tokens())
+    nodes = parser.forms()
+    optimizer = Optimizer(environment)
+    if options.optimize:
+        nodes = optimizer.optimize_stream(nodes)
+    value = evaluate(SyntaxTree(nodes), environment, options.engine, profile)
+    if options.optimize and options.optimizer_stats:
+        print(f"optimizer rewrote {optimizer.rewrites} nodes", file=sys.stderr)
+    if lexer.haserrors():
+        return '\n'.join(lexer.errors)
+    if parser.haserrors():
+        return '\n'.join(parser.errors)
+    return value
 
 
 def scheme_print(value):
     print(value)
 
 
-def repl():
+def repl(options, profile=None):
     while True:
         try:
             expression = input("-> ")
-            value = scan_evaluate(expression, global_env)
+            value = run(expression, global_env, options, profile=profile)
             scheme_print(value)
         except EOFError:
             break
 
 
-def scan_evaluate(expression, environment):
+# evaluates one more piece of a program in the environment, later pieces may redefine built ins, so calls
+# in lambda bodies are not folded
+def scan_evaluate(expression, environment, engine='interpreter', optimize_syntax_tree=True):
     try:
         syntax_tree = scan(expression)
-        return evaluate(syntax_tree, environment)
+        if optimize_syntax_tree:
+            optimize(syntax_tree, environment, fold_in_lambdas=False)
+        return evaluate(syntax_tree, environment, engine)
 
     except (ScanException, ParseException) as scan_exception:
         return '\n'.join(scan_exception.errors)
 
 
+# scan_evaluate timing every phase, returns the value and the timings of the phases that ran, by phase name.
+# the program is not cached, and only the interpreter engine counts what the evaluation does
+def timed_scan_evaluate(program, environment, engine='interpreter', optimize_syntax_tree=True):
+    timings = {}
+    try:
+        start = time.perf_counter()
+        tokens = lex(program)
+        timings['lex'] = {'seconds': time.perf_counter() - start, 'tokens': len(tokens)}
+        start = time.perf_counter()
+        syntax_tree = parse(tokens)
+        timings['parse'] = {'seconds': time.perf_counter() - start, 'nodes': count_nodes(syntax_tree.nodes)}
+        if optimize_syntax_tree:
+            start = time.perf_counter()
+            rewrites = optimize(syntax_tree, environment)
+            timings['optimize'] = {'seconds': time.perf_counter() - start, 'rewrites': rewrites}
+        counters = None
+        if engine == 'interpreter':
+            counters = EvaluationCounters()
+            interpreter = CountingInterpreter(environment, counters)
+        else:
+            interpreter = engines[engine](environment)
+        start = time.perf_counter()
+        value = interpreter.interpret_syntax_tree(syntax_tree)
+        timings['evaluate'] = {'seconds': time.perf_counter() - start}
+        if counters is not None:
+            timings['evaluate'].update(counters.as_dict())
+        return value, timings
+
+    except (ScanException, ParseException) as scan_exception:
+        return '\n'.join(scan_exception.errors), timings
+
+
 def scan(program):
+    return parse(lex(program))
+
+
+def lex(program):
     lexer = Lexer(program)
     tokens = lexer.scan()
     if lexer.haserrors():
         raise ScanException(lexer.errors)
+    return tokens
+
+
+def parse(tokens):
     parser = Parser(tokens)
     syntax_tree = parser.parse()
     if parser.haserrors():
@@ -55,8 +253,19 @@ def scan(program):
     return syntax_tree
 
 
-def evaluate(syntax_tree, environment):
-    interpreter = Interpreter(environment)
+def optimize(syntax_tree, environment, fold_in_lambdas=True):
+    optimizer = Optimizer(environment)
+    optimizer.fold_in_lambdas = fold_in_lambdas
+    optimizer.optimize_syntax_tree(syntax_tree)
+    return optimizer.rewrites
+
+
+# a profile is kept by the interpreter engine only, timing the calls of the evaluation
+def evaluate(syntax_tree, environment, engine='interpreter', profile=None):
+    if profile is not None:
+        interpreter = ProfilingInterpreter(environment, profile)
+    else:
+        interpreter = engines[engine](environment)
     return interpreter.interpret_syntax_tree(syntax_tree)
 
 
@@ -81,23 +290,36 @@ def init_global_environment(environment):
     # numerical operations
     environment.add('number?', BuiltInProcedure(is_number, arity=1))
     environment.add('integer?', BuiltInProcedure(is_integer, arity=1))
-    environment.add('<', BuiltInProcedure(numbers_less, variadic=True))
-    environment.add('<=', BuiltInProcedure(numbers_less_or_equal, variadic=True))
-    environment.add('>', BuiltInProcedure(numbers_greater, variadic=True))
-    environment.add('>=', BuiltInProcedure(numbers_greater_or_equal, variadic=True))
-    environment.add('=', BuiltInProcedure(numbers_equal, variadic=True))
-    environment.add('zero?', BuiltInProcedure(is_zero, arity=1))
-    environment.add('positive?', BuiltInProcedure(is_positive, arity=1))
-    environment.add('negative?', BuiltInProcedure(is_negative, arity=1))
-    environment.add('odd?', BuiltInProcedure(is_odd, arity=1))
-    environment.add('even?', BuiltInProcedure(is_even, arity=1))
-    environment.add('max', BuiltInProcedure(numbers_max, variadic=True))
-    environment.add('min', BuiltInProcedure(numbers_min, variadic=True))
-    environment.add('+', BuiltInProcedure(plus, variadic=True))
-    environment.add('-', BuiltInProcedure(minus, variadic=True))
-    environment.add('*', BuiltInProcedure(multiply, variadic=True))
-    environment.add('/', BuiltInProcedure(divide, variadic=True))
-    environment.add('abs', BuiltInProcedure(absolute_value, arity=1))
+    environment.add('<', BuiltInProcedure(numbers_less, variadic=True, argument_type=SchemeNumber,
+                                          fixed_arity_implementations={1: compare_one_number, 2: numbers_less_2}))
+    environment.add('<=', BuiltInProcedure(numbers_less_or_equal, variadic=True, argument_type=SchemeNumber,
+                                           fixed_arity_implementations={1: compare_one_number,
+                                                                        2: numbers_less_or_equal_2}))
+    environment.add('>', BuiltInProcedure(numbers_greater, variadic=True, argument_type=SchemeNumber,
+                                          fixed_arity_implementations={1: compare_one_number, 2: numbers_greater_2}))
+    environment.add('>=', BuiltInProcedure(numbers_greater_or_equal, variadic=True, argument_type=SchemeNumber,
+                                           fixed_arity_implementations={1: compare_one_number,
+                                                                        2: numbers_greater_or_equal_2}))
+    environment.add('=', BuiltInProcedure(numbers_equal, variadic=True, argument_type=SchemeNumber,
+                                          fixed_arity_implementations={1: compare_one_number, 2: numbers_equal_2}))
+    environment.add('zero?', BuiltInProcedure(is_zero, arity=1, argument_type=SchemeNumber))
+    environment.add('positive?', BuiltInProcedure(is_positive, arity=1, argument_type=SchemeNumber))
+    environment.add('negative?', BuiltInProcedure(is_negative, arity=1, argument_type=SchemeNumber))
+    environment.add('odd?', BuiltInProcedure(is_odd, arity=1, argument_type=SchemeNumber))
+    environment.add('even?', BuiltInProcedure(is_even, arity=1, argument_type=SchemeNumber))
+    environment.add('max', BuiltInProcedure(numbers_max, variadic=True, name='max', minimum_arity=1,
+                                            argument_type=SchemeNumber))
+    environment.add('min', BuiltInProcedure(numbers_min, variadic=True, name='min', minimum_arity=1,
+                                            argument_type=SchemeNumber))
+    environment.add('+', BuiltInProcedure(plus, variadic=True, argument_type=SchemeNumber,
+                                          fixed_arity_implementations={1: plus_1, 2: plus_2}))
+    environment.add('-', BuiltInProcedure(minus, variadic=True, name='-', minimum_arity=1, argument_type=SchemeNumber,
+                                          fixed_arity_implementations={1: minus_1, 2: minus_2}))
+    environment.add('*', BuiltInProcedure(multiply, variadic=True, argument_type=SchemeNumber,
+                                          fixed_arity_implementations={1: multiply_1, 2: multiply_2}))
+    environment.add('/', BuiltInProcedure(divide, variadic=True, name='/', minimum_arity=1, argument_type=SchemeNumber,
+                                          fixed_arity_implementations={1: divide_1, 2: divide_2}))
+    environment.add('abs', BuiltInProcedure(absolute_value, arity=1, argument_type=SchemeNumber))
     environment.add('remainder', BuiltInProcedure(remainder, arity=2))
 
     # booleans
@@ -107,15 +329,15 @@ def init_global_environment(environment):
     # pairs and lists
     environment.add('pair?', BuiltInProcedure(is_pair, arity=1))
     environment.add('cons', BuiltInProcedure(cons, arity=2))
-    environment.add('car', BuiltInProcedure(car, arity=1))
-    environment.add('cdr', BuiltInProcedure(cdr, arity=1))
+    environment.add('car', BuiltInProcedure(car, arity=1, argument_type=SchemePair))
+    environment.add('cdr', BuiltInProcedure(cdr, arity=1, argument_type=SchemePair))
     environment.add('set-car!', BuiltInProcedure(set_car, arity=2))
     environment.add('set-cdr!', BuiltInProcedure(set_cdr, arity=2))
     environment.add('null?', BuiltInProcedure(is_empty_list, arity=1))
     environment.add('list?', BuiltInProcedure(is_list, arity=1))
     environment.add('list', BuiltInProcedure(make_list, variadic=True))
     environment.add('length', BuiltInProcedure(list_length, arity=1))
-    environment.add('append', BuiltInProcedure(append_list, variadic=True))
+    environment.add('append', BuiltInProcedure(append_list, variadic=True, name='append', minimum_arity=1))
     environment.add('caar', BuiltInProcedure(caar, arity=1))
     environment.add('cadr', BuiltInProcedure(cadr, arity=1))
     environment.add('cdar', BuiltInProcedure(cdar, arity=1))
@@ -145,33 +367,140 @@ def init_global_environment(environment):
     environment.add('cdddar', BuiltInProcedure(cdddar, arity=1))
     environment.add('cddddr', BuiltInProcedure(cddddr, arity=1))
 
+    # vectors
+    environment.add('vector?', BuiltInProcedure(is_vector, arity=1))
+    environment.add('make-vector', BuiltInProcedure(make_vector, variadic=True, name='make-vector', minimum_arity=1))
+    environment.add('vector', BuiltInProcedure(make_vector_from_elements, variadic=True))
+    environment.add('vector-length', BuiltInProcedure(vector_length, arity=1, argument_type=SchemeVector))
+    environment.add('vector-ref', BuiltInProcedure(vector_ref, arity=2))
+    environment.add('vector-set!', BuiltInProcedure(vector_set, arity=3))
+    environment.add('vector-fill!', BuiltInProcedure(vector_fill, arity=2))
+    environment.add('vector->list', BuiltInProcedure(vector_to_list, arity=1, argument_type=SchemeVector))
+    environment.add('list->vector', BuiltInProcedure(list_to_vector, arity=1))
+    environment.add('vector-map', BuiltInProcedure(vector_map, variadic=True, name='vector-map', minimum_arity=2,
+                                                   applies_procedures=True))
+    environment.add('vector-for-each', BuiltInProcedure(vector_for_each, variadic=True, name='vector-for-each',
+                                                        minimum_arity=2, applies_procedures=True))
+
+    # homogeneous numeric vectors
+    add_numeric_vector_procedures(environment, 's64')
+    add_numeric_vector_procedures(environment, 'f64')
+
+    # hash tables
+    environment.add('hash-table?', BuiltInProcedure(is_hash_table, arity=1))
+    environment.add('make-hash-table', BuiltInProcedure(make_hash_table, variadic=True))
+    environment.add('hash-table-ref', BuiltInProcedure(hash_table_ref, variadic=True, name='hash-table-ref',
+                                                       minimum_arity=2, applies_procedures=True))
+    environment.add('hash-table-ref/default', BuiltInProcedure(hash_table_ref_default, arity=3))
+    environment.add('hash-table-set!', BuiltInProcedure(hash_table_set, arity=3))
+    environment.add('hash-table-update!', BuiltInProcedure(hash_table_update, variadic=True, name='hash-table-update!',
+                                                           minimum_arity=3, applies_procedures=True))
+    environment.add('hash-table-update!/default', BuiltInProcedure(hash_table_update_default, arity=4,
+                                                                   applies_procedures=True))
+    environment.add('hash-table-delete!', BuiltInProcedure(hash_table_delete, arity=2))
+    environment.add('hash-table-exists?', BuiltInProcedure(hash_table_exists, arity=2))
+    environment.add('hash-table-count', BuiltInProcedure(hash_table_count, arity=1))
+    environment.add('hash-table-size', BuiltInProcedure(hash_table_count, arity=1))
+    environment.add('hash-table-keys', BuiltInProcedure(hash_table_keys, arity=1))
+    environment.add('hash-table-values', BuiltInProcedure(hash_table_values, arity=1))
+    environment.add('hash-table->alist', BuiltInProcedure(hash_table_to_alist, arity=1))
+    environment.add('hash-table-walk', BuiltInProcedure(hash_table_walk, arity=2, applies_procedures=True))
+
     # control features
     environment.add('procedure?', BuiltInProcedure(is_procedure, arity=1))
-    environment.add('apply', BuiltInProcedure(apply, variadic=True))
-    environment.add('for-each', BuiltInProcedure(scheme_for_each, variadic=True))
-    environment.add('map', BuiltInProcedure(scheme_map, variadic=True))
-    environment.add('force', BuiltInProcedure(force, arity=1))
+    environment.add('apply', BuiltInProcedure(apply, variadic=True, name='apply', minimum_arity=2))
+    environment.add('for-each', BuiltInProcedure(scheme_for_each, variadic=True, name='for-each', minimum_arity=2,
+                                                 applies_procedures=True))
+    environment.add('map', BuiltInProcedure(scheme_map, variadic=True, name='map', minimum_arity=2,
+                                            applies_procedures=True))
+    environment.add('force', BuiltInProcedure(force, arity=1, argument_type=SchemePromise, applies_procedures=True))
     environment.add('make-promise', BuiltInProcedure(make_promise, arity=1))
+    environment.add('memoize', BuiltInProcedure(memoize, variadic=True, name='memoize', minimum_arity=1))
+    environment.add('memo-stats', BuiltInProcedure(memo_stats, arity=1))
 
     # eval
     environment.add('eval', BuiltInProcedure(scheme_eval, arity=2))
-    environment.add('scheme-report-environment', BuiltInProcedure(scheme_report_environmnt, arity=1))
-    environment.add('null-environment', BuiltInProcedure(null_environment, arity=1))
+    environment.add('scheme-report-environment',
+                    BuiltInProcedure(scheme_report_environmnt, arity=1, argument_type=SchemeNumber))
+    environment.add('null-environment', BuiltInProcedure(null_environment, arity=1, argument_type=SchemeNumber))
+
+
+# the procedures of one kind of homogeneous vector, s64vector-ref, make-f64vector, ...
+def add_numeric_vector_procedures(environment, kind):
+    name = f"{kind}vector"
+
+    def add(procedure_name, implementation, **kwargs):
+        environment.add(procedure_name, BuiltInProcedure(functools.partial(implementation, kind), **kwargs))
+
+    add(f'{name}?', is_numeric_vector, arity=1)
+    add(f'make-{name}', make_numeric_vector, variadic=True, name=f'make-{name}', minimum_arity=1)
+    add(name, make_numeric_vector_from_elements, variadic=True)
+    add(f'{name}-length', numeric_vector_length, arity=1)
+    add(f'{name}-ref', numeric_vector_ref, arity=2)
+    add(f'{name}-set!', numeric_vector_set, arity=3)
+    add(f'{name}->list', numeric_vector_to_list, arity=1)
+    add(f'list->{name}', list_to_numeric_vector, arity=1)
+    add(f'{name}-add', numeric_vector_add, arity=2)
+    add(f'{name}-mul', numeric_vector_multiply, arity=2)
+    add(f'{name}-scale', numeric_vector_scale, arity=2)
+    add(f'{name}-sum', numeric_vector_sum, arity=1)
+    add(f'{name}-dot', numeric_vector_dot, arity=2)
+    add(f'{name}-min', numeric_vector_min, arity=1)
+    add(f'{name}-max', numeric_vector_max, arity=1)
+    add(f'{name}-cumulative-sum', numeric_vector_cumulative_sum, arity=1)
+
+
+# the engine running the program calling eval evaluates the expression, its errors are raised to that program
+def scheme_eval(quoted_expression, env):
+    return Evaluation(eval_syntax_tree(quoted_expression), env)
 
 
-def scheme_eval(quoted_expression, env):
-    text = str(quoted_expression)
-    return scan_evaluate(text, env)
+# the resolved syntax trees built by eval, by the list they were built from, evicting the least recently used past
+# max_eval_syntax_trees. lists equal to a list already built, compared with equal?, reuse its tree. the keys are copies
+# of the lists, a list mutated after its evaluation is built again
+eval_syntax_trees = OrderedDict()
+max_eval_syntax_trees = 256
+
+
+def eval_syntax_tree(datum):
+    if not isinstance(datum, SchemePair):
+        return resolve(DatumParser(datum).parse_datum())
+    try:
+        expression = eval_syntax_trees.get(datum)
+    except TypeError:
+        # an element that cannot be hashed, the tree is not cached
+        return resolve(DatumParser(datum).parse_datum())
+    if expression is not None:
+        eval_syntax_trees.move_to_end(datum)
+        return expression
+    expression = resolve(DatumParser(datum).parse_datum())
+    eval_syntax_trees[copy_datum(datum)] = expression
+    if len(eval_syntax_trees) > max_eval_syntax_trees:
+        eval_syntax_trees.popitem(last=False)
+    return expression
+
+
+def resolve(expression):
+    Resolver().resolve(expression)
+    return expression
+
+
+def copy_datum(datum):
+    if isinstance(datum, SchemePair):
+        if datum.is_list():
+            return make_scheme_list([copy_datum(element) for element in datum])
+        return SchemePair(copy_datum(datum.first), copy_datum(datum.second))
+    if type(datum) is SchemeVector:
+        return SchemeVector([copy_datum(element) for element in datum.elements])
+    return datum
 
 
-@takes_scheme_number
 def scheme_report_environmnt(version):
     env = Environment()
     init_global_environment(env)
     return env
 
 
-@takes_scheme_number
 def null_environment(version):
     return Environment()
 
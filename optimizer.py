@@ -0,0 +1,203 @@
+from interpreter import *
+from parser import SyntaxTreeVisitor, SyntaxTreeWalker
+from schemeexpression import *
+from schemebuiltins import *
+
+pure_builtins = {
+    'eqv?': scheme_is,
+    'eq?': scheme_is,
+    'equal?': scheme_equal,
+    'number?': is_number,
+    'integer?': is_integer,
+    '<': numbers_less,
+    '<=': numbers_less_or_equal,
+    '>': numbers_greater,
+    '>=': numbers_greater_or_equal,
+    '=': numbers_equal,
+    'zero?': is_zero,
+    'positive?': is_positive,
+    'negative?': is_negative,
+    'odd?': is_odd,
+    'even?': is_even,
+    'max': numbers_max,
+    'min': numbers_min,
+    '+': plus,
+    '-': minus,
+    '*': multiply,
+    '/': divide,
+    'abs': absolute_value,
+    'remainder': remainder,
+    'not': scheme_not,
+    'boolean?': is_boolean,
+}
+
+
+class BoundNamesCollector(SyntaxTreeWalker):
+    def __init__(self):
+        self.names = set()
+
+    def visit_lambda(self, lambda_expression):
+        self.names.update(lambda_expression.formals.fixed_parameters)
+        if lambda_expression.formals.has_list_parameter:
+            self.names.add(lambda_expression.formals.list_parameter_name)
+        super().visit_lambda(lambda_expression)
+
+    def visit_definition(self, definition):
+        self.names.add(definition.name)
+        super().visit_definition(definition)
+
+    def visit_assignment(self, assignment):
+        self.names.add(assignment.name)
+        super().visit_assignment(assignment)
+
+    def visit_let(self, let):
+        self.names.update(binding.variable for binding in let.bindings)
+        super().visit_let(let)
+
+
+# rewrites literals into ready made constants, and folds calls of pure built ins with constant arguments
+# when the built in is not shadowed, neither by the program nor in the environment it will run in
+class Optimizer(SyntaxTreeVisitor):
+    def __init__(self, environment=None):
+        self.environment = Environment() if environment is None else environment
+        self.bound_names = set()
+        self.rewrites = 0
+        self.fold_in_lambdas = True
+        self.lambda_depth = 0
+
+    def optimize_syntax_tree(self, syntax_tree):
+        collector = BoundNamesCollector()
+        collector.walk_all(syntax_tree.nodes)
+        self.bound_names = collector.names
+        syntax_tree.nodes = [self.optimize(expression) for expression in syntax_tree.nodes]
+        return syntax_tree
+
+    # optimizes each top level form right before it is evaluated, later forms are not known yet and may redefine
+    # a built in, so only calls evaluated right away are folded, not the ones in lambda bodies
+    def optimize_stream(self, expressions):
+        self.fold_in_lambdas = False
+        collector = BoundNamesCollector()
+        for expression in expressions:
+            collector.walk(expression)
+            self.bound_names = collector.names
+            yield self.optimize(expression)
+
+    def optimize(self, expression):
+        return expression.accept(self)
+
+    def optimize_all(self, expressions):
+        return [self.optimize(expression) for expression in expressions]
+
+    def rewrite(self, value):
+        self.rewrites += 1
+        return Constant(value)
+
+    def visit_number_literal(self, number_literal):
+        return self.rewrite(number_literal_value(number_literal))
+
+    def visit_bool_literal(self, bool_literal):
+        return self.rewrite(bool_literal_value(bool_literal))
+
+    def visit_char_literal(self, char_literal):
+        return self.rewrite(char_literal_value(char_literal))
+
+    def visit_string_literal(self, string_literal):
+        return self.rewrite(string_literal_value(string_literal))
+
+    def visit_symbol(self, symbol):
+        return self.rewrite(SchemeSymbol(symbol.symbol))
+
+    def visit_constant(self, constant):
+        return constant
+
+    def visit_list(self, quoted_list):
+        # the list itself is not a constant, as it is mutable
+        quoted_list.elements = self.optimize_all(quoted_list.elements)
+        return quoted_list
+
+    def visit_vector(self, quoted_vector):
+        quoted_vector.elements = self.optimize_all(quoted_vector.elements)
+        return quoted_vector
+
+    def visit_conditional(self, conditional):
+        conditional.test = self.optimize(conditional.test)
+        conditional.consequent = self.optimize(conditional.consequent)
+        if conditional.alternate is not None:
+            conditional.alternate = self.optimize(conditional.alternate)
+        if not isinstance(conditional.test, Constant):
+            return conditional
+        self.rewrites += 1
+        if Interpreter.truth(conditional.test.value):
+            return conditional.consequent
+        return conditional.alternate if conditional.alternate is not None else Constant(SchemeEmptyList())
+
+    def visit_variable_reference(self, variable_reference):
+        return variable_reference
+
+    def visit_call(self, call):
+        call.callee = self.optimize(call.callee)
+        call.args.args = self.optimize_all(call.args.args)
+        procedure = self.pure_builtin(call.callee)
+        if procedure is None or not all(isinstance(arg, Constant) for arg in call.args.args):
+            return call
+        try:
+            value = procedure.call([arg.value for arg in call.args.args])
+        except SchemeRuntimeError:
+            # leave it to fail at runtime, if it is ever evaluated
+            return call
+        return self.rewrite(value)
+
+    def pure_builtin(self, callee):
+        if not isinstance(callee, VariableReference):
+            return None
+        if self.lambda_depth > 0 and not self.fold_in_lambdas:
+            return None
+        name = callee.variable_name
+        if name not in pure_builtins or name in self.bound_names:
+            return None
+        procedure = self.environment.get(name)
+        if not isinstance(procedure, BuiltInProcedure) or procedure.implementation is not pure_builtins[name]:
+            return None
+        return procedure
+
+    def visit_lambda(self, lambda_expression):
+        self.lambda_depth += 1
+        lambda_expression.body = self.optimize_all(lambda_expression.body)
+        self.lambda_depth -= 1
+        return lambda_expression
+
+    def visit_definition(self, definition):
+        definition.expression = self.optimize(definition.expression)
+        return definition
+
+    def visit_assignment(self, assignment):
+        assignment.expression = self.optimize(assignment.expression)
+        return assignment
+
+    def visit_sequence(self, sequence):
+        sequence.expressions = self.optimize_all(sequence.expressions)
+        return sequence
+
+    def visit_let(self, let):
+        for binding in let.bindings:
+            binding.init = self.optimize(binding.init)
+        let.body = self.optimize_all(let.body)
+        return let
+
+    def visit_and(self, and_expression):
+        and_expression.tests = self.optimize_all(and_expression.tests)
+        return and_expression
+
+    def visit_or(self, or_expression):
+        or_expression.tests = self.optimize_all(or_expression.tests)
+        return or_expression
+
+    def visit_cond(self, cond):
+        for clause in cond.clauses:
+            if not clause.is_else:
+                clause.condition = self.optimize(clause.condition)
+            clause.sequence = self.optimize_all(clause.sequence)
+        return cond
+
+    def visit_unassigned(self, unassigned):
+        return unassigned
@@ -1,10 +1,12 @@
-from schemetoken import TokenType, keywords_map
+from schemetoken import DatumToken, TokenType, keywords_map
 from derivedexpression import *
+from schemeobject import SchemeEmptyList, SchemePair, SchemeRuntimeError, SchemeSymbol, SchemeVector
 
 
 class SyntaxTree:
-    def __init__(self):
-        self.nodes = []
+    def __init__(self, nodes=None):
+        # nodes can also be an iterator, parsing the program while it is being evaluated
+        self.nodes = [] if nodes is None else nodes
 
     def add(self, node):
         self.nodes.append(node)
@@ -23,9 +25,15 @@ class SyntaxTreeVisitor:
     def visit_string_literal(self, string_literal):
         pass
 
+    def visit_constant(self, constant):
+        pass
+
     def visit_list(self, scheme_list):
         pass
 
+    def visit_vector(self, vector):
+        pass
+
     def visit_symbol(self, symbol):
         pass
 
@@ -47,10 +55,125 @@ class SyntaxTreeVisitor:
     def visit_assignment(self, assignment):
         pass
 
+    def visit_sequence(self, sequence):
+        pass
+
+    def visit_let(self, let):
+        pass
+
+    def visit_and(self, and_expression):
+        pass
+
+    def visit_or(self, or_expression):
+        pass
+
+    def visit_cond(self, cond):
+        pass
+
     def visit_unassigned(self, unassigned):
         pass
 
 
+# visits every sub expression of the tree, subclasses override the nodes they are interested in
+class SyntaxTreeWalker(SyntaxTreeVisitor):
+    def walk(self, expression):
+        expression.accept(self)
+
+    def walk_all(self, expressions):
+        for expression in expressions:
+            expression.accept(self)
+
+    def visit_list(self, scheme_list):
+        self.walk_all(scheme_list.elements)
+
+    def visit_vector(self, vector):
+        self.walk_all(vector.elements)
+
+    def visit_conditional(self, conditional):
+        self.walk(conditional.test)
+        self.walk(conditional.consequent)
+        if conditional.alternate is not None:
+            self.walk(conditional.alternate)
+
+    def visit_call(self, call):
+        self.walk(call.callee)
+        self.walk_all(call.args.args)
+
+    def visit_lambda(self, lambda_expression):
+        self.walk_all(lambda_expression.body)
+
+    def visit_definition(self, definition):
+        self.walk(definition.expression)
+
+    def visit_assignment(self, assignment):
+        self.walk(assignment.expression)
+
+    def visit_sequence(self, sequence):
+        self.walk_all(sequence.expressions)
+
+    def visit_let(self, let):
+        self.walk_all([binding.init for binding in let.bindings])
+        self.walk_all(let.body)
+
+    def visit_and(self, and_expression):
+        self.walk_all(and_expression.tests)
+
+    def visit_or(self, or_expression):
+        self.walk_all(or_expression.tests)
+
+    def visit_cond(self, cond):
+        for clause in cond.clauses:
+            if not clause.is_else:
+                self.walk(clause.condition)
+            self.walk_all(clause.sequence)
+
+
+# (line, column) of the first character of a token, tokens carry the column following their last character
+def token_position(token):
+    if token.line_number is None:
+        return None
+    return token.line_number, token.column_number - len(token.lexeme)
+
+
+# groups a token stream into the tokens of each top level form,
+# a quote belongs to the datum that follows it
+def top_level_forms(tokens):
+    form = []
+    depth = 0
+    for token in tokens:
+        form.append(token)
+        if token.type is TokenType.OPEN_PAREN or token.type is TokenType.OPEN_VECTOR:
+            depth += 1
+        elif token.type is TokenType.CLOSE_PAREN:
+            depth -= 1
+        if depth <= 0 and token.type is not TokenType.SINGLE_QUOTE:
+            yield form
+            form = []
+            depth = 0
+    if len(form) > 0:
+        yield form
+
+
+# parses one top level form at a time, so that only the tokens of the current form are held in memory,
+# parsing stops at the first form with errors
+class StreamParser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.errors = []
+
+    def forms(self):
+        for form in top_level_forms(self.tokens):
+            parser = Parser(form)
+            syntax_tree = parser.parse()
+            if parser.haserrors():
+                self.errors.extend(parser.errors)
+                return
+            yield from syntax_tree.nodes
+
+    def haserrors(self):
+        return len(self.errors) > 0
+
+
 class Parser:
     def __init__(self, tokens):
         self.tokens = tokens
@@ -71,9 +194,13 @@ class Parser:
     def expression(self):
         if self.isend():
             self.raise_error(f"expected expression")
+        first_token = self.current()
         expr = None
         if self.is_literal():
             expr = self.literal()
+        elif self.current_token_has_type(TokenType.OPEN_VECTOR):
+            # vectors evaluate to themselves, quoted or not
+            expr = self.vector()
         elif self.current_token_has_type(TokenType.OPEN_PAREN):
             self.advance()
             if self.current_token_has_type(TokenType.IF):
@@ -111,6 +238,8 @@ class Parser:
             else:
                 current_token = self.current()
                 self.raise_error(f"unexpected token {current_token.lexeme}", current_token)
+        if expr is not None and expr.position is None:
+            expr.position = token_position(first_token)
         return expr
 
     def literal(self):
@@ -130,6 +259,8 @@ class Parser:
             expr = CharLiteral(token.lexeme)
         elif token.type is TokenType.STRING:
             expr = StringLiteral(token.lexeme)
+        elif token.type is TokenType.CONSTANT:
+            expr = Constant(token.value)
         self.advance()
         return expr
 
@@ -147,6 +278,8 @@ class Parser:
     def datum(self):
         if self.current_token_has_type(TokenType.OPEN_PAREN):
             return self.list()
+        elif self.current_token_has_type(TokenType.OPEN_VECTOR):
+            return self.vector()
         elif self.is_non_quote_literal():
             return self.non_quote_literal()
         elif self.current_token_has_type(TokenType.SINGLE_QUOTE):
@@ -176,6 +309,14 @@ class Parser:
         self.consume(TokenType.CLOSE_PAREN)
         return quoted_list
 
+    def vector(self):
+        self.consume(TokenType.OPEN_VECTOR)
+        quoted_vector = QuotedVector()
+        while not self.is_end_of_list():
+            quoted_vector.elements.append(self.datum())
+        self.consume(TokenType.CLOSE_PAREN)
+        return quoted_vector
+
     def conditional(self):
         self.consume(TokenType.IF)
         test = self.expression()
@@ -237,18 +378,22 @@ class Parser:
             return expressions
 
     def definition(self):
-        self.consume(TokenType.OPEN_PAREN)
+        position = token_position(self.consume(TokenType.OPEN_PAREN))
         self.consume(TokenType.DEFINE)
         if self.current_token_has_type(TokenType.OPEN_PAREN):
             definition = self.procedure_definition()
+            definition.expression.position = position
         else:
             definition = self.variable_definition()
+        definition.position = position
         self.consume(TokenType.CLOSE_PAREN)
         return definition
 
     def variable_definition(self):
         name = self.consume(TokenType.IDENTIFIER).lexeme
         expression = self.expression()
+        if type(expression) is Lambda:
+            expression.name = name
         return Definition(name, expression)
 
     def procedure_definition(self):
@@ -260,7 +405,7 @@ class Parser:
             formals.append_parameter(parameter.lexeme)
         self.consume(TokenType.CLOSE_PAREN)
         body = self.lambda_body()
-        return Definition(name, Lambda(formals, body))
+        return Definition(name, Lambda(formals, body, name))
 
     def assignment(self):
         self.consume(TokenType.SET)
@@ -288,6 +433,8 @@ class Parser:
             test = self.expression()
 
         expressions = self.sequence()
+        if test is None and len(expressions) == 0:
+            self.raise_error(f"expected non empty sequence in else clause", self.previous())
         return CondClause(expressions, test)
 
     def begin(self):
@@ -410,7 +557,7 @@ class Parser:
 
     def is_non_quote_literal(self):
         return self.current_token_has_type(TokenType.BOOLEAN, TokenType.NUMBER, TokenType.CHARACTER,
-                                           TokenType.STRING)
+                                           TokenType.STRING, TokenType.CONSTANT)
 
     def is_quote(self):
         return self.current_token_has_type(TokenType.SINGLE_QUOTE) or \
@@ -425,3 +572,40 @@ class Parser:
         if current_token is None or next_token is None:
             return False
         return current_token.type is current_token_type and next_token.type is next_token_type
+
+
+# parses a program given as scheme data, like the argument of eval, with the rules of the Parser, from the tokens
+# of the data instead of printing them and scanning the text again
+class DatumParser(Parser):
+    def __init__(self, datum):
+        super().__init__(datum_tokens(datum))
+
+    def parse_datum(self):
+        return self.parse().nodes[0]
+
+    # there is no source text to recover in, the first error raises a SchemeRuntimeError
+    def raise_error(self, message, token=None):
+        raise SchemeRuntimeError(message)
+
+
+# the tokens of the text of a datum: symbols are identifiers or keywords and lists and vectors are delimited by
+# parentheses, the other data, improper lists included, are constant tokens evaluating to the datum itself
+def datum_tokens(datum, tokens=None):
+    tokens = [] if tokens is None else tokens
+    if type(datum) is SchemeSymbol:
+        tokens.append(DatumToken(datum.value, keywords_map.get(datum.value, TokenType.IDENTIFIER)))
+    elif datum is SchemeEmptyList() or isinstance(datum, SchemePair) and datum.is_list():
+        tokens.append(DatumToken('(', TokenType.OPEN_PAREN))
+        for element in datum:
+            datum_tokens(element, tokens)
+        tokens.append(DatumToken(')', TokenType.CLOSE_PAREN))
+    elif type(datum) is SchemeVector:
+        tokens.append(DatumToken('#(', TokenType.OPEN_VECTOR))
+        for element in datum.elements:
+            datum_tokens(element, tokens)
+        tokens.append(DatumToken(')', TokenType.CLOSE_PAREN))
+    else:
+        # an improper list can be circular, it is not printed
+        lexeme = 'improper list' if isinstance(datum, SchemePair) else str(datum)
+        tokens.append(DatumToken(lexeme, TokenType.CONSTANT, datum))
+    return tokens
@@ -0,0 +1,389 @@
+import collections
+import sys
+import threading
+import time
+
+import closurecompiler
+from bytecode import CodeObject, code_name
+from interpreter import *
+from parser import SyntaxTreeWalker
+from virtualmachine import VirtualMachine
+
+
+# names procedures in reports: user procedures by the definition binding their lambda,
+# built ins by the global variable bound to them
+class ProcedureNames:
+    def __init__(self, environment):
+        self.environment = environment
+        self.built_in_names = {}
+
+    def name(self, procedure):
+        if isinstance(procedure, UserDefinedProcedure):
+            return 'lambda' if procedure.name is None else procedure.name
+        name = self.built_in_names.get(procedure)
+        if name is None:
+            name = procedure.name
+            for variable, value in self.environment.root.dictionary.items():
+                if value is procedure:
+                    name = variable
+                    break
+            name = 'built in' if name is None else name
+            self.built_in_names[procedure] = name
+        return name
+
+    # the name of a procedure or of the code object of a procedure, followed by the line and column of its lambda
+    def label(self, call):
+        if type(call) is CodeObject:
+            name, position = code_name(call), call.position
+        else:
+            name = self.name(call)
+            position = call.position if isinstance(call, UserDefinedProcedure) else None
+        return name if position is None else f"{name} {position[0]}:{position[1]}"
+
+
+class ProcedureProfile:
+    __slots__ = ('name', 'calls', 'tail_calls', 'self_time', 'cumulative_time', 'active_calls')
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.tail_calls = 0
+        self.self_time = 0.0
+        self.cumulative_time = 0.0
+        # calls in progress, only the outermost of recursive calls adds to the cumulative time
+        self.active_calls = 0
+
+
+# call counts and times of every procedure, by name.
+# a procedure called in tail position runs after its caller returned, its time is not part of the caller's
+class Profile:
+    def __init__(self, environment):
+        self.names = ProcedureNames(environment)
+        self.procedures = {}
+        # [profile, start time, time spent in callees] of every call in progress
+        self.calls = []
+
+    # procedures are told apart by their label, inner procedures of the same name are profiled apart
+    def procedure_profile(self, procedure):
+        label = self.names.label(procedure)
+        procedure_profile = self.procedures.get(label)
+        if procedure_profile is None:
+            procedure_profile = ProcedureProfile(label)
+            self.procedures[label] = procedure_profile
+        return procedure_profile
+
+    def count_tail_call(self, procedure):
+        self.procedure_profile(procedure).tail_calls += 1
+
+    def enter(self, procedure):
+        procedure_profile = self.procedure_profile(procedure)
+        procedure_profile.calls += 1
+        procedure_profile.active_calls += 1
+        self.calls.append([procedure_profile, time.perf_counter(), 0.0])
+
+    def exit(self):
+        procedure_profile, start, callees_time = self.calls.pop()
+        elapsed = time.perf_counter() - start
+        procedure_profile.self_time += elapsed - callees_time
+        procedure_profile.active_calls -= 1
+        if procedure_profile.active_calls == 0:
+            procedure_profile.cumulative_time += elapsed
+        if len(self.calls) > 0:
+            self.calls[-1][2] += elapsed
+
+    # the procedures sorted by self time, most expensive first
+    def report(self):
+        lines = [f"{'calls':>10} {'tail calls':>10} {'self ms':>10} {'cumulative ms':>14}  procedure"]
+        for procedure_profile in sorted(self.procedures.values(), key=lambda profile: profile.self_time,
+                                        reverse=True):
+            lines.append(f"{procedure_profile.calls:>10} {procedure_profile.tail_calls:>10} "
+                         f"{procedure_profile.self_time * 1000:>10.3f} {procedure_profile.cumulative_time * 1000:>14.3f}"
+                         f"  {procedure_profile.name}")
+        return '\n'.join(lines)
+
+
+# an interpreter timing every procedure call in its profile, the plain Interpreter has no profiling cost
+class ProfilingInterpreter(Interpreter):
+    def __init__(self, environment=None, profile=None):
+        super().__init__(environment)
+        self.profile = Profile(self.environment) if profile is None else profile
+
+    # calls evaluated in a tail context return a TailCall right away, the call runs when it is trampolined.
+    # only the tail calls a procedure returns to its caller are tail calls of the program, the others are calls
+    # in the arguments of a tail call, trampolined before it
+    def do_apply(self, procedure, arguments_values):
+        if self.tail_context:
+            return TailCall(procedure, arguments_values)
+        self.profile.enter(procedure)
+        try:
+            value = super().do_apply(procedure, arguments_values)
+        finally:
+            self.profile.exit()
+        if isinstance(value, TailCall):
+            self.profile.count_tail_call(value.procedure)
+        return value
+
+
+# the frames are sampled from another thread, their local variables may not be assigned yet
+def procedures_of_apply_frame(frame_locals):
+    procedure = frame_locals.get('procedure')
+    return [] if procedure is None else [procedure]
+
+
+# the top level forms run by the virtual machine are code objects without formals
+def codes_of_execute_frame(frame_locals):
+    codes = [call[0] for call in frame_locals.get('calls', ())]
+    codes.append(frame_locals.get('code'))
+    return [code for code in codes if code is not None and code.formals is not None]
+
+
+# the python functions running a scheme procedure call on each engine, and the procedures or code objects
+# they run, from their local variables. the cek machine keeps no procedure in its continuation frames
+scheme_call_frames = {
+    Interpreter.do_apply.__code__: procedures_of_apply_frame,
+    closurecompiler.apply_procedure.__code__: procedures_of_apply_frame,
+    VirtualMachine.apply_other.__code__: procedures_of_apply_frame,
+    VirtualMachine.execute.__code__: codes_of_execute_frame,
+}
+
+
+# a thread recording the scheme call stack of the profiled thread every interval seconds, read from its python
+# frames, the profiled thread runs uninstrumented. a scheme frame is the procedure name and the line and column
+# of its lambda, samples are written in the collapsed stack format of flame graph tools
+class SamplingProfiler:
+    default_interval = 0.001
+
+    def __init__(self, environment, interval=None):
+        self.names = ProcedureNames(environment)
+        self.interval = SamplingProfiler.default_interval if interval is None else interval
+        # number of samples of every stack, a tuple of frames from the outermost call
+        self.samples = collections.Counter()
+        self.thread_id = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.thread = threading.Thread(target=self.sample_until_stopped, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+    def sample_until_stopped(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            try:
+                stack = self.scheme_stack(frame)
+            except Exception:
+                # the profiled thread changed the frames while they were read, the sample is dropped
+                continue
+            if len(stack) > 0:
+                self.samples[stack] += 1
+
+    def scheme_stack(self, frame):
+        labels = []
+        while frame is not None:
+            scheme_calls = scheme_call_frames.get(frame.f_code)
+            if scheme_calls is not None:
+                labels.extend(reversed([self.names.label(call) for call in scheme_calls(frame.f_locals)]))
+            frame = frame.f_back
+        labels.reverse()
+        return tuple(labels)
+
+    # one line per stack, its frames separated by semicolons then the number of samples
+    def collapsed_stacks(self):
+        return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in sorted(self.samples.items()))
+
+
+def is_cached_number(number):
+    value = number.value
+    return type(value) is int and SchemeNumber.smallest_cached_integer <= value <= SchemeNumber.largest_cached_integer
+
+
+# the bytes of an object with its attributes dictionary, and of the containers and strings it owns when created
+def approximate_size(instance):
+    size = sys.getsizeof(instance)
+    attributes = getattr(instance, '__dict__', None)
+    if attributes is not None:
+        size += sys.getsizeof(attributes)
+    if type(instance) is SchemeString:
+        size += sys.getsizeof(instance.value)
+    elif type(instance) is Frame:
+        size += sys.getsizeof(instance.slots)
+    return size
+
+
+# the python functions running the body of a user procedure on each engine, and the procedure or code object they
+# run, from their local variables. the top level forms of the virtual machine are code objects without formals
+running_procedure_frames = {
+    Interpreter.interpret_scheme_procedure_call.__code__: lambda frame_locals: frame_locals['procedure'],
+    CompiledProcedure.call.__code__: lambda frame_locals: frame_locals['self'],
+    VirtualMachine.execute.__code__:
+        lambda frame_locals: frame_locals['code'] if frame_locals['code'].formals is not None else None,
+}
+
+
+# counts the objects of tracked_types created while started, and their approximate bytes, by the user procedure
+# running when they were created. the constructors of the tracked types are wrapped only while started
+class AllocationTracker:
+    tracked_types = [SchemePair, SchemeNumber, SchemeString, Frame, UserDefinedProcedure, SchemePromise,
+                     TailCall]
+
+    def __init__(self, environment):
+        self.names = ProcedureNames(environment)
+        # [objects, bytes] by (procedure label, type name)
+        self.allocations = collections.defaultdict(lambda: [0, 0])
+        # constructors replaced by start, by type and attribute name
+        self.constructors = {}
+
+    def start(self):
+        for tracked_type in AllocationTracker.tracked_types:
+            if '__new__' in vars(tracked_type):
+                self.wrap_new(tracked_type)
+            else:
+                self.wrap_init(tracked_type)
+
+    def stop(self):
+        for (tracked_type, attribute), constructor in self.constructors.items():
+            if constructor is None:
+                delattr(tracked_type, attribute)
+            else:
+                setattr(tracked_type, attribute, constructor)
+        self.constructors.clear()
+
+    def wrap_init(self, tracked_type):
+        self.constructors[(tracked_type, '__init__')] = vars(tracked_type).get('__init__')
+        init = tracked_type.__init__
+        tracker = self
+
+        def counting_init(instance, *args, **kwargs):
+            init(instance, *args, **kwargs)
+            tracker.count(tracked_type, instance)
+
+        tracked_type.__init__ = counting_init
+
+    # only SchemeNumber makes its instances in __new__, some of them are cached and not allocated
+    def wrap_new(self, tracked_type):
+        # the staticmethod object is restored by stop, calling it directly needs python 3.10
+        self.constructors[(tracked_type, '__new__')] = vars(tracked_type)['__new__']
+        new = tracked_type.__new__
+        tracker = self
+
+        def counting_new(cls, *args):
+            instance = new(cls, *args)
+            if not is_cached_number(instance):
+                tracker.count(tracked_type, instance)
+            return instance
+
+        tracked_type.__new__ = counting_new
+
+    def count(self, tracked_type, instance):
+        allocations = self.allocations[(self.running_procedure(), tracked_type.__name__)]
+        allocations[0] += 1
+        allocations[1] += approximate_size(instance)
+
+    def running_procedure(self):
+        frame = sys._getframe(2)
+        while frame is not None:
+            running_procedure = running_procedure_frames.get(frame.f_code)
+            if running_procedure is not None:
+                procedure = running_procedure(frame.f_locals)
+                if procedure is not None:
+                    return self.names.label(procedure)
+            frame = frame.f_back
+        return 'top level'
+
+    # the allocations by procedure and type, most bytes first, then the totals by type
+    def report(self):
+        lines = [f"{'objects':>10} {'bytes':>12}  {'type':<22}procedure"]
+        for (label, type_name), (objects, size) in sorted(self.allocations.items(), key=lambda item: item[1][1],
+                                                          reverse=True):
+            lines.append(f"{objects:>10} {size:>12}  {type_name:<22}{label}")
+        totals = collections.defaultdict(lambda: [0, 0])
+        for (label, type_name), (objects, size) in self.allocations.items():
+            totals[type_name][0] += objects
+            totals[type_name][1] += size
+        for type_name, (objects, size) in sorted(totals.items(), key=lambda item: item[1][1], reverse=True):
+            lines.append(f"{objects:>10} {size:>12}  {type_name:<22}total")
+        return '\n'.join(lines)
+
+
+# counts the nodes of a syntax tree, every node once
+class NodeCounter(SyntaxTreeWalker):
+    def __init__(self):
+        self.nodes = 0
+
+    def walk(self, expression):
+        self.nodes += 1
+        expression.accept(self)
+
+    def walk_all(self, expressions):
+        for expression in expressions:
+            self.walk(expression)
+
+
+def count_nodes(nodes):
+    counter = NodeCounter()
+    counter.walk_all(nodes)
+    return counter.nodes
+
+
+class EvaluationCounters:
+    def __init__(self):
+        self.expressions = 0
+        self.calls = 0
+        self.tail_calls = 0
+        self.frames = 0
+        # the longest chain of frames, from a created frame to the top level
+        self.peak_frame_depth = 0
+
+    def count_frame(self, parent):
+        self.frames += 1
+        depth = 1
+        while parent is not None:
+            parent = parent.parent
+            depth += 1
+        self.peak_frame_depth = max(self.peak_frame_depth, depth)
+
+    def as_dict(self):
+        return {'expressions': self.expressions, 'calls': self.calls, 'tail_calls': self.tail_calls,
+                'frames': self.frames, 'peak_frame_depth': self.peak_frame_depth}
+
+
+# an interpreter counting the expressions it evaluates, the procedures it calls, the tail calls it trampolines
+# and the frames it creates, the plain Interpreter counts nothing
+class CountingInterpreter(Interpreter):
+    def __init__(self, environment=None, counters=None):
+        super().__init__(environment)
+        self.counters = EvaluationCounters() if counters is None else counters
+
+    def interpret_expression(self, expression):
+        self.counters.expressions += 1
+        return super().interpret_expression(expression)
+
+    def interpret_expression_tail(self, expression):
+        self.counters.expressions += 1
+        return super().interpret_expression_tail(expression)
+
+    def trampoline(self, value):
+        while not self.tail_context and isinstance(value, TailCall):
+            self.counters.tail_calls += 1
+            value = self.do_apply(value.procedure, value.arguments_values)
+        return value
+
+    def do_apply(self, procedure, arguments_values):
+        if not self.tail_context:
+            self.counters.calls += 1
+        return super().do_apply(procedure, arguments_values)
+
+    def prepare_call_frame(self, args, procedure):
+        self.counters.count_frame(procedure.environment)
+        return super().prepare_call_frame(args, procedure)
+
+    def visit_let(self, let):
+        self.counters.count_frame(self.frame)
+        return super().visit_let(let)
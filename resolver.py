@@ -0,0 +1,58 @@
+from parser import SyntaxTreeWalker
+
+
+class LexicalAddress:
+    def __init__(self, depth, slot):
+        self.depth = depth
+        self.slot = slot
+        self.is_global = False
+
+
+class GlobalAddress:
+    def __init__(self, name):
+        self.name = name
+        self.is_global = True
+
+
+# gives every variable reference, assignment and lambda parameter its address:
+# a (frame depth, slot index) pair if lexically bound, a global address otherwise
+class Resolver(SyntaxTreeWalker):
+    def __init__(self):
+        self.scopes = []
+
+    def resolve_syntax_tree(self, syntax_tree):
+        self.walk_all(syntax_tree.nodes)
+        return syntax_tree
+
+    def resolve(self, expression):
+        self.walk(expression)
+
+    def lookup(self, name):
+        for depth, scope in enumerate(reversed(self.scopes)):
+            if name in scope:
+                return LexicalAddress(depth, scope[name])
+        return GlobalAddress(name)
+
+    def walk_scope(self, variables, body):
+        scope = {variable: slot for slot, variable in enumerate(variables)}
+        self.scopes.append(scope)
+        self.walk_all(body)
+        self.scopes.pop()
+        return scope
+
+    def visit_variable_reference(self, variable_reference):
+        variable_reference.address = self.lookup(variable_reference.variable_name)
+
+    def visit_lambda(self, lambda_expression):
+        formals = lambda_expression.formals
+        parameters = formals.fixed_parameters if not formals.has_list_parameter else [formals.list_parameter_name]
+        scope = self.walk_scope(parameters, lambda_expression.body)
+        lambda_expression.parameter_addresses = [LexicalAddress(0, scope[parameter]) for parameter in parameters]
+
+    def visit_let(self, let):
+        self.walk_all([binding.init for binding in let.bindings])
+        self.walk_scope([binding.variable for binding in let.bindings], let.body)
+
+    def visit_assignment(self, assignment):
+        assignment.address = self.lookup(assignment.name)
+        self.walk(assignment.expression)
@@ -0,0 +1,28 @@
+;;sieve of eratosthenes, marks composites in a vector
+
+(define (make-sieve n)
+  (let ((composite (make-vector n #f)))
+    (define (mark-multiples! multiple step)
+      (if (< multiple n)
+          (begin (vector-set! composite multiple #t)
+                 (mark-multiples! (+ multiple step) step))))
+    (define (sieve-from! i)
+      (if (< (* i i) n)
+          (begin (if (not (vector-ref composite i))
+                     (mark-multiples! (* i i) i))
+                 (sieve-from! (+ i 1)))))
+    (sieve-from! 2)
+    composite))
+
+(define (primes-below n)
+  (let ((composite (make-sieve n)))
+    (define (collect i primes)
+      (cond ((< i 2) primes)
+            ((vector-ref composite i) (collect (- i 1) primes))
+            (else (collect (- i 1) (cons i primes)))))
+    (collect (- n 1) '())))
+
+;expected:#( 168 ( 2 3 5 7 11 13 ) )
+(define primes (primes-below 1000))
+(vector (length primes) (list (car primes) (cadr primes) (caddr primes) (cadddr primes)
+                              (car (cddddr primes)) (cadr (cddddr primes))))
@@ -1,23 +1,15 @@
+import array
 import functools
+import itertools
 import operator
 
-from interpreter import Interpreter
+from interpreter import Interpreter, TailCall
 from schemeobject import *
 
 
-def return_scheme_boolean(function):
-    def wrapper(*args, **kwargs):
-        return SchemeBool(function(*args, **kwargs))
-
-    return wrapper
-
-
-def return_scheme_number(function):
-    def wrapper(*args, **kwargs):
-        return SchemeNumber(function(*args, **kwargs))
-
-    return wrapper
-
+# built ins follow the BuiltInProcedure calling convention: arity, minimum number of arguments and argument type
+# are declared when registering them in the environment and checked before the call, implementations take
+# python positional arguments, or a python list of arguments when variadic
 
 def check_argument_type(scheme_object, check_function):
     if not check_function(scheme_object):
@@ -29,306 +21,266 @@ def check_zero_division(denominators):
         raise SchemeRuntimeError(f"divison by zero")
 
 
-def make_check_and_call_function(function_to_call, check_type_function):
-    def wrapper(*args, **kwargs):
-        check_argument_type(args[0], check_type_function)
-        return function_to_call(*args, **kwargs)
+def is_scheme_number(scheme_object):
+    return isinstance(scheme_object, SchemeNumber)
+
 
-    return wrapper
+def is_scheme_integer(scheme_object):
+    return isinstance(scheme_object, SchemeNumber) and isinstance(scheme_object.value, int)
 
 
-def takes_scheme_pair(function):
-    return make_check_and_call_function(function, is_pair)
+# equivalence predicates
 
+def scheme_is(object1, object2):
+    if type(object1) in [SchemeNumber, SchemeChar]:
+        return SchemeBool(object1 == object2)
+    else:
+        return SchemeBool(object1 is object2)
 
-def takes_scheme_number(function):
-    return make_check_and_call_function(function, is_number)
 
+def scheme_equal(object1, object2):
+    return SchemeBool(object1 == object2)
 
-def takes_scheme_list(function):
-    return make_check_and_call_function(function, is_list)
 
+# numerical operations
 
-def minimum_required_args(function_name, minimum_number_of_args):
-    def decorated_wrapper(function):
-        def wrapper(*args, **kwargs):
-            scheme_list = args[0]
-            if scheme_list.size() < minimum_number_of_args:
-                raise SchemeRuntimeError(
-                    f"procedure {function_name} requires at least {minimum_number_of_args}"
-                    f" argument{'' if minimum_number_of_args == 1 else 's'}")
-            return function(*args, **kwargs)
+def is_number(scheme_object):
+    return SchemeBool(is_scheme_number(scheme_object))
 
-        return wrapper
 
-    return decorated_wrapper
+def is_integer(scheme_object):
+    return SchemeBool(is_scheme_integer(scheme_object))
 
 
-def takes_scheme_list_of_numbers(function):
-    def wrapper(*args, **kwargs):
-        scheme_list = args[0]
-        for scheme_object in scheme_list:
-            check_argument_type(scheme_object, is_number)
-        return function(*args, **kwargs)
+def compare_numbers(numbers, comparison):
+    return SchemeBool(all(comparison(numbers[i].value, numbers[i + 1].value) for i in range(0, len(numbers) - 1)))
 
-    return wrapper
 
+def numbers_equal(numbers):
+    return compare_numbers(numbers, operator.eq)
 
-# equivalence predicates
 
-@return_scheme_boolean
-def scheme_is(object1, object2):
-    if type(object1) in [SchemeNumber, SchemeChar]:
-        return object1 == object2
-    else:
-        return object1 is object2
+def numbers_less(numbers):
+    return compare_numbers(numbers, operator.lt)
 
 
-@return_scheme_boolean
-def scheme_equal(object1, object2):
-    return object1 == object2
+def numbers_greater(numbers):
+    return compare_numbers(numbers, operator.gt)
 
 
-# numerical operations
+def numbers_less_or_equal(numbers):
+    return compare_numbers(numbers, operator.le)
 
-@return_scheme_boolean
-def is_number(scheme_object):
-    return isinstance(scheme_object, SchemeNumber)
 
+def numbers_greater_or_equal(numbers):
+    return compare_numbers(numbers, operator.ge)
 
-@return_scheme_boolean
-def is_integer(scheme_object):
-    return is_number(scheme_object) and isinstance(scheme_object.value, int)
 
+def is_zero(scheme_number):
+    return SchemeBool(scheme_number.value == 0)
 
-@return_scheme_boolean
-@takes_scheme_list_of_numbers
-def numbers_equal(list_of_numbers):
-    values = [number.value for number in list_of_numbers]
-    if len(values) == 0:
-        return True
-    return all(values[i] == values[i + 1] for i in range(0, len(values) - 1))
 
+def is_positive(scheme_number):
+    return SchemeBool(scheme_number.value > 0)
 
-@return_scheme_boolean
-@takes_scheme_list_of_numbers
-def numbers_less(list_of_numbers):
-    values = [number.value for number in list_of_numbers]
-    if len(values) == 0:
-        return True
-    return all(values[i] < values[i + 1] for i in range(0, len(values) - 1))
 
+def is_negative(scheme_number):
+    return SchemeBool(scheme_number.value < 0)
 
-@return_scheme_boolean
-@takes_scheme_list_of_numbers
-def numbers_greater(list_of_numbers):
-    values = [number.value for number in list_of_numbers]
-    if len(values) == 0:
-        return True
-    return all(values[i] > values[i + 1] for i in range(0, len(values) - 1))
 
+def is_odd(scheme_number):
+    return SchemeBool(scheme_number.value % 2 == 1)
 
-@return_scheme_boolean
-@takes_scheme_list_of_numbers
-def numbers_less_or_equal(list_of_numbers):
-    values = [number.value for number in list_of_numbers]
-    if len(values) == 0:
-        return True
-    return all(values[i] <= values[i + 1] for i in range(0, len(values) - 1))
 
+def is_even(scheme_number):
+    return SchemeBool(scheme_number.value % 2 == 0)
 
-@return_scheme_boolean
-@takes_scheme_list_of_numbers
-def numbers_greater_or_equal(list_of_numbers):
-    values = [number.value for number in list_of_numbers]
-    if len(values) == 0:
-        return True
-    return all(values[i] >= values[i + 1] for i in range(0, len(values) - 1))
 
+def numbers_max(numbers):
+    return SchemeNumber(max([number.value for number in numbers]))
 
-@return_scheme_boolean
-@takes_scheme_number
-def is_zero(scheme_object):
-    return scheme_object.value == 0
 
+def numbers_min(numbers):
+    return SchemeNumber(min([number.value for number in numbers]))
 
-@return_scheme_boolean
-@takes_scheme_number
-def is_positive(scheme_object):
-    return scheme_object.value > 0
 
+def plus(numbers):
+    return SchemeNumber(sum(number.value for number in numbers))
 
-@return_scheme_boolean
-@takes_scheme_number
-def is_negative(scheme_object):
-    return scheme_object.value < 0
 
+def minus(numbers):
+    if len(numbers) == 1:
+        return SchemeNumber(- numbers[0].value)
+    return SchemeNumber(functools.reduce(operator.sub, [number.value for number in numbers]))
 
-@return_scheme_boolean
-@takes_scheme_number
-def is_odd(scheme_object):
-    return scheme_object.value % 2 == 1
 
+def multiply(numbers):
+    return SchemeNumber(functools.reduce(operator.mul, [number.value for number in numbers], 1))
 
-@return_scheme_boolean
-@takes_scheme_number
-def is_even(scheme_object):
-    return scheme_object.value % 2 == 0
 
+def divide(numbers):
+    values = [number.value for number in numbers]
+    if len(values) == 1:
+        values = [1] + values
 
-@return_scheme_number
-@takes_scheme_list_of_numbers
-@minimum_required_args('max', 1)
-def numbers_max(list_of_numbers):
-    return max([number.value for number in list_of_numbers])
+    check_zero_division(values[1:])
+    return SchemeNumber(functools.reduce(operator.truediv, values))
 
 
-@return_scheme_number
-@takes_scheme_list_of_numbers
-@minimum_required_args('min', 1)
-def numbers_min(list_of_numbers):
-    return min([number.value for number in list_of_numbers])
+# entry points for the common calls with one or two arguments of the variadic arithmetic,
+# they give the same results as the general implementations above
 
+def plus_1(number):
+    return SchemeNumber(0 + number.value)
 
-@return_scheme_number
-@takes_scheme_list_of_numbers
-def plus(list_of_numbers):
-    return sum(scheme_number.value for scheme_number in list_of_numbers)
 
+def plus_2(number1, number2):
+    return SchemeNumber(number1.value + number2.value)
 
-@return_scheme_number
-@takes_scheme_list_of_numbers
-@minimum_required_args('-', 1)
-def minus(list_of_numbers):
-    if list_of_numbers.size() == 1:
-        return - list_of_numbers.car().value
-    return functools.reduce(operator.sub, [number.value for number in list_of_numbers])
 
+def minus_1(number):
+    return SchemeNumber(- number.value)
 
-@return_scheme_number
-@takes_scheme_list_of_numbers
-def multiply(list_of_numbers):
-    return functools.reduce(operator.mul, [number.value for number in list_of_numbers], 1)
 
+def minus_2(number1, number2):
+    return SchemeNumber(number1.value - number2.value)
 
-@return_scheme_number
-@takes_scheme_list_of_numbers
-@minimum_required_args('/', 1)
-def divide(list_of_numbers):
-    numbers = [number.value for number in list_of_numbers]
-    if list_of_numbers.size() == 1:
-        numbers = [1] + numbers
 
-    check_zero_division(numbers[1:])
-    return functools.reduce(operator.truediv, numbers)
+def multiply_1(number):
+    return SchemeNumber(1 * number.value)
 
 
-@return_scheme_number
-@takes_scheme_number
-def absolute_value(scheme_object):
-    return abs(scheme_object.value)
+def multiply_2(number1, number2):
+    return SchemeNumber(number1.value * number2.value)
+
+
+def divide_1(number):
+    check_zero_division([number.value])
+    return SchemeNumber(1 / number.value)
+
+
+def divide_2(number1, number2):
+    check_zero_division([number2.value])
+    return SchemeNumber(number1.value / number2.value)
+
+
+def compare_one_number(number):
+    return SchemeBool(True)
+
+
+def numbers_equal_2(number1, number2):
+    return SchemeBool(number1.value == number2.value)
+
+
+def numbers_less_2(number1, number2):
+    return SchemeBool(number1.value < number2.value)
+
+
+def numbers_greater_2(number1, number2):
+    return SchemeBool(number1.value > number2.value)
+
+
+def numbers_less_or_equal_2(number1, number2):
+    return SchemeBool(number1.value <= number2.value)
+
+
+def numbers_greater_or_equal_2(number1, number2):
+    return SchemeBool(number1.value >= number2.value)
+
+
+def absolute_value(scheme_number):
+    return SchemeNumber(abs(scheme_number.value))
 
 
-@return_scheme_number
 def remainder(numerator, denominator):
-    check_argument_type(numerator, is_integer)
-    check_argument_type(denominator, is_integer)
-    check_zero_division([denominator])
-    return numerator.value % denominator.value
+    check_argument_type(numerator, is_scheme_integer)
+    check_argument_type(denominator, is_scheme_integer)
+    check_zero_division([denominator.value])
+    return SchemeNumber(numerator.value % denominator.value)
 
 
 # booleans
-@return_scheme_boolean
 def scheme_not(scheme_object):
-    return not Interpreter.truth(scheme_object)
+    return SchemeBool(not Interpreter.truth(scheme_object))
 
 
-@return_scheme_boolean
 def is_boolean(scheme_object):
-    return isinstance(scheme_object, SchemeBool)
+    return SchemeBool(isinstance(scheme_object, SchemeBool))
 
 
 # lists
 
-@return_scheme_boolean
-def is_pair(scheme_object):
+def is_scheme_pair(scheme_object):
     return isinstance(scheme_object, SchemePair)
 
 
+def is_pair(scheme_object):
+    return SchemeBool(isinstance(scheme_object, SchemePair))
+
+
 def cons(first, second):
     return SchemePair(first, second)
 
 
-@takes_scheme_pair
 def car(scheme_pair):
     return scheme_pair.car()
 
 
-@takes_scheme_pair
 def cdr(scheme_pair):
     return scheme_pair.cdr()
 
 
-@takes_scheme_pair
 def set_car(scheme_pair, value):
+    check_argument_type(scheme_pair, is_scheme_pair)
     scheme_pair.set_car(value)
 
 
-@takes_scheme_pair
 def set_cdr(scheme_pair, value):
+    check_argument_type(scheme_pair, is_scheme_pair)
     scheme_pair.set_cdr(value)
 
 
-@return_scheme_boolean
 def is_empty_list(scheme_object):
-    return scheme_object == SchemeEmptyList()
+    return SchemeBool(scheme_object is SchemeEmptyList())
 
 
-@return_scheme_boolean
 def is_list(scheme_object):
-    return is_scheme_list(scheme_object)
+    return SchemeBool(is_scheme_list(scheme_object))
 
 
 def make_list(scheme_objects):
-    return scheme_objects
+    return make_scheme_list(scheme_objects)
 
 
-@return_scheme_number
-@takes_scheme_list
 def list_length(scheme_list):
-    return scheme_list_length(scheme_list)
+    check_argument_type(scheme_list, is_scheme_list)
+    return SchemeNumber(scheme_list_length(scheme_list))
 
 
-@takes_scheme_list
-@minimum_required_args('append', 1)
 def append_list(scheme_objects):
-    check_append_args(scheme_objects)
-    while scheme_objects.cdr() is not SchemeEmptyList() and scheme_objects.car() is SchemeEmptyList():
-        scheme_objects = scheme_objects.cdr()
-    first_non_empty_list_or_last_element = scheme_objects.car()
-    while scheme_objects.cdr() is not SchemeEmptyList():
-        current = scheme_list_tail(scheme_objects.car())
-        next_arg = scheme_objects.cdr()
-        current.set_cdr(next_arg.car() if is_list(next_arg) else next_arg)
-        scheme_objects = scheme_objects.cdr()
+    last = len(scheme_objects) - 1
+    for scheme_object in scheme_objects[:last]:
+        check_argument_type(scheme_object, is_scheme_list)
+    index = 0
+    while index < last and scheme_objects[index] is SchemeEmptyList():
+        index += 1
+    first_non_empty_list_or_last_element = scheme_objects[index]
+    while index < last:
+        scheme_list_tail(scheme_objects[index]).set_cdr(scheme_objects[index + 1])
+        index += 1
     return first_non_empty_list_or_last_element
 
 
-def check_append_args(args):
-    while args.cdr() is not SchemeEmptyList():
-        check_argument_type(args.car(), is_list)
-        args = args.cdr()
-
-
 def query_pair(scheme_pair, query_string):
     # remove the c and r from caddr for example
     query = reversed(query_string[1: len(query_string) - 1])
     current = scheme_pair
     for character in query:
+        check_argument_type(current, is_scheme_pair)
         if character == 'd':
-            current = cdr(current)
+            current = current.cdr()
         elif character == 'a':
-            current = car(current)
+            current = current.car()
     return current
 
 
@@ -444,72 +396,492 @@ def cddddr(scheme_pair):
     return query_pair(scheme_pair, "cddddr")
 
 
+# vectors
+
+def is_scheme_vector(scheme_object):
+    return isinstance(scheme_object, SchemeVector)
+
+
+def check_vector_index(vector, index):
+    check_argument_type(index, is_scheme_integer)
+    if not 0 <= index.value < len(vector.elements):
+        raise SchemeRuntimeError(f"index {index} out of range for vector of length {len(vector.elements)}")
+
+
+def is_vector(scheme_object):
+    return SchemeBool(isinstance(scheme_object, SchemeVector))
+
+
+def make_vector(args):
+    if len(args) > 2:
+        raise SchemeRuntimeError(f"procedure make-vector expects at most 2 arguments, {len(args)} given")
+    size = args[0]
+    check_argument_type(size, is_scheme_integer)
+    if size.value < 0:
+        raise SchemeRuntimeError(f"negative vector size {size}")
+    fill = args[1] if len(args) == 2 else SchemeNumber(0)
+    return SchemeVector([fill] * size.value)
+
+
+def make_vector_from_elements(scheme_objects):
+    return SchemeVector(list(scheme_objects))
+
+
+def vector_length(vector):
+    return SchemeNumber(len(vector.elements))
+
+
+def vector_ref(vector, index):
+    check_argument_type(vector, is_scheme_vector)
+    check_vector_index(vector, index)
+    return vector.elements[index.value]
+
+
+def vector_set(vector, index, value):
+    check_argument_type(vector, is_scheme_vector)
+    check_vector_index(vector, index)
+    vector.elements[index.value] = value
+
+
+def vector_fill(vector, fill):
+    check_argument_type(vector, is_scheme_vector)
+    elements = vector.elements
+    elements[:] = [fill] * len(elements)
+
+
+def vector_to_list(vector):
+    return make_scheme_list(vector.elements)
+
+
+def list_to_vector(scheme_list):
+    check_argument_type(scheme_list, is_scheme_list)
+    return SchemeVector(list(scheme_list))
+
+
+def check_vector_map_args(args):
+    check_argument_type(args[0], is_scheme_procedure)
+    for arg in args[1:len(args)]:
+        check_argument_type(arg, is_scheme_vector)
+
+
+# like map and for-each, stopping at the end of the shortest vector
+def vector_map(apply_procedure, args):
+    check_vector_map_args(args)
+    procedure = args[0]
+    if len(args) == 2:
+        return SchemeVector([apply_procedure(procedure, [element]) for element in args[1].elements])
+    return SchemeVector([apply_procedure(procedure, list(elements))
+                         for elements in zip(*[vector.elements for vector in args[1:]])])
+
+
+def vector_for_each(apply_procedure, args):
+    check_vector_map_args(args)
+    procedure = args[0]
+    if len(args) == 2:
+        for element in args[1].elements:
+            apply_procedure(procedure, [element])
+    else:
+        for elements in zip(*[vector.elements for vector in args[1:]]):
+            apply_procedure(procedure, list(elements))
+    return SchemeSymbol('ok')
+
+
+# homogeneous numeric vectors, the kind ('s64' or 'f64') is bound when registering the procedures of each kind.
+# bulk operations run as one call over the whole array instead of one interpreter step per element.
+# s64 operations always compute with python integers, so that overflow raises an error instead of wrapping around
+
+def check_numeric_vector(kind, scheme_object):
+    if not (isinstance(scheme_object, SchemeNumericVector) and scheme_object.kind == kind):
+        raise SchemeRuntimeError(f"argument {scheme_object} is of incorrect type ")
+
+
+def check_same_length(vector1, vector2):
+    if len(vector1.elements) != len(vector2.elements):
+        raise SchemeRuntimeError(f"vectors of different lengths {len(vector1.elements)} and {len(vector2.elements)}")
+
+
+def check_not_empty(vector):
+    if len(vector.elements) == 0:
+        raise SchemeRuntimeError(f"empty {vector.kind}vector")
+
+
+def number_values(scheme_objects):
+    values = [scheme_object.value for scheme_object in scheme_objects if type(scheme_object) is SchemeNumber]
+    if len(values) != len(scheme_objects):
+        for scheme_object in scheme_objects:
+            check_argument_type(scheme_object, is_scheme_number)
+    return values
+
+
+def numeric_vector_from_values(kind, values):
+    try:
+        return SchemeNumericVector.from_values(kind, values)
+    except TypeError:
+        raise SchemeRuntimeError(f"{kind}vector elements must be {'integers' if kind == 's64' else 'numbers'}")
+    except OverflowError:
+        raise SchemeRuntimeError(f"{kind}vector element out of range")
+
+
+def numeric_vector_number(kind, value):
+    return SchemeNumber(float(value) if kind == 'f64' else value)
+
+
+# numpy is optional, it is imported by the first f64 bulk operation as importing it takes longer than running
+# most programs. when installed, the f64 operations run on views of the vector arrays, without copying them
+@functools.cache
+def find_numpy():
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+def numpy_for(vector):
+    if vector.kind != 'f64' or len(vector.elements) == 0:
+        return None
+    return find_numpy()
+
+
+def f64_view(numpy, vector):
+    return numpy.frombuffer(vector.elements, dtype=numpy.float64)
+
+
+def f64_vector_from_ndarray(ndarray):
+    return SchemeNumericVector('f64', array.array('d', ndarray.tobytes()))
+
+
+def is_numeric_vector(kind, scheme_object):
+    return SchemeBool(isinstance(scheme_object, SchemeNumericVector) and scheme_object.kind == kind)
+
+
+def make_numeric_vector(kind, args):
+    if len(args) > 2:
+        raise SchemeRuntimeError(f"procedure make-{kind}vector expects at most 2 arguments, {len(args)} given")
+    size = args[0]
+    check_argument_type(size, is_scheme_integer)
+    if size.value < 0:
+        raise SchemeRuntimeError(f"negative vector size {size}")
+    fill = number_values(args[1:]) or [0]
+    return numeric_vector_from_values(kind, fill * size.value)
+
+
+def make_numeric_vector_from_elements(kind, numbers):
+    return numeric_vector_from_values(kind, number_values(numbers))
+
+
+def numeric_vector_length(kind, vector):
+    check_numeric_vector(kind, vector)
+    return SchemeNumber(len(vector.elements))
+
+
+def numeric_vector_ref(kind, vector, index):
+    check_numeric_vector(kind, vector)
+    check_vector_index(vector, index)
+    return SchemeNumber(vector.elements[index.value])
+
+
+def numeric_vector_set(kind, vector, index, value):
+    check_numeric_vector(kind, vector)
+    check_vector_index(vector, index)
+    check_argument_type(value, is_scheme_number)
+    try:
+        vector.elements[index.value] = value.value
+    except TypeError:
+        raise SchemeRuntimeError(f"{kind}vector elements must be integers")
+    except OverflowError:
+        raise SchemeRuntimeError(f"{kind}vector element out of range")
+
+
+def numeric_vector_to_list(kind, vector):
+    check_numeric_vector(kind, vector)
+    return make_scheme_list(list(map(SchemeNumber, vector.elements)))
+
+
+def list_to_numeric_vector(kind, scheme_list):
+    check_argument_type(scheme_list, is_scheme_list)
+    return numeric_vector_from_values(kind, number_values(list(scheme_list)))
+
+
+def numeric_vector_add(kind, vector1, vector2):
+    check_numeric_vector(kind, vector1)
+    check_numeric_vector(kind, vector2)
+    check_same_length(vector1, vector2)
+    numpy = numpy_for(vector1)
+    if numpy is not None:
+        return f64_vector_from_ndarray(numpy.add(f64_view(numpy, vector1), f64_view(numpy, vector2)))
+    return numeric_vector_from_values(kind, map(operator.add, vector1.elements, vector2.elements))
+
+
+def numeric_vector_multiply(kind, vector1, vector2):
+    check_numeric_vector(kind, vector1)
+    check_numeric_vector(kind, vector2)
+    check_same_length(vector1, vector2)
+    numpy = numpy_for(vector1)
+    if numpy is not None:
+        return f64_vector_from_ndarray(numpy.multiply(f64_view(numpy, vector1), f64_view(numpy, vector2)))
+    return numeric_vector_from_values(kind, map(operator.mul, vector1.elements, vector2.elements))
+
+
+def numeric_vector_scale(kind, vector, factor):
+    check_numeric_vector(kind, vector)
+    check_argument_type(factor, is_scheme_number)
+    numpy = numpy_for(vector)
+    if numpy is not None:
+        try:
+            return f64_vector_from_ndarray(f64_view(numpy, vector) * factor.value)
+        except OverflowError:
+            raise SchemeRuntimeError(f"{kind}vector element out of range")
+    return numeric_vector_from_values(kind, map(functools.partial(operator.mul, factor.value), vector.elements))
+
+
+def numeric_vector_sum(kind, vector):
+    check_numeric_vector(kind, vector)
+    numpy = numpy_for(vector)
+    if numpy is not None:
+        return numeric_vector_number(kind, numpy.sum(f64_view(numpy, vector)))
+    return numeric_vector_number(kind, sum(vector.elements))
+
+
+def numeric_vector_dot(kind, vector1, vector2):
+    check_numeric_vector(kind, vector1)
+    check_numeric_vector(kind, vector2)
+    check_same_length(vector1, vector2)
+    numpy = numpy_for(vector1)
+    if numpy is not None:
+        return numeric_vector_number(kind, numpy.dot(f64_view(numpy, vector1), f64_view(numpy, vector2)))
+    return numeric_vector_number(kind, sum(map(operator.mul, vector1.elements, vector2.elements)))
+
+
+def numeric_vector_min(kind, vector):
+    check_numeric_vector(kind, vector)
+    check_not_empty(vector)
+    numpy = numpy_for(vector)
+    if numpy is not None:
+        return numeric_vector_number(kind, numpy.min(f64_view(numpy, vector)))
+    return numeric_vector_number(kind, min(vector.elements))
+
+
+def numeric_vector_max(kind, vector):
+    check_numeric_vector(kind, vector)
+    check_not_empty(vector)
+    numpy = numpy_for(vector)
+    if numpy is not None:
+        return numeric_vector_number(kind, numpy.max(f64_view(numpy, vector)))
+    return numeric_vector_number(kind, max(vector.elements))
+
+
+def numeric_vector_cumulative_sum(kind, vector):
+    check_numeric_vector(kind, vector)
+    numpy = numpy_for(vector)
+    if numpy is not None:
+        return f64_vector_from_ndarray(numpy.cumsum(f64_view(numpy, vector)))
+    return numeric_vector_from_values(kind, itertools.accumulate(vector.elements))
+
+
+# hash tables
+
+def check_hash_table(scheme_object):
+    check_argument_type(scheme_object, is_scheme_hash_table)
+
+
+def is_scheme_hash_table(scheme_object):
+    return isinstance(scheme_object, SchemeHashTable)
+
+
+def is_hash_table(scheme_object):
+    return SchemeBool(isinstance(scheme_object, SchemeHashTable))
+
+
+# the equivalence is one of the eq?, eqv? and equal? built ins, equal? by default
+def make_hash_table(args):
+    if len(args) > 1:
+        raise SchemeRuntimeError(f"procedure make-hash-table expects at most 1 argument, custom hash functions "
+                                 f"are not supported")
+    if len(args) == 0:
+        return SchemeHashTable(is_structural=True)
+    equivalence = args[0]
+    if isinstance(equivalence, BuiltInProcedure) and equivalence.implementation is scheme_equal:
+        return SchemeHashTable(is_structural=True)
+    if isinstance(equivalence, BuiltInProcedure) and equivalence.implementation is scheme_is:
+        return SchemeHashTable(is_structural=False)
+    raise SchemeRuntimeError(f"unsupported hash table equivalence {equivalence}, expected eq?, eqv? or equal?")
+
+
+def hash_table_ref(apply_procedure, args):
+    if len(args) > 3:
+        raise SchemeRuntimeError(f"procedure hash-table-ref expects at most 3 arguments, {len(args)} given")
+    table = args[0]
+    key = args[1]
+    check_hash_table(table)
+    value = table.get(key, missing)
+    if value is not missing:
+        return value
+    if len(args) == 3:
+        check_argument_type(args[2], is_scheme_procedure)
+        return apply_procedure(args[2], [])
+    raise SchemeRuntimeError(f"key {key} not found in hash table")
+
+
+def hash_table_ref_default(table, key, default):
+    check_hash_table(table)
+    return table.get(key, default)
+
+
+def hash_table_set(table, key, value):
+    check_hash_table(table)
+    table.set(key, value)
+
+
+def hash_table_update(apply_procedure, args):
+    if len(args) > 4:
+        raise SchemeRuntimeError(f"procedure hash-table-update! expects at most 4 arguments, {len(args)} given")
+    table = args[0]
+    key = args[1]
+    procedure = args[2]
+    check_argument_type(procedure, is_scheme_procedure)
+    value = hash_table_ref(apply_procedure, [table, key] + args[3:])
+    table.set(key, apply_procedure(procedure, [value]))
+
+
+def hash_table_update_default(apply_procedure, table, key, procedure, default):
+    check_hash_table(table)
+    check_argument_type(procedure, is_scheme_procedure)
+    table.set(key, apply_procedure(procedure, [table.get(key, default)]))
+
+
+def hash_table_delete(table, key):
+    check_hash_table(table)
+    table.delete(key)
+
+
+def hash_table_exists(table, key):
+    check_hash_table(table)
+    return SchemeBool(table.contains(key))
+
+
+def hash_table_count(table):
+    check_hash_table(table)
+    return SchemeNumber(table.count())
+
+
+def hash_table_keys(table):
+    check_hash_table(table)
+    return make_scheme_list(table.keys())
+
+
+def hash_table_values(table):
+    check_hash_table(table)
+    return make_scheme_list(table.values())
+
+
+def hash_table_to_alist(table):
+    check_hash_table(table)
+    return make_scheme_list([SchemePair(key, value) for key, value in table.items()])
+
+
+# walks a snapshot of the entries, so the procedure may update the table
+def hash_table_walk(apply_procedure, table, procedure):
+    check_hash_table(table)
+    check_argument_type(procedure, is_scheme_procedure)
+    for key, value in table.items():
+        apply_procedure(procedure, [key, value])
+    return SchemeSymbol('ok')
+
+
 # control features
-@return_scheme_boolean
 def is_procedure(scheme_object):
+    return SchemeBool(isinstance(scheme_object, SchemeProcedure))
+
+
+def is_scheme_procedure(scheme_object):
     return isinstance(scheme_object, SchemeProcedure)
 
 
 def check_map_args(args):
-    check_argument_type(args[0], is_procedure)
+    check_argument_type(args[0], is_scheme_procedure)
     for arg in args[1:len(args)]:
-        check_argument_type(arg, is_list)
+        check_argument_type(arg, is_scheme_list)
 
 
 def check_apply_args(args):
-    check_argument_type(args[0], is_procedure)
-    check_argument_type(args[len(args) - 1], is_list)
-
-
-def apply_impl(procedure, args):
-    interpreter = Interpreter()
-    value = interpreter.do_apply(procedure, args)
-    return interpreter.trampoline(value)
+    check_argument_type(args[0], is_scheme_procedure)
+    check_argument_type(args[len(args) - 1], is_scheme_list)
 
 
-@minimum_required_args('apply', 2)
-def apply(scheme_objects):
-    args = list(scheme_objects)
+# apply returns a tail call for the engine to run, so calls through apply in tail position run in bounded stack
+def apply(args):
     check_apply_args(args)
     number_of_args = len(args)
     procedure = args[0]
     final_argument = args[number_of_args - 1]
     args_to_pass = args[1:number_of_args - 1]
     args_to_pass.extend(final_argument)
-    return apply_impl(procedure, args_to_pass)
+    return TailCall(procedure, args_to_pass)
 
 
-@minimum_required_args('for-each', 2)
-def scheme_for_each(scheme_objects):
-    scheme_map(scheme_objects)
+# map, for-each and force run procedures on the active engine, through the apply_procedure it passes them
+
+def scheme_for_each(apply_procedure, args):
+    check_map_args(args)
+    procedure = args[0]
+    if len(args) == 2:
+        for element in args[1]:
+            apply_procedure(procedure, [element])
+    else:
+        for elements in zip(*args[1:]):
+            apply_procedure(procedure, list(elements))
     return SchemeSymbol('ok')
 
 
-@minimum_required_args('map', 2)
-def scheme_map(scheme_objects):
-    args = list(scheme_objects)
+def scheme_map(apply_procedure, args):
     check_map_args(args)
-    number_of_args = len(args)
     procedure = args[0]
-    lists = [list(arg) for arg in args[1:number_of_args]]
-    results = []
-    for tuple_of_args_to_pass in zip(*lists):
-        args_to_pass = list(tuple_of_args_to_pass)
-        result = apply_impl(procedure, args_to_pass)
-        results.append(result)
-    return make_scheme_list(results)
+    if len(args) == 2:
+        return scheme_list_from_iterable([apply_procedure(procedure, [element]) for element in args[1]])
+    return scheme_list_from_iterable([apply_procedure(procedure, list(elements)) for elements in zip(*args[1:])])
+
+
+default_memo_entries = 4096
+
+
+# (memoize procedure [max-entries [weak?]])
+def memoize(args):
+    if len(args) > 3:
+        raise SchemeRuntimeError(f"procedure memoize expects at most 3 arguments, {len(args)} given")
+    procedure = args[0]
+    check_argument_type(procedure, is_scheme_procedure)
+    max_entries = default_memo_entries
+    if len(args) > 1:
+        check_argument_type(args[1], is_scheme_integer)
+        if args[1].value < 1:
+            raise SchemeRuntimeError(f"memoize needs room for at least 1 entry, got {args[1]}")
+        max_entries = args[1].value
+    weak = len(args) > 2 and Interpreter.truth(args[2])
+    return MemoizedProcedure(procedure, max_entries, weak)
+
+
+def is_memoized_procedure(scheme_object):
+    return isinstance(scheme_object, MemoizedProcedure)
+
+
+def memo_stats(procedure):
+    check_argument_type(procedure, is_memoized_procedure)
+    return make_scheme_list([SchemePair(SchemeSymbol('hits'), SchemeNumber(procedure.hits)),
+                             SchemePair(SchemeSymbol('misses'), SchemeNumber(procedure.misses)),
+                             SchemePair(SchemeSymbol('evictions'), SchemeNumber(procedure.evictions)),
+                             SchemePair(SchemeSymbol('entries'), SchemeNumber(len(procedure.entries)))])
 
 
 def check_make_promise_arg(arg):
-    check_argument_type(arg, is_procedure)
+    check_argument_type(arg, is_scheme_procedure)
     if not arg.arity == 0:
         raise SchemeRuntimeError("make-promise takes a procedure with 0 arguments")
 
 
-def force(promise):
-    check_argument_type(promise, lambda arg: type(arg) is SchemePromise)
+def force(apply_procedure, promise):
     if not promise.has_result():
-        value = apply_impl(promise.procedure, [])
+        value = apply_procedure(promise.procedure, [])
         # need to check again , as promise evaluation may refer to itself
         if not promise.has_result():
             promise.set_result(value)
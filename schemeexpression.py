@@ -1,4 +1,7 @@
 class Expression:
+    # (line, column) of the expression in the program, set by the Parser
+    position = None
+
     def accept(self, syntax_tree_visitor):
         pass
 
@@ -35,6 +38,15 @@ class StringLiteral(Expression):
         return syntax_tree_visitor.visit_string_literal(self)
 
 
+# created by the Optimizer for literals decoded at parse time and folded calls
+class Constant(Expression):
+    def __init__(self, value):
+        self.value = value
+
+    def accept(self, syntax_tree_visitor):
+        return syntax_tree_visitor.visit_constant(self)
+
+
 class QuotedList(Expression):
     def __init__(self, elements=None):
         self.elements = [] if elements is None else elements
@@ -43,6 +55,14 @@ class QuotedList(Expression):
         return syntax_tree_visitor.visit_list(self)
 
 
+class QuotedVector(Expression):
+    def __init__(self, elements=None):
+        self.elements = [] if elements is None else elements
+
+    def accept(self, syntax_tree_visitor):
+        return syntax_tree_visitor.visit_vector(self)
+
+
 class Symbol(Expression):
     def __init__(self, symbol):
         self.symbol = symbol
@@ -73,6 +93,9 @@ class Call(Expression):
     def __init__(self, callee, args=None):
         self.callee = callee
         self.args = args if args is not None else Args()
+        # inline cache of the Interpreter for a global callee: its cell and the global environment it belongs to
+        self.callee_cell = None
+        self.callee_cell_environment = None
 
     def accept(self, syntax_tree_visitor):
         return syntax_tree_visitor.visit_call(self)
@@ -81,6 +104,7 @@ class Call(Expression):
 class VariableReference(Expression):
     def __init__(self, variable_name):
         self.variable_name = variable_name
+        self.address = None
 
     def accept(self, syntax_tree_visitor):
         return syntax_tree_visitor.visit_variable_reference(self)
@@ -101,9 +125,12 @@ class FormalParameters:
 
 
 class Lambda(Expression):
-    def __init__(self, formals, body):
+    def __init__(self, formals, body, name=None):
         self.formals = formals
         self.body = body
+        # the variable of the definition binding the lambda, None if anonymous
+        self.name = name
+        self.parameter_addresses = None
 
     def accept(self, syntax_tree_visitor):
         return syntax_tree_visitor.visit_lambda(self)
@@ -122,11 +149,53 @@ class Assignment(Expression):
     def __init__(self, variable, expression):
         self.name = variable
         self.expression = expression
+        self.address = None
 
     def accept(self, syntax_tree_visitor):
         return syntax_tree_visitor.visit_assignment(self)
 
 
+class Sequence(Expression):
+    def __init__(self, expressions):
+        self.expressions = expressions
+
+    def accept(self, syntax_tree_visitor):
+        return syntax_tree_visitor.visit_sequence(self)
+
+
+class Let(Expression):
+    def __init__(self, bindings, body):
+        self.bindings = bindings
+        self.body = body
+
+    def accept(self, syntax_tree_visitor):
+        return syntax_tree_visitor.visit_let(self)
+
+
+class And(Expression):
+    def __init__(self, tests):
+        self.tests = tests
+
+    def accept(self, syntax_tree_visitor):
+        return syntax_tree_visitor.visit_and(self)
+
+
+class Or(Expression):
+    def __init__(self, tests):
+        self.tests = tests
+
+    def accept(self, syntax_tree_visitor):
+        return syntax_tree_visitor.visit_or(self)
+
+
+class Cond(Expression):
+    def __init__(self, clauses):
+        self.clauses = clauses
+
+    def accept(self, syntax_tree_visitor):
+        return syntax_tree_visitor.visit_cond(self)
+
+
 # user has no way to create this in source code, it is created by the parser to implement letrec
 class UnAssigned(Expression):
     def accept(self, syntax_tree_visitor):
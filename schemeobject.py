@@ -1,10 +1,32 @@
+import array
+import gc
+import weakref
+from collections import OrderedDict
+
+from environment import Frame
+
+
 class SchemeObject:
-    pass
+    __slots__ = ()
 
 
 class SchemeNumber(SchemeObject):
-    def __init__(self, value):
-        self.value = value
+    __slots__ = ('value',)
+    # integers in this range are created once, like booleans and symbols
+    smallest_cached_integer = -256
+    largest_cached_integer = 1024
+    small_integers = []
+
+    def __new__(cls, value):
+        if type(value) is int and cls.smallest_cached_integer <= value <= cls.largest_cached_integer:
+            return cls.small_integers[value - cls.smallest_cached_integer]
+        instance = super().__new__(cls)
+        instance.value = value
+        return instance
+
+    # unpickled through __new__, so small integers stay shared
+    def __reduce__(self):
+        return SchemeNumber, (self.value,)
 
     def __str__(self):
         return str(self.value)
@@ -13,19 +35,47 @@ class SchemeNumber(SchemeObject):
         return isinstance(other, SchemeNumber) and isinstance(self.value,
                                                               type(other.value)) and self.value == other.value
 
+    def __hash__(self):
+        return hash(self.value)
+
+
+def make_small_integers():
+    for value in range(SchemeNumber.smallest_cached_integer, SchemeNumber.largest_cached_integer + 1):
+        instance = object.__new__(SchemeNumber)
+        instance.value = value
+        SchemeNumber.small_integers.append(instance)
+
+
+make_small_integers()
+
 
 class SchemeChar(SchemeObject):
-    def __init__(self, value):
-        self.value = value
+    __slots__ = ('value',)
+    instances = {}
+
+    def __new__(cls, value):
+        instance = cls.instances.get(value)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.value = value
+            cls.instances[value] = instance
+        return instance
+
+    def __reduce__(self):
+        return SchemeChar, (self.value,)
 
     def __eq__(self, other):
         return isinstance(other, SchemeChar) and self.value == other.value
 
+    def __hash__(self):
+        return hash(self.value)
+
     def __str__(self):
         return self.value if self.value.isspace() else f"\\#{self.value}"
 
 
 class SchemeBool(SchemeObject):
+    __slots__ = ('value',)
     scheme_true = None
     scheme_false = None
 
@@ -41,9 +91,15 @@ class SchemeBool(SchemeObject):
                 cls.scheme_false.value = False
             return cls.scheme_false
 
+    def __reduce__(self):
+        return SchemeBool, (self.value,)
+
     def __eq__(self, other):
         return isinstance(other, SchemeBool) and self.value == other.value
 
+    def __hash__(self):
+        return hash(self.value)
+
     def __str__(self):
         return "#t" if self.value else "#f"
 
@@ -52,17 +108,23 @@ class SchemeBool(SchemeObject):
 
 
 class SchemeString(SchemeObject):
+    __slots__ = ('value',)
+
     def __init__(self, value):
         self.value = value
 
     def __eq__(self, other):
         return isinstance(other, SchemeString) and self.value == other.value
 
+    def __hash__(self):
+        return hash(self.value)
+
     def __str__(self):
         return f'"{self.value}"'
 
 
 class SchemeSymbol(SchemeObject):
+    __slots__ = ('value',)
     instances = {}
 
     def __new__(cls, value):
@@ -74,14 +136,21 @@ class SchemeSymbol(SchemeObject):
             instance = cls.instances[value]
         return instance
 
+    def __reduce__(self):
+        return SchemeSymbol, (self.value,)
+
     def __eq__(self, other):
         return isinstance(other, SchemeSymbol) and self.value == other.value
 
+    def __hash__(self):
+        return hash(self.value)
+
     def __str__(self):
         return self.value
 
 
 class SchemeEmptyList:
+    __slots__ = ()
     instance = None
 
     def __new__(cls):
@@ -101,30 +170,65 @@ class SchemeEmptyList:
     def is_list(self):
         return True
 
+    def list_length(self):
+        return 0
+
 
 class SchemePair(SchemeObject):
+    __slots__ = ('first', 'second', 'cached_list_length', 'cached_list_length_epoch')
+    # bumped by every set-cdr!, which invalidates the list lengths cached by all pairs, not only by the pairs
+    # leading to the mutated one, as pairs do not know which pairs point to them. a program calling set-cdr!
+    # between length queries measures its lists again each time
+    cdr_mutations = 0
+    # cached_list_length of a pair being measured, seeing it again while measuring means the list is circular
+    measuring = -2
+
     def __init__(self, first, second):
         self.first = first
         self.second = second
+        self.cached_list_length = -1
+        self.cached_list_length_epoch = -1
 
     def __str__(self):
-        if self.is_list():
-            return f"( {' '.join(str(element) for element in self)} )"
-        else:
-            return f"( {self.first} . {self.second} )"
+        return pair_to_string(self, set())
 
     def __iter__(self):
         if not self.is_list():
             raise Exception("trying to iterate a non list pair")
         return SchemeListIterator(self)
 
+    # a list is circular when the walk down its cdrs meets again the pair followed at half speed, the walk fails
+    # once both lists are known to be circular, a circular list compared with a proper list differs where it ends
     def __eq__(self, other):
-        return isinstance(other, SchemePair) and self.car() == other.car() and self.cdr() == other.cdr()
+        left = self
+        right = other
+        left_half_speed = self
+        right_half_speed = other
+        left_is_circular = False
+        right_is_circular = False
+        steps = 0
+        while isinstance(left, SchemePair):
+            if not isinstance(right, SchemePair) or not left.first == right.first:
+                return False
+            left = left.second
+            right = right.second
+            steps += 1
+            if steps % 2 == 0:
+                left_half_speed = left_half_speed.second
+                right_half_speed = right_half_speed.second
+            left_is_circular = left_is_circular or left is left_half_speed
+            right_is_circular = right_is_circular or right is right_half_speed
+            if left_is_circular and right_is_circular:
+                raise SchemeRuntimeError("cannot compare circular lists")
+        return left == right
+
+    def __hash__(self):
+        return structural_hash(self)
 
     def size(self):
         if not self.is_list():
             raise Exception("trying to iterate a non list pair")
-        return scheme_list_length(self)
+        return self.list_length()
 
     def car(self):
         return self.first
@@ -136,21 +240,93 @@ class SchemePair(SchemeObject):
         self.first = value
 
     def set_cdr(self, value):
+        SchemePair.cdr_mutations += 1
         self.second = value
 
     def is_list(self):
-        return isinstance(self.cdr(), SchemePair) and self.cdr().is_list() or self.cdr() == SchemeEmptyList()
+        return self.list_length() >= 0
+
+    # number of elements if this pair starts a proper list, -1 otherwise.
+    # the result is cached on every pair of the chain, so asking again, or asking a list consed onto this one,
+    # takes constant time until the next set-cdr!
+    def list_length(self):
+        epoch = SchemePair.cdr_mutations
+        if self.cached_list_length_epoch == epoch:
+            return self.cached_list_length
+        empty_list = SchemeEmptyList()
+        chain = []
+        current = self
+        while True:
+            if current is empty_list:
+                length = 0
+                break
+            if not isinstance(current, SchemePair):
+                length = -1
+                break
+            if current.cached_list_length_epoch == epoch:
+                length = current.cached_list_length
+                if length == SchemePair.measuring:
+                    length = -1
+                break
+            current.cached_list_length_epoch = epoch
+            current.cached_list_length = SchemePair.measuring
+            chain.append(current)
+            current = current.second
+
+        for pair in reversed(chain):
+            if length >= 0:
+                length += 1
+            pair.cached_list_length = length
+        return self.cached_list_length
+
+
+# the cdrs of a pair that does not start a list are walked in a loop rather than recursively, a pair met again
+# while it is being printed, down its cdrs or inside its elements, is circular and printed as ...
+def pair_to_string(pair, printing):
+    prefixes = []
+    current = pair
+    while isinstance(current, SchemePair) and not current.is_list():
+        if id(current) in printing:
+            break
+        printing.add(id(current))
+        prefixes.append(current)
+        current = current.second
+    if not isinstance(current, SchemePair):
+        tail = str(current)
+    elif id(current) in printing:
+        tail = "..."
+    else:
+        printing.add(id(current))
+        tail = f"( {' '.join(element_to_string(element, printing) for element in current)} )"
+        printing.discard(id(current))
+    heads = [f"( {element_to_string(prefix.first, printing)} . " for prefix in prefixes]
+    for prefix in prefixes:
+        printing.discard(id(prefix))
+    return ''.join(heads) + tail + " )" * len(prefixes)
+
+
+def element_to_string(element, printing):
+    if not isinstance(element, SchemePair):
+        return str(element)
+    if id(element) in printing:
+        return "..."
+    return pair_to_string(element, printing)
 
 
 class SchemeListIterator:
+    __slots__ = ('current',)
+
     def __init__(self, pair):
         self.current = pair
 
+    def __iter__(self):
+        return self
+
     def __next__(self):
         if self.current is SchemeEmptyList():
             raise StopIteration
         element = self.current.first
-        self.current = self.current.cdr()
+        self.current = self.current.second
         return element
 
 
@@ -158,16 +334,29 @@ def is_scheme_list(scheme_object):
     return scheme_object is SchemeEmptyList() or isinstance(scheme_object, SchemePair) and scheme_object.is_list()
 
 
+# builds the list back to front, so every pair knows the length of the list it starts
 def make_scheme_list(elements):
-    if len(elements) == 0:
-        return SchemeEmptyList()
-    return SchemePair(elements[0], make_scheme_list(elements[1:]))
+    scheme_list = SchemeEmptyList()
+    epoch = SchemePair.cdr_mutations
+    length = 0
+    for element in reversed(elements):
+        scheme_list = SchemePair(element, scheme_list)
+        length += 1
+        scheme_list.cached_list_length = length
+        scheme_list.cached_list_length_epoch = epoch
+    return scheme_list
+
+
+def scheme_list_from_iterable(iterable):
+    if isinstance(iterable, (list, tuple)):
+        return make_scheme_list(iterable)
+    return make_scheme_list(list(iterable))
 
 
 def scheme_list_length(scheme_list):
     if scheme_list is SchemeEmptyList():
         return 0
-    return 1 + scheme_list_length(scheme_list.cdr())
+    return scheme_list.list_length()
 
 
 def scheme_list_tail(scheme_list):
@@ -178,6 +367,147 @@ def scheme_list_tail(scheme_list):
     return scheme_list
 
 
+# fixed size, elements stored in a python list for constant time indexed access
+class SchemeVector(SchemeObject):
+    __slots__ = ('elements',)
+
+    def __init__(self, elements):
+        self.elements = elements
+
+    def __str__(self):
+        if len(self.elements) == 0:
+            return "#()"
+        return f"#( {' '.join(str(element) for element in self.elements)} )"
+
+    def __eq__(self, other):
+        return isinstance(other, SchemeVector) and self.elements == other.elements
+
+    def __hash__(self):
+        return structural_hash(self)
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def size(self):
+        return len(self.elements)
+
+
+# srfi 4 homogeneous vector of unboxed numbers, s64 (signed 64 bit integers) or f64 (doubles),
+# elements are stored in an array.array of the matching typecode
+class SchemeNumericVector(SchemeObject):
+    __slots__ = ('kind', 'elements')
+    typecodes = {'s64': 'q', 'f64': 'd'}
+
+    def __init__(self, kind, elements):
+        self.kind = kind
+        self.elements = elements
+
+    @classmethod
+    def from_values(cls, kind, values):
+        return cls(kind, array.array(cls.typecodes[kind], values))
+
+    def __str__(self):
+        if len(self.elements) == 0:
+            return f"#{self.kind}()"
+        return f"#{self.kind}( {' '.join(str(element) for element in self.elements)} )"
+
+    def __eq__(self, other):
+        return isinstance(other, SchemeNumericVector) and self.kind == other.kind and self.elements == other.elements
+
+    def __hash__(self):
+        return hash((self.kind, tuple(self.elements[:structural_hash_budget])))
+
+    def size(self):
+        return len(self.elements)
+
+
+# python equality of scheme objects is equal?, and their hash agrees with it. pairs and vectors are hashed on their
+# first nodes only, visited without recursion, so hashing a long or circular list takes constant time
+structural_hash_budget = 16
+
+
+def structural_hash(scheme_object):
+    hashes = []
+    pending = [scheme_object]
+    while pending and len(hashes) < structural_hash_budget:
+        current = pending.pop()
+        if type(current) is SchemePair:
+            hashes.append('pair')
+            pending.append(current.second)
+            pending.append(current.first)
+        elif type(current) is SchemeVector:
+            hashes.append(len(current.elements))
+            pending.extend(reversed(current.elements[:structural_hash_budget]))
+        else:
+            hashes.append(hash(current))
+    return hash(tuple(hashes))
+
+
+# wraps the keys of eq? and eqv? hash tables whose python equality is structural but that eqv? compares by identity
+class IdentityKey:
+    __slots__ = ('scheme_object',)
+
+    def __init__(self, scheme_object):
+        self.scheme_object = scheme_object
+
+    def __eq__(self, other):
+        return type(other) is IdentityKey and other.scheme_object is self.scheme_object
+
+    def __hash__(self):
+        return id(self.scheme_object)
+
+
+# the default of lookups telling a missing entry from an entry holding None, the value of define and set!
+missing = object()
+
+
+# srfi 69 hash table, a python dictionary keyed by the scheme objects for equal? tables,
+# and by their identity, except for numbers and characters, for eqv? tables
+class SchemeHashTable(SchemeObject):
+    __slots__ = ('is_structural', 'entries')
+    identity_compared_types = frozenset([SchemeString, SchemePair, SchemeVector, SchemeNumericVector])
+
+    def __init__(self, is_structural):
+        self.is_structural = is_structural
+        self.entries = {}
+
+    def __str__(self):
+        return f"hash table"
+
+    def key(self, scheme_object):
+        if self.is_structural or type(scheme_object) not in self.identity_compared_types:
+            return scheme_object
+        return IdentityKey(scheme_object)
+
+    @staticmethod
+    def scheme_key(key):
+        return key.scheme_object if type(key) is IdentityKey else key
+
+    def get(self, scheme_key, default=None):
+        return self.entries.get(self.key(scheme_key), default)
+
+    def set(self, scheme_key, value):
+        self.entries[self.key(scheme_key)] = value
+
+    def delete(self, scheme_key):
+        self.entries.pop(self.key(scheme_key), None)
+
+    def contains(self, scheme_key):
+        return self.key(scheme_key) in self.entries
+
+    def count(self):
+        return len(self.entries)
+
+    def keys(self):
+        return [self.scheme_key(key) for key in self.entries]
+
+    def values(self):
+        return list(self.entries.values())
+
+    def items(self):
+        return [(self.scheme_key(key), value) for key, value in self.entries.items()]
+
+
 class SchemeProcedure(SchemeObject):
     def __init__(self, **kwargs):
         is_variadic = kwargs.get('variadic')
@@ -192,21 +522,112 @@ class SchemeProcedure(SchemeObject):
         return f"procedure {self}"
 
 
+# arity, the minimum number of arguments of a variadic procedure and the type of every argument are declared once
+# and checked by call, which takes the arguments as a python sequence. the implementation receives them as
+# python positional arguments, or as one python list when variadic. fixed_arity_implementations maps a number of
+# arguments to an implementation taking exactly those, used for the common calls of variadic procedures.
+# implementations of higher order procedures, declared with applies_procedures, also receive first the
+# apply_procedure(procedure, arguments) function of the engine calling them, to run procedures on that same engine
 class BuiltInProcedure(SchemeProcedure):
-    def __init__(self, implementation, **kwargs):
+    def __init__(self, implementation, name=None, minimum_arity=0, argument_type=None,
+                 fixed_arity_implementations=None, applies_procedures=False, **kwargs):
         super().__init__(**kwargs)
         self.implementation = implementation
+        self.name = name
+        self.minimum_arity = minimum_arity
+        self.argument_type = argument_type
+        self.fixed_arity_implementations = {} if fixed_arity_implementations is None else fixed_arity_implementations
+        self.applies_procedures = applies_procedures
 
     def __str__(self):
         return f"built in procedure"
 
-    def call(self, args):
+    def call(self, args, apply_procedure=None):
+        number_of_args = len(args)
+        if self.is_variadic:
+            if number_of_args < self.minimum_arity:
+                raise SchemeRuntimeError(
+                    f"procedure {self.name} requires at least {self.minimum_arity}"
+                    f" argument{'' if self.minimum_arity == 1 else 's'}")
+        elif number_of_args != self.arity:
+            raise SchemeRuntimeError(
+                f"procedure expects {self.arity} argument {'s' if self.arity > 1 else ''}, {number_of_args} given")
+        argument_type = self.argument_type
+        if argument_type is not None:
+            for arg in args:
+                if not isinstance(arg, argument_type):
+                    raise SchemeRuntimeError(f"argument {arg} is of incorrect type ")
+        implementation = self.fixed_arity_implementations.get(number_of_args)
+        if implementation is not None:
+            return implementation(*args)
+        if self.applies_procedures:
+            if self.is_variadic:
+                return self.implementation(apply_procedure, args)
+            return self.implementation(apply_procedure, *args)
+        if self.is_variadic:
+            return self.implementation(args)
         return self.implementation(*args)
 
 
+# caches the values of a procedure keyed on its arguments, compared with equal?, evicting the least recently used
+# entry past max_entries. in weak mode the entries are also dropped by every full garbage collection, so the cache
+# never keeps values alive for long, the objects themselves are not weakly referenceable as they use __slots__
+class MemoizedProcedure(BuiltInProcedure):
+    weak_procedures = weakref.WeakSet()
+
+    def __init__(self, procedure, max_entries, weak=False):
+        super().__init__(None, arity=procedure.arity, variadic=procedure.is_variadic)
+        self.procedure = procedure
+        self.max_entries = max_entries
+        self.weak = weak
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if weak:
+            if drop_weak_entries not in gc.callbacks:
+                gc.callbacks.append(drop_weak_entries)
+            MemoizedProcedure.weak_procedures.add(self)
+
+    def __str__(self):
+        return f"memoized {self.procedure}"
+
+    def call(self, args, apply_procedure=None):
+        key = tuple(args)
+        entries = self.entries
+        try:
+            value = entries.get(key, missing)
+        except TypeError:
+            # an argument that cannot be hashed, the call is not cached
+            return apply_procedure(self.procedure, list(args))
+        if value is not missing:
+            entries.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = apply_procedure(self.procedure, list(args))
+        entries[key] = value
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+
+# the entries are replaced instead of cleared, a call running when the collection is triggered keeps the old ones
+def drop_weak_entries(phase, info):
+    if phase != 'stop' or info['generation'] != 2:
+        return
+    for procedure in list(MemoizedProcedure.weak_procedures):
+        procedure.evictions += len(procedure.entries)
+        procedure.entries = OrderedDict()
+
+
 class UserDefinedProcedure(SchemeProcedure):
-    def __init__(self, formal_parameters, body, surrounding_environment):
+    def __init__(self, formal_parameters, body, surrounding_environment, name=None, position=None):
         super().__init__(arity=len(formal_parameters.fixed_parameters), variadic=formal_parameters.has_list_parameter)
+        self.name = name
+        # (line, column) of the lambda in the program
+        self.position = position
         self.parameters = formal_parameters.fixed_parameters if not formal_parameters.has_list_parameter else [
             formal_parameters.list_parameter_name]
         self.body = body
@@ -216,7 +637,37 @@ class UserDefinedProcedure(SchemeProcedure):
         return f"scheme user defined procedure"
 
 
+class CompiledProcedure(UserDefinedProcedure):
+    def __init__(self, formal_parameters, body, surrounding_frame, compiled_body, name=None, position=None):
+        super().__init__(formal_parameters, body, surrounding_frame, name, position)
+        self.compiled_body = compiled_body
+
+    def call(self, args):
+        return self.compiled_body(Frame(args, self.environment))
+
+
+# a procedure made by the Interpreter, closing over the Frame it was made in and over its global environment
+class InterpretedProcedure(UserDefinedProcedure):
+    def __init__(self, formal_parameters, body, surrounding_frame, global_environment, name=None, position=None):
+        super().__init__(formal_parameters, body, surrounding_frame, name, position)
+        self.global_environment = global_environment
+
+
+# a procedure compiled to a bytecode CodeObject, run by the VirtualMachine that made it in a Frame of its arguments
+class BytecodeProcedure(UserDefinedProcedure):
+    def __init__(self, code, surrounding_frame, machine):
+        super().__init__(code.formals, code.body, surrounding_frame, code.name, code.position)
+        self.code = code
+        self.machine = machine
+
+    # the other engines call it like a CompiledProcedure
+    def call(self, args):
+        return self.machine.execute(self.code, Frame(args, self.environment))
+
+
 class SchemePromise(SchemeObject):
+    __slots__ = ('procedure', 'result')
+
     def __init__(self, procedure):
         self.procedure = procedure
         self.result = None
@@ -28,9 +28,12 @@ class TokenType(Enum):
     STRING = auto()
     BOOLEAN = auto()
     CHARACTER = auto()
+    # a datum read by the DatumParser, carried by its token
+    CONSTANT = auto()
 
     # delimiters
     OPEN_PAREN = auto()
+    OPEN_VECTOR = auto()
     CLOSE_PAREN = auto()
     DOT = auto()
 
@@ -64,3 +67,10 @@ class Token:
         self.type = typ
         self.line_number = line_number
         self.column_number = column_number
+
+
+# the token of a datum read by the DatumParser, data have no position in a source text
+class DatumToken(Token):
+    def __init__(self, lexeme, typ, value=None):
+        super().__init__(lexeme, typ, None, None)
+        self.value = value
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import time
+import unittest
+
+from astcache import AstCache
+from environment import Environment
+from main import evaluate, init_global_environment, load_syntax_tree, parse_command_line
+from schemeobject import SchemeBool, SchemeNumber, SchemeSymbol
+
+
+class AstCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = AstCache(self.directory.name)
+        self.environment = Environment()
+        init_global_environment(self.environment)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def load(self, program, *args):
+        options = parse_command_line(list(args) + ['program.scm'])
+        return load_syntax_tree(program, self.environment, options, self.cache)
+
+    def test_miss_then_hit(self):
+        program = "(define (f x) (if (> x 0) 'positive #f)) (f (+ 1 2))"
+        syntax_tree, rewrites = self.load(program)
+        self.assertEqual((0, 1), (self.cache.hits, self.cache.misses))
+        cached_syntax_tree, cached_rewrites = self.load(program)
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+        self.assertIsNot(syntax_tree, cached_syntax_tree)
+        self.assertEqual(rewrites, cached_rewrites)
+        self.assertIs(SchemeSymbol('positive'), evaluate(cached_syntax_tree, self.environment))
+
+    def test_interned_objects_stay_shared(self):
+        self.cache.store("x", False, [SchemeBool(False), SchemeNumber(3), SchemeSymbol('a'), SchemeNumber(2.5)])
+        values = self.cache.load("x", False)
+        self.assertIs(SchemeBool(False), values[0])
+        self.assertIs(SchemeNumber(3), values[1])
+        self.assertIs(SchemeSymbol('a'), values[2])
+        self.assertEqual(SchemeNumber(2.5), values[3])
+
+    def test_optimized_and_parsed_trees_are_kept_apart(self):
+        self.load("(+ 1 2)")
+        syntax_tree, rewrites = self.load("(+ 1 2)", '--no-optimize')
+        self.assertEqual(0, rewrites)
+        self.assertEqual(2, self.cache.misses)
+
+    def test_other_interpreter_version_misses(self):
+        self.cache.store("1", False, "value")
+        other_version = AstCache(self.directory.name)
+        other_version.version = "other"
+        self.assertIsNone(other_version.load("1", False))
+
+    def test_corrupt_entry_is_a_miss_and_removed(self):
+        self.cache.store("1", False, "value")
+        path = self.cache.path("1", False)
+        with open(path, 'wb') as file:
+            file.write(b'not a pickle')
+        self.assertIsNone(self.cache.load("1", False))
+        self.assertFalse(os.path.exists(path))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        self.cache.max_size = 2000
+        for program in ["1", "2", "3"]:
+            self.cache.store(program, False, "x" * 600)
+            os.utime(self.cache.path(program, False), (time.time() - 10, time.time() - 10))
+        self.assertEqual("x" * 600, self.cache.load("1", False))
+        self.cache.store("4", False, "x" * 600)
+        remaining = [program for program in ["1", "2", "3", "4"] if os.path.exists(self.cache.path(program, False))]
+        self.assertEqual(["1", "3", "4"], remaining)
+
+    def test_scan_errors_are_not_cached(self):
+        with self.assertRaises(Exception):
+            self.load("(f")
+        self.assertEqual([], os.listdir(self.directory.name))
+
+
+if __name__ == '__main__':
+    unittest.main()
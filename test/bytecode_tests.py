@@ -0,0 +1,78 @@
+import unittest
+
+from bytecode import *
+from environment import Environment
+from main import scan
+from resolver import Resolver
+from schemeobject import BytecodeProcedure, SchemeNumber
+from virtualmachine import VirtualMachine
+
+
+class BytecodeCompilerTests(unittest.TestCase):
+    def compile(self, program):
+        expression = scan(program).nodes[0]
+        Resolver().resolve(expression)
+        return BytecodeCompiler().compile_top_level(expression)
+
+    def opcodes(self, code):
+        opcodes = []
+        offset = 0
+        while offset < len(code.instructions):
+            opcode = code.instructions[offset]
+            opcodes.append(opcode)
+            offset += 1 + operand_counts[opcode]
+        return opcodes
+
+    def test_instructions_are_a_flat_array(self):
+        code = self.compile("1")
+        self.assertEqual([CONSTANT, 0, RETURN], list(code.instructions))
+        self.assertEqual([SchemeNumber(1)], code.constants)
+
+    def test_global_names_are_pooled(self):
+        code = self.compile("(+ x x)")
+        self.assertEqual(['+', 'x'], code.names)
+        self.assertEqual([LOAD_GLOBAL, LOAD_GLOBAL, LOAD_GLOBAL, TAIL_CALL, RETURN], self.opcodes(code))
+
+    def test_call_in_tail_position_of_lambda(self):
+        code = self.compile("(lambda (f x) (f (f x)))")
+        self.assertEqual([MAKE_CLOSURE, RETURN], self.opcodes(code))
+        body = code.constants[0]
+        self.assertEqual([LOAD_LOCAL, LOAD_LOCAL, LOAD_LOCAL, CALL, TAIL_CALL, RETURN], self.opcodes(body))
+
+    def test_free_variable(self):
+        body = self.compile("(lambda (x) (lambda () x))").constants[0].constants[0]
+        self.assertEqual([LOAD_FREE, 1, 0, RETURN], list(body.instructions))
+
+    def test_let_in_tail_position_does_not_leave_its_frame(self):
+        self.assertEqual([CONSTANT, ENTER_FRAME, LOAD_LOCAL, RETURN], self.opcodes(self.compile("(let ((x 1)) x)")))
+        self.assertEqual([CONSTANT, ENTER_FRAME, LOAD_LOCAL, LEAVE_FRAME, POP, CONSTANT, RETURN],
+                         self.opcodes(self.compile("(begin (let ((x 1)) x) 2)")))
+
+    def test_conditional_jumps(self):
+        code = self.compile("(if a 1 2)")
+        self.assertEqual([LOAD_GLOBAL, 0, JUMP_IF_FALSE, 8, CONSTANT, 0, JUMP, 10, CONSTANT, 1, RETURN],
+                         list(code.instructions))
+
+    def test_disassemble(self):
+        code = self.compile("(define (add-one n) (+ n 1))")
+        self.assertEqual("""code top level:
+     0 MAKE_CLOSURE          0 (code add-one)
+     2 DEFINE_GLOBAL         0 (add-one)
+     4 RETURN
+
+code add-one:
+     0 LOAD_GLOBAL           0 (+)
+     2 LOAD_LOCAL            0 (n)
+     4 CONSTANT              0 (1)
+     6 TAIL_CALL             2
+     8 RETURN""", disassemble(code))
+
+
+class VirtualMachineTests(unittest.TestCase):
+    def test_procedure_closes_over_its_frame(self):
+        environment = Environment()
+        vm = VirtualMachine(environment)
+        vm.interpret_syntax_tree(scan("(define (constant x) (lambda () x))"))
+        procedure = vm.apply_procedure(environment.get('constant'), [SchemeNumber(4)])
+        self.assertEqual(BytecodeProcedure, type(procedure))
+        self.assertEqual(SchemeNumber(4), vm.apply_procedure(procedure, []))
@@ -0,0 +1,69 @@
+import unittest
+
+from closurecompiler import ClosureCompiler, apply_procedure
+from environment import Environment
+from interpreter import TailCall
+from resolver import Resolver
+from schemeexpression import *
+from schemeobject import CompiledProcedure, SchemeNumber, SchemeRuntimeError
+
+
+class ClosureCompilerTests(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment()
+        self.compiler = ClosureCompiler(self.environment)
+
+    def compile(self, expression, tail_position=False):
+        Resolver().resolve(expression)
+        return self.compiler.compile(expression, tail_position)
+
+    def test_number_literal_is_decoded_once(self):
+        compiled = self.compile(NumberLiteral("+.1"))
+        self.assertIs(compiled(None), compiled(None))
+        self.assertEqual(0.1, compiled(None).value)
+
+    def test_variable_reference(self):
+        self.environment.add('x', SchemeNumber(1))
+        compiled = self.compile(VariableReference('x'))
+        self.assertEqual(SchemeNumber(1), compiled(None))
+
+    def test_unbound_variable(self):
+        compiled = self.compile(VariableReference('x'))
+        with self.assertRaises(SchemeRuntimeError):
+            compiled(None)
+
+    def test_lambda_compiles_to_procedure(self):
+        formals = FormalParameters()
+        formals.append_parameter('x')
+        compiled = self.compile(Lambda(formals, [VariableReference('x')]))
+        procedure = compiled(None)
+        self.assertEqual(type(procedure), CompiledProcedure)
+        self.assertEqual(SchemeNumber(3), apply_procedure(procedure, [SchemeNumber(3)]))
+
+    def test_nested_lambda_reads_parent_frame(self):
+        outer_formals = FormalParameters()
+        outer_formals.append_parameter('x')
+        inner_formals = FormalParameters()
+        inner_formals.append_parameter('y')
+        inner_lambda = Lambda(inner_formals, [VariableReference('x')])
+        outer_lambda = Lambda(outer_formals, [inner_lambda])
+        Resolver().resolve(outer_lambda)
+        self.assertEqual((1, 0), (inner_lambda.body[0].address.depth, inner_lambda.body[0].address.slot))
+        inner_procedure = apply_procedure(self.compile(outer_lambda)(None), [SchemeNumber(5)])
+        self.assertEqual(SchemeNumber(5), apply_procedure(inner_procedure, [SchemeNumber(6)]))
+
+    def test_call_in_tail_position_returns_tail_call(self):
+        formals = FormalParameters()
+        self.environment.add('f', self.compile(Lambda(formals, [NumberLiteral('1')]))(None))
+        compiled = self.compile(Call(VariableReference('f')), tail_position=True)
+        self.assertEqual(type(compiled(None)), TailCall)
+
+    def test_call_in_non_tail_position_is_trampolined(self):
+        formals = FormalParameters()
+        self.environment.add('f', self.compile(Lambda(formals, [NumberLiteral('1')]))(None))
+        compiled = self.compile(Call(VariableReference('f')))
+        self.assertEqual(SchemeNumber(1), compiled(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
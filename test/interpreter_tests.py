@@ -1,9 +1,18 @@
+from derivedexpression import CondClause, LetBinding
 from schemebuiltins import plus
-from interpreter import Interpreter, SchemeRuntimeError, Environment, SchemeNumber
+from interpreter import Interpreter, SchemeRuntimeError, Environment, SchemeNumber, inline_cache_stats
+from parser import SyntaxTree
+from resolver import Resolver
 from schemeexpression import *
 import unittest
 
-from schemeobject import BuiltInProcedure, SchemePair, UserDefinedProcedure, make_scheme_list
+from schemeobject import BuiltInProcedure, InterpretedProcedure, SchemeBool, SchemePair, make_scheme_list
+
+
+# the interpreter reads variables by the addresses the Resolver gives them
+def resolved(expression):
+    Resolver().resolve(expression)
+    return expression
 
 
 def interpreter_with_variables(**kwargs):
@@ -72,13 +81,37 @@ class InterpreterTests(unittest.TestCase):
         conditional_result = self.interpreter.visit_conditional(conditional)
         self.assertEqual("hello", conditional_result.value)
 
+    def test_let(self):
+        let = Let([LetBinding('x', NumberLiteral('1'))], [VariableReference('x')])
+        self.assertEqual(SchemeNumber(1), self.interpreter.visit_let(resolved(let)))
+        self.assertIsNone(self.interpreter.frame)
+        self.assertIsNone(self.interpreter.environment.get('x'))
+
+    def test_and_stops_at_first_false(self):
+        and_expression = And([BoolLiteral('#f'), VariableReference('undefined')])
+        self.assertEqual(SchemeBool(False), self.interpreter.visit_and(and_expression))
+
+    def test_or_returns_first_true_value(self):
+        or_expression = Or([BoolLiteral('#f'), NumberLiteral('2'), VariableReference('undefined')])
+        self.assertEqual(SchemeNumber(2), self.interpreter.visit_or(or_expression))
+
+    def test_cond(self):
+        cond = Cond([CondClause([NumberLiteral('1')], BoolLiteral('#f')),
+                     CondClause([], NumberLiteral('2')),
+                     CondClause([NumberLiteral('3')])])
+        self.assertEqual(SchemeNumber(2), self.interpreter.visit_cond(cond))
+
+    def test_sequence(self):
+        sequence = Sequence([NumberLiteral('1'), StringLiteral('"last"')])
+        self.assertEqual("last", self.interpreter.visit_sequence(sequence).value)
+
     def test_unbound_variable(self):
-        variable_reference = VariableReference('x')
+        variable_reference = resolved(VariableReference('x'))
         with self.assertRaises(SchemeRuntimeError):
             self.interpreter.visit_variable_reference(variable_reference)
 
     def test_bound_variable(self):
-        variable_reference = VariableReference('x')
+        variable_reference = resolved(VariableReference('x'))
         interpreter = interpreter_with_variables(x=SchemeNumber(1))
         value = interpreter.visit_variable_reference(variable_reference)
         self.assertEqual(type(value), SchemeNumber)
@@ -90,14 +123,14 @@ class InterpreterTests(unittest.TestCase):
         interpreter = interpreter_with_variables(f=built_in_procedure)
         args = Args()
         args.add(NumberLiteral('2'))
-        call = Call(variable_reference, args)
+        call = resolved(Call(variable_reference, args))
         result = interpreter.visit_call(call)
         self.assertEqual(result, SchemeNumber(4))
 
     def test_builtin_variadic_procedure_call(self):
         built_in_procedure = BuiltInProcedure(plus, variadic=True)
-        result = built_in_procedure.call([make_scheme_list([SchemeNumber(2), SchemeNumber(5)])])
-        self.assertEqual(result, SchemeNumber(7))
+        result = built_in_procedure.call([SchemeNumber(2), SchemeNumber(5), SchemeNumber(1)])
+        self.assertEqual(result, SchemeNumber(8))
 
     def test_user_defined_variadic_procedure_call(self):
         formals = FormalParameters()
@@ -107,7 +140,7 @@ class InterpreterTests(unittest.TestCase):
         arguments = Args()
         arguments.add(NumberLiteral('1'))
         arguments.add(NumberLiteral('2'))
-        call = Call(scheme_lambda, arguments)
+        call = resolved(Call(scheme_lambda, arguments))
         result = self.interpreter.visit_call(call)
         self.assertEqual(result, SchemeNumber(2))
 
@@ -118,7 +151,7 @@ class InterpreterTests(unittest.TestCase):
         arguments = Args()
         arguments.add(NumberLiteral('1'))
         arguments.add(NumberLiteral('2'))
-        call = Call(scheme_lambda, arguments)
+        call = resolved(Call(scheme_lambda, arguments))
         result = self.interpreter.visit_call(call)
         self.assertEqual(type(result), SchemePair)
         self.assertEqual(result.car(), SchemeNumber(1))
@@ -128,7 +161,7 @@ class InterpreterTests(unittest.TestCase):
         formals.set_list_parameter("x")
         scheme_lambda = Lambda(formals, [NumberLiteral('1')])
         procedure = self.interpreter.visit_lambda(scheme_lambda)
-        self.assertEqual(type(procedure), UserDefinedProcedure)
+        self.assertEqual(type(procedure), InterpretedProcedure)
         self.assertEqual(procedure.is_variadic, True)
         self.assertEqual(procedure.parameters, ['x'])
 
@@ -138,7 +171,7 @@ class InterpreterTests(unittest.TestCase):
         formals.append_parameter("y")
         scheme_lambda = Lambda(formals, [NumberLiteral('1')])
         procedure = self.interpreter.visit_lambda(scheme_lambda)
-        self.assertEqual(type(procedure), UserDefinedProcedure)
+        self.assertEqual(type(procedure), InterpretedProcedure)
         self.assertEqual(procedure.arity, 2)
         self.assertEqual(procedure.is_variadic, False)
         self.assertEqual(procedure.parameters, ['x', 'y'])
@@ -151,14 +184,14 @@ class InterpreterTests(unittest.TestCase):
         self.assertEqual(env.get('x'), SchemeNumber(1))
 
     def test_assignment(self):
-        assignment = Assignment('x', NumberLiteral('10'))
+        assignment = resolved(Assignment('x', NumberLiteral('10')))
         interpreter = interpreter_with_variables(x=SchemeNumber(0))
         interpreter.visit_assignment(assignment)
         env = interpreter.environment
         self.assertEqual(env.get('x'), SchemeNumber(10))
 
     def test_assignment_of_unbound_variable(self):
-        assignment = Assignment('x', NumberLiteral('10'))
+        assignment = resolved(Assignment('x', NumberLiteral('10')))
         interpreter = interpreter_with_variables()
         with self.assertRaises(SchemeRuntimeError) as context:
             interpreter.visit_assignment(assignment)
@@ -169,5 +202,52 @@ def double_builtin_procedure(x):
     return SchemeNumber(x.value * 2)
 
 
+class InlineCacheTests(unittest.TestCase):
+    def setUp(self):
+        inline_cache_stats.reset()
+        self.environment = Environment()
+        self.environment.add('double', BuiltInProcedure(double_builtin_procedure, arity=1))
+        self.interpreter = Interpreter(self.environment)
+        self.call = Call(VariableReference('double'), make_args(NumberLiteral('2')))
+
+    def evaluate(self, expression):
+        return self.interpreter.interpret_syntax_tree(SyntaxTree([expression]))
+
+    def test_call_site_cache_hits_after_first_call(self):
+        self.assertEqual(SchemeNumber(4), self.evaluate(self.call))
+        self.assertEqual(SchemeNumber(4), self.evaluate(self.call))
+        self.assertEqual((1, 1), (inline_cache_stats.hits, inline_cache_stats.misses))
+
+    def test_redefined_global_is_seen_by_cached_call_site(self):
+        self.evaluate(self.call)
+        self.evaluate(Definition('double', Constant(BuiltInProcedure(lambda x: x, arity=1))))
+        self.assertEqual(SchemeNumber(2), self.evaluate(self.call))
+        self.evaluate(Assignment('double', Constant(BuiltInProcedure(lambda x: SchemeNumber(0), arity=1))))
+        self.assertEqual(SchemeNumber(0), self.evaluate(self.call))
+        self.assertEqual((2, 1), (inline_cache_stats.hits, inline_cache_stats.misses))
+
+    def test_call_site_in_another_global_environment_misses(self):
+        self.evaluate(self.call)
+        other_environment = Environment()
+        other_environment.add('double', BuiltInProcedure(lambda x: x, arity=1))
+        self.assertEqual(SchemeNumber(2), Interpreter(other_environment).interpret_syntax_tree(SyntaxTree([self.call])))
+        self.assertEqual(2, inline_cache_stats.misses)
+
+    def test_global_found_from_nested_environment(self):
+        nested = Environment(Environment(Environment(self.environment)))
+        self.interpreter.environment = nested
+        Resolver().resolve(self.call)
+        self.assertEqual(SchemeNumber(4), self.interpreter.visit_call(self.call))
+        self.assertIs(self.environment, nested.root)
+        self.assertIs(self.environment, self.call.callee_cell_environment)
+
+
+def make_args(*expressions):
+    args = Args()
+    for expression in expressions:
+        args.add(expression)
+    return args
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -1,5 +1,6 @@
+import io
 import unittest
-from lexer import Lexer
+from lexer import Lexer, StreamLexer
 from schemetoken import TokenType
 
 
@@ -133,6 +134,13 @@ class LexerTest(unittest.TestCase):
         self.assertEqual(TokenType.CLOSE_PAREN, tokens[1].type)
         self.assertEqual(')', tokens[1].lexeme)
 
+    def test_open_vector(self):
+        lexer = Lexer('#(#t #\\a)')
+        tokens = lexer.scan()
+        self.assertEqual([TokenType.OPEN_VECTOR, TokenType.BOOLEAN, TokenType.CHARACTER, TokenType.CLOSE_PAREN],
+                         [token.type for token in tokens])
+        self.assertEqual('#(', tokens[0].lexeme)
+
     def test_comment(self):
         lexer = Lexer(' ;this is a comment\n ')
         tokens = lexer.scan()
@@ -145,6 +153,23 @@ class LexerTest(unittest.TestCase):
         self.assertTrue(lexer.haserrors())
         self.assertIn(line, lexer.errors[0])
 
+    def test_error_on_later_line_should_contain_that_line(self):
+        lexer = Lexer('(define x 1)\n(f 1.2.3)\n')
+        lexer.scan()
+        self.assertEqual(["line 2: (f 1.2.3)\ninvalid character in number literal:."], lexer.errors)
+
+    def test_token_positions(self):
+        tokens = Lexer('(foo\n  12 "a\nb" - bar)').scan()
+        positions = [(token.lexeme, token.line_number, token.column_number) for token in tokens]
+        self.assertEqual([('(', 1, 2), ('foo', 1, 5), ('12', 2, 5), ('"a\nb"', 3, 3), ('-', 3, 4), ('bar', 3, 9),
+                          (')', 3, 10)], positions)
+
+    def test_non_ascii_identifier(self):
+        lexer = Lexer("(café λx)")
+        tokens = lexer.scan()
+        self.assertFalse(lexer.haserrors())
+        self.assertEqual(['(', 'café', 'λx', ')'], [token.lexeme for token in tokens])
+
     def test_acceptance(self):
         program = '( + 9 .2 ) ( f #t #\\newline #\\t \n"44string12.3" -\n'
         lexer = Lexer(program)
@@ -160,5 +185,36 @@ class LexerTest(unittest.TestCase):
                          ['(', '+', '9', '.2', ')', '(', 'f', '#t', '#\\newline', '#\\t', '"44string12.3"', '-'])
 
 
+
+class StreamLexerTest(unittest.TestCase):
+    def test_same_tokens_as_lexer(self):
+        program = '(define s "multi\nline\n\nstring") ; comment "\n(f #\\a \'x 1.5)\n"x"\n'
+        lexer = StreamLexer(io.StringIO(program))
+        streamed = [(token.lexeme, token.type, token.line_number, token.column_number) for token in lexer.tokens()]
+        scanned = [(token.lexeme, token.type, token.line_number, token.column_number) for token in
+                   Lexer(program).scan()]
+        self.assertFalse(lexer.haserrors())
+        self.assertEqual(scanned, streamed)
+
+    def test_tokens_are_produced_line_by_line(self):
+        lines = iter(['(a b)\n', '(c d)\n'])
+        tokens = StreamLexer(lines).tokens()
+        self.assertEqual(['(', 'a', 'b', ')'], [next(tokens).lexeme for _ in range(4)])
+        self.assertEqual(['(c d)\n'], list(lines))
+
+    def test_error_stops_scanning(self):
+        lexer = StreamLexer(io.StringIO('(a)\n(b #x)\n(c)\n'))
+        lexemes = [token.lexeme for token in lexer.tokens()]
+        self.assertEqual(['(', 'a', ')'], lexemes)
+        self.assertEqual(1, len(lexer.errors))
+        self.assertTrue(lexer.errors[0].startswith("line 2: (b #x)"))
+
+    def test_unbalanced_string_at_end(self):
+        lexer = StreamLexer(io.StringIO('(a)\n"abc\n\n'))
+        list(lexer.tokens())
+        self.assertTrue(lexer.haserrors())
+        self.assertIn('unbalanced "', lexer.errors[0])
+
+
 if __name__ == '__main__':
     unittest.main()
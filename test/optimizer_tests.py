@@ -0,0 +1,81 @@
+import unittest
+
+from environment import Environment
+from lexer import Lexer
+from main import init_global_environment
+from optimizer import Optimizer
+from parser import Parser
+from schemeexpression import *
+from schemeobject import BuiltInProcedure, SchemeNumber, SchemeString, SchemeSymbol
+
+
+def parse(program):
+    return Parser(Lexer(program).scan()).parse()
+
+
+class OptimizerTests(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment()
+        init_global_environment(self.environment)
+        self.optimizer = Optimizer(self.environment)
+
+    def optimize(self, program):
+        return self.optimizer.optimize_syntax_tree(parse(program)).nodes
+
+    def test_literals_are_decoded(self):
+        nodes = self.optimize('1.5 "abc" \'a')
+        self.assertEqual([Constant, Constant, Constant], [type(node) for node in nodes])
+        self.assertEqual(SchemeNumber(1.5), nodes[0].value)
+        self.assertEqual(SchemeString("abc"), nodes[1].value)
+        self.assertIs(SchemeSymbol("a"), nodes[2].value)
+        self.assertEqual(3, self.optimizer.rewrites)
+
+    def test_quoted_list_is_not_a_constant(self):
+        nodes = self.optimize("'(1 2)")
+        self.assertIs(type(nodes[0]), QuotedList)
+        self.assertEqual([Constant, Constant], [type(element) for element in nodes[0].elements])
+
+    def test_fold_pure_call(self):
+        nodes = self.optimize("(+ 1 2)")
+        self.assertIs(type(nodes[0]), Constant)
+        self.assertEqual(SchemeNumber(3), nodes[0].value)
+
+    def test_fold_nested_pure_calls(self):
+        nodes = self.optimize("(* 4 (abs -3))")
+        self.assertEqual(SchemeNumber(12), nodes[0].value)
+        self.assertEqual(4, self.optimizer.rewrites)
+
+    def test_fold_conditional_with_constant_test(self):
+        nodes = self.optimize("(if (< 1 2) x y)")
+        self.assertIs(type(nodes[0]), VariableReference)
+        self.assertEqual('x', nodes[0].variable_name)
+
+    def test_builtin_shadowed_by_parameter_is_not_folded(self):
+        nodes = self.optimize("(lambda (+) (+ 1 2))")
+        self.assertIs(type(nodes[0].body[0]), Call)
+
+    def test_builtin_redefined_by_program_is_not_folded(self):
+        nodes = self.optimize("(define (abs x) x) (abs -1)")
+        self.assertIs(type(nodes[1]), Call)
+
+    def test_builtin_redefined_in_environment_is_not_folded(self):
+        self.environment.add('+', BuiltInProcedure(lambda x, y: x, arity=2))
+        nodes = self.optimize("(+ 1 2)")
+        self.assertIs(type(nodes[0]), Call)
+
+    def test_failing_call_is_left_for_runtime(self):
+        nodes = self.optimize("(/ 1 0)")
+        self.assertIs(type(nodes[0]), Call)
+
+    def test_stream_folds_top_level_calls_only(self):
+        nodes = list(self.optimizer.optimize_stream(iter(parse("(+ 1 2) (define (f) (+ 1 2))").nodes)))
+        self.assertIs(type(nodes[0]), Constant)
+        self.assertIs(type(nodes[1].expression.body[0]), Call)
+
+    def test_stream_does_not_fold_builtin_redefined_by_earlier_form(self):
+        nodes = list(self.optimizer.optimize_stream(iter(parse("(define (+ a b) a) (+ 1 2)").nodes)))
+        self.assertIs(type(nodes[1]), Call)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
 from schemetoken import Token, TokenType
-from parser import Parser
+from lexer import Lexer
+from main import eval_syntax_tree
+from parser import DatumParser, Parser, StreamParser, top_level_forms
 from schemeexpression import *
+from schemeobject import SchemeNumber, SchemeRuntimeError, SchemeString, SchemeSymbol, make_scheme_list
 
 
 def build_simple_quote(token):
@@ -141,6 +144,20 @@ class ParserTest(unittest.TestCase):
         types = [type(node) for node in quoted_list.elements]
         self.assertEqual(types, [NumberLiteral, Symbol, QuotedList])
 
+    def test_vector_literal(self):
+        tokens = Lexer("#(1 a (b) #(c))").scan()
+        syntax_tree = Parser(tokens).parse()
+        vector = syntax_tree.nodes[0]
+        self.assertIs(type(vector), QuotedVector)
+        types = [type(node) for node in vector.elements]
+        self.assertEqual(types, [NumberLiteral, Symbol, QuotedList, QuotedVector])
+
+    def test_quoted_vector_in_list(self):
+        tokens = Lexer("'(a #(b))").scan()
+        syntax_tree = Parser(tokens).parse()
+        quoted_list = syntax_tree.nodes[0]
+        self.assertIs(type(quoted_list.elements[1]), QuotedVector)
+
     def test_quoted_symbol_with_single_quotation(self):
         tokens = [TokenType.SINGLE_QUOTE, TokenType.OPEN_PAREN, TokenType.IDENTIFIER,
                   TokenType.STRING, TokenType.CLOSE_PAREN]
@@ -294,11 +311,11 @@ class ParserTest(unittest.TestCase):
         self.assertEqual(type(definition.expression), Lambda)
         self.assertEqual(definition.expression.formals.fixed_parameters, ['a', 'b'])
         outer_let = definition.expression.body[0]
-        self.assertEqual(type(outer_let), Call)
-        inner_let = outer_let.callee.body[0]
-        self.assertEqual(type(inner_let), Call)
-        self.assertEqual(type(inner_let.callee.body[0]), Assignment)
-        self.assertEqual(type(inner_let.callee.body[1]), NumberLiteral)
+        self.assertEqual(type(outer_let), Let)
+        inner_let = outer_let.body[0]
+        self.assertEqual(type(inner_let), Let)
+        self.assertEqual(type(inner_let.body[0]), Assignment)
+        self.assertEqual(type(inner_let.body[1]), NumberLiteral)
 
     def test_assignment(self):
         tokens = [Token('(', TokenType.OPEN_PAREN, 0, 0), Token('set!', TokenType.SET, 0, 0),
@@ -318,11 +335,8 @@ class ParserTest(unittest.TestCase):
                                         TokenType.CLOSE_PAREN])
         syntax_tree = Parser(tokens).parse()
         begin = syntax_tree.nodes[0]
-        self.assertIs(type(begin), Call)
-        lambda_of_begin = begin.callee
-        self.assertEqual(types(lambda_of_begin.body), [NumberLiteral, VariableReference, Call])
-        self.assertEqual(type(lambda_of_begin.formals), FormalParameters)
-        self.assertEqual(lambda_of_begin.formals.fixed_parameters, [])
+        self.assertIs(type(begin), Sequence)
+        self.assertEqual(types(begin.expressions), [NumberLiteral, VariableReference, Call])
 
     def test_cond(self):
         tokens = build_tokens_of_types([TokenType.OPEN_PAREN, TokenType.COND,
@@ -337,15 +351,15 @@ class ParserTest(unittest.TestCase):
                                         TokenType.CLOSE_PAREN,
                                         TokenType.CLOSE_PAREN])
         syntax_tree = Parser(tokens).parse()
-        conditional = syntax_tree.nodes[0]
-        self.assertIs(type(conditional), Conditional)
-        self.assertIs(type(conditional.test), BoolLiteral)
-        # a begin which is transformed to lambda
-        self.assertIs(type(conditional.consequent), Call)
-
-        self.assertIs(type(conditional.alternate), Conditional)
-        else_clause = conditional.alternate.alternate
-        self.assertIs(type(else_clause), Call)
+        cond = syntax_tree.nodes[0]
+        self.assertIs(type(cond), Cond)
+        self.assertEqual(len(cond.clauses), 3)
+        self.assertIs(type(cond.clauses[0].condition), BoolLiteral)
+        self.assertEqual(types(cond.clauses[0].sequence), [VariableReference])
+        self.assertFalse(cond.clauses[1].is_else)
+        else_clause = cond.clauses[2]
+        self.assertTrue(else_clause.is_else)
+        self.assertEqual(types(else_clause.sequence), [NumberLiteral])
 
     def test_let(self):
         tokens = build_tokens_of_types([TokenType.OPEN_PAREN,
@@ -355,11 +369,10 @@ class ParserTest(unittest.TestCase):
                                         TokenType.IDENTIFIER, TokenType.CLOSE_PAREN])
         syntax_tree = Parser(tokens).parse()
         let = syntax_tree.nodes[0]
-        self.assertIs(type(let), Call)
-        self.assertIs(type(let.callee), Lambda)
-        self.assertEqual(len(let.callee.formals.fixed_parameters), 1)
-        self.assertEqual(len(let.args.args), 1)
-        self.assertIs(type(let.callee.body[0]), VariableReference)
+        self.assertIs(type(let), Let)
+        self.assertEqual(len(let.bindings), 1)
+        self.assertIs(type(let.bindings[0].init), NumberLiteral)
+        self.assertIs(type(let.body[0]), VariableReference)
 
     def test_letstar(self):
         tokens = build_tokens_of_types([TokenType.OPEN_PAREN,
@@ -371,13 +384,11 @@ class ParserTest(unittest.TestCase):
                                         TokenType.IDENTIFIER, TokenType.CLOSE_PAREN])
         syntax_tree = Parser(tokens).parse()
         letstar = syntax_tree.nodes[0]
-        self.assertIs(type(letstar), Call)
-        self.assertIs(type(letstar.callee), Lambda)
-        self.assertEqual(len(letstar.callee.formals.fixed_parameters), 1)
-        self.assertEqual(len(letstar.args.args), 1)
-        self.assertIs(type(letstar.callee.body[0]), Call)
-        self.assertIs(type(letstar.callee.body[0].callee), Lambda)
-        self.assertIs(type(letstar.callee.body[0].callee.body[0]), VariableReference)
+        self.assertIs(type(letstar), Let)
+        self.assertEqual(len(letstar.bindings), 1)
+        self.assertIs(type(letstar.body[0]), Let)
+        self.assertEqual(len(letstar.body[0].bindings), 1)
+        self.assertIs(type(letstar.body[0].body[0]), VariableReference)
 
     def test_letrec(self):
         tokens = build_tokens_of_types([TokenType.OPEN_PAREN,
@@ -389,33 +400,30 @@ class ParserTest(unittest.TestCase):
                                         TokenType.IDENTIFIER, TokenType.CLOSE_PAREN])
         syntax_tree = Parser(tokens).parse()
         letrec = syntax_tree.nodes[0]
-        self.assertIs(type(letrec), Call)
+        self.assertIs(type(letrec), Let)
         outer_let = letrec
-        self.assertIs(type(outer_let.callee), Lambda)
-        self.assertEqual(len(outer_let.callee.formals.fixed_parameters), 2)
-        self.assertEqual(len(outer_let.args.args), 2)
-        inner_let = outer_let.callee.body[0]
-        self.assertIs(type(inner_let), Call)
-        self.assertIs(type(inner_let.callee.body[0]), Assignment)
-        self.assertIs(type(inner_let.callee.body[1]), Assignment)
+        self.assertEqual(len(outer_let.bindings), 2)
+        self.assertIs(type(outer_let.bindings[0].init), UnAssigned)
+        inner_let = outer_let.body[0]
+        self.assertIs(type(inner_let), Let)
+        self.assertIs(type(inner_let.body[0]), Assignment)
+        self.assertIs(type(inner_let.body[1]), Assignment)
 
     def test_and(self):
         tokens = build_tokens_of_types([TokenType.OPEN_PAREN, TokenType.AND, TokenType.NUMBER,
                                         TokenType.IDENTIFIER, TokenType.STRING, TokenType.CLOSE_PAREN])
         syntax_tree = Parser(tokens).parse()
         and_expression = syntax_tree.nodes[0]
-        self.assertIs(type(and_expression), Call)
-        self.assertIs(len(and_expression.args.args), 1)
-        self.assertIs(type(and_expression.callee.body[0]), Conditional)
+        self.assertIs(type(and_expression), And)
+        self.assertEqual(types(and_expression.tests), [NumberLiteral, VariableReference, StringLiteral])
 
     def test_or(self):
         tokens = build_tokens_of_types([TokenType.OPEN_PAREN, TokenType.OR, TokenType.NUMBER,
                                         TokenType.IDENTIFIER, TokenType.STRING, TokenType.CLOSE_PAREN])
         syntax_tree = Parser(tokens).parse()
         or_expression = syntax_tree.nodes[0]
-        self.assertIs(type(or_expression), Call)
-        self.assertIs(len(or_expression.args.args), 1)
-        self.assertIs(type(or_expression.callee.body[0]), Conditional)
+        self.assertIs(type(or_expression), Or)
+        self.assertEqual(types(or_expression.tests), [NumberLiteral, VariableReference, StringLiteral])
 
     def test_delay(self):
         tokens = build_tokens_of_types([TokenType.OPEN_PAREN, TokenType.DELAY, TokenType.NUMBER, TokenType.CLOSE_PAREN])
@@ -439,6 +447,103 @@ class ParserTest(unittest.TestCase):
         self.assertIs(type(cons_stream_call.args.args[1].callee), VariableReference)
         self.assertEqual(cons_stream_call.args.args[1].callee.variable_name, 'make-promise')
 
+    def test_source_positions(self):
+        syntax_tree = Parser(Lexer("(define (f x)\n  (+ x 1))\n(define g (lambda () (f 2)))").scan()).parse()
+        definition = syntax_tree.nodes[0]
+        self.assertEqual((1, 1), definition.position)
+        self.assertEqual((1, 1), definition.expression.position)
+        call = definition.expression.body[0]
+        self.assertEqual((2, 3), call.position)
+        self.assertEqual((2, 6), call.args.args[0].position)
+        self.assertEqual((3, 11), syntax_tree.nodes[1].expression.position)
+
+    def test_lambda_of_definition_is_named(self):
+        syntax_tree = Parser(Lexer("(define (f) 1) (define g (lambda () 2)) (lambda () 3)").scan()).parse()
+        self.assertEqual('f', syntax_tree.nodes[0].expression.name)
+        self.assertEqual('g', syntax_tree.nodes[1].expression.name)
+        self.assertIsNone(syntax_tree.nodes[2].name)
+
+
+class StreamParserTests(unittest.TestCase):
+    def test_top_level_forms(self):
+        tokens = Lexer("(define x 1) x '(a (b)) 'y (f (g))").scan()
+        forms = [[token.lexeme for token in form] for form in top_level_forms(tokens)]
+        self.assertEqual([['(', 'define', 'x', '1', ')'], ['x'], ["'", '(', 'a', '(', 'b', ')', ')'], ["'", 'y'],
+                          ['(', 'f', '(', 'g', ')', ')']], forms)
+
+    def test_top_level_vector(self):
+        tokens = Lexer("#(1 (2)) x").scan()
+        forms = [[token.lexeme for token in form] for form in top_level_forms(tokens)]
+        self.assertEqual([['#(', '1', '(', '2', ')', ')'], ['x']], forms)
+
+    def test_forms_are_parsed_one_at_a_time(self):
+        tokens = iter(Lexer("(define x 1) (f x)").scan())
+        forms = StreamParser(tokens).forms()
+        self.assertIs(type(next(forms)), Definition)
+        self.assertEqual(['(', 'f', 'x', ')'], [token.lexeme for token in tokens])
+
+    def test_error_stops_parsing(self):
+        parser = StreamParser(Lexer("(define x 1) (if) (f x)").scan())
+        forms = list(parser.forms())
+        self.assertEqual(1, len(forms))
+        self.assertTrue(parser.haserrors())
+
+    def test_unclosed_form(self):
+        parser = StreamParser(Lexer("x (f x").scan())
+        forms = list(parser.forms())
+        self.assertEqual(1, len(forms))
+        self.assertIn("unexpected end of file", parser.errors[0])
+
+
+def datum(*elements):
+    return make_scheme_list([SchemeSymbol(element) if type(element) is str else element for element in elements])
+
+
+class DatumParserTests(unittest.TestCase):
+    def test_special_forms(self):
+        conditional = DatumParser(datum('if', 'a', SchemeNumber(1.5), datum('f'))).parse_datum()
+        self.assertIs(type(conditional), Conditional)
+        self.assertEqual('a', conditional.test.variable_name)
+        self.assertEqual(SchemeNumber(1.5), conditional.consequent.value)
+        self.assertIs(type(conditional.alternate), Call)
+        self.assertIs(type(DatumParser(datum('let', datum(datum('x', SchemeNumber(1))), 'x')).parse_datum()), Let)
+
+    def test_procedure_definition(self):
+        definition = DatumParser(datum('define', datum('f', 'x'), datum('define', 'y', 'x'), 'y')).parse_datum()
+        self.assertIs(type(definition), Definition)
+        self.assertEqual('f', definition.expression.name)
+        self.assertEqual(['x'], definition.expression.formals.fixed_parameters)
+        self.assertIs(type(definition.expression.body[0]), Let)
+
+    def test_quoted_data(self):
+        quoted_list = DatumParser(datum('quote', datum('a', SchemeNumber(1)))).parse_datum()
+        self.assertIs(type(quoted_list), QuotedList)
+        self.assertEqual('a', quoted_list.elements[0].symbol)
+        self.assertEqual(SchemeNumber(1), quoted_list.elements[1].value)
+
+    def test_strings_evaluate_to_themselves(self):
+        string = SchemeString('say "hi"')
+        call = DatumParser(datum('display', string)).parse_datum()
+        self.assertIs(string, call.args.args[0].value)
+
+    def test_errors(self):
+        for data, message in [(datum('lambda'), "unexpected token )"), (datum('f', 'else'), "unexpected token else"),
+                              (datum('let', datum('x'), 'x'), "unexpected token x"),
+                              (datum(), "unexpected token )")]:
+            with self.subTest(message=message):
+                with self.assertRaises(SchemeRuntimeError) as context:
+                    DatumParser(data).parse_datum()
+                self.assertIn(message, context.exception.message)
+
+    def test_equal_lists_share_their_tree(self):
+        program = datum('+', SchemeNumber(1), SchemeNumber(2))
+        expression = eval_syntax_tree(program)
+        self.assertIs(expression, eval_syntax_tree(datum('+', SchemeNumber(1), SchemeNumber(2))))
+        program.second.second.set_car(SchemeNumber(5))
+        rebuilt = eval_syntax_tree(program)
+        self.assertIsNot(expression, rebuilt)
+        self.assertEqual(SchemeNumber(5), rebuilt.args.args[1].value)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,188 @@
+import unittest
+
+from environment import Environment
+from main import evaluate, init_global_environment, scan, timed_scan_evaluate
+from interpreter import Interpreter
+from profiler import AllocationTracker, CountingInterpreter, Profile, ProfilingInterpreter, SamplingProfiler, \
+    codes_of_execute_frame, count_nodes, procedures_of_apply_frame
+from schemeobject import SchemeNumber, SchemePair
+
+
+class ProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment()
+        init_global_environment(self.environment)
+        self.profile = Profile(self.environment)
+
+    def run_program(self, program):
+        return ProfilingInterpreter(self.environment, self.profile).interpret_syntax_tree(scan(program))
+
+    def test_procedures_are_named_by_their_definition(self):
+        self.run_program("""(define (count-down n) (if (= n 0) 'done (count-down (- n 1))))
+                            (define add-one (lambda (x) (+ x 1)))
+                            (count-down (add-one 2))""")
+        self.assertEqual({'count-down 1:1', 'add-one 2:45', '=', '-', '+'}, set(self.profile.procedures))
+        count_down = self.profile.procedures['count-down 1:1']
+        self.assertEqual(4, count_down.calls)
+        self.assertEqual(3, count_down.tail_calls)
+        self.assertEqual(0, self.profile.procedures['-'].tail_calls)
+
+    def test_anonymous_lambda(self):
+        self.run_program("((lambda (x) x) 1)")
+        self.assertEqual(1, self.profile.procedures['lambda 1:2'].calls)
+
+    def test_inner_procedures_of_the_same_name_are_profiled_apart(self):
+        self.run_program("""(define (f) (define (loop n) (if (= n 0) 0 (loop (- n 1)))) (loop 2))
+                            (define (g) (define (loop n) n) (loop 1))
+                            (f) (g)""")
+        self.assertEqual(3, self.profile.procedures['loop 1:13'].calls)
+        self.assertEqual(1, self.profile.procedures['loop 2:41'].calls)
+
+    def test_cumulative_time_of_recursive_calls_counts_the_outermost_call(self):
+        self.run_program("""(define (count n) (if (= n 0) 0 (+ 1 (count (- n 1)))))
+                            (count 20)""")
+        count = self.profile.procedures['count 1:1']
+        self.assertEqual(21, count.calls)
+        self.assertEqual(0, count.active_calls)
+        self.assertLessEqual(count.self_time, count.cumulative_time)
+        self.assertEqual([], self.profile.calls)
+
+    def test_calls_of_built_ins_applying_procedures(self):
+        self.run_program("(define (square x) (* x x)) (map square '(1 2 3))")
+        self.assertEqual(3, self.profile.procedures['square 1:1'].calls)
+        self.assertEqual(1, self.profile.procedures['map'].calls)
+
+    def test_profile_is_consistent_after_an_error(self):
+        self.run_program("(define (f) (car '())) (f)")
+        self.assertEqual([], self.profile.calls)
+        self.assertEqual(0, self.profile.procedures['f 1:1'].active_calls)
+
+    def test_report_is_sorted_by_self_time(self):
+        self.run_program("(define (f) 1) (f)")
+        lines = self.profile.report().split('\n')
+        self.assertEqual(['calls', 'tail', 'calls', 'self', 'ms', 'cumulative', 'ms', 'procedure'], lines[0].split())
+        self_times = [float(line.split()[2]) for line in lines[1:]]
+        self.assertEqual(sorted(self_times, reverse=True), self_times)
+
+
+class SamplingProfilerTests(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment()
+        init_global_environment(self.environment)
+        self.profiler = SamplingProfiler(self.environment, interval=0.0005)
+
+    def test_samples_scheme_call_stack(self):
+        program = scan("""(define (fib n)
+                            (if (< n 2) n (+ (fib (- n 1)) (fib (- n 2)))))
+                          (define (run) (map fib '(16 17)))
+                          (run)""")
+        self.profiler.start()
+        try:
+            for _ in range(5):
+                Interpreter(self.environment).interpret_syntax_tree(program)
+        finally:
+            self.profiler.stop()
+        self.assertGreater(len(self.profiler.samples), 0)
+        for stack in self.profiler.samples:
+            self.assertEqual('map', stack[0])
+            self.assertTrue(all(frame in {'fib 1:1', '<', '+', '-'} for frame in stack[1:]), stack)
+        self.assertTrue(any('fib 1:1' in stack for stack in self.profiler.samples))
+
+    def test_frames_sampled_before_their_locals_are_assigned(self):
+        self.assertEqual([], codes_of_execute_frame({}))
+        self.assertEqual([], codes_of_execute_frame({'code': None}))
+        self.assertEqual([], procedures_of_apply_frame({}))
+
+    def test_collapsed_stacks(self):
+        self.profiler.samples[('run 5:1', 'fib 1:1')] += 2
+        self.profiler.samples[('run 5:1',)] += 1
+        self.assertEqual("run 5:1 1\nrun 5:1;fib 1:1 2", self.profiler.collapsed_stacks())
+
+
+class AllocationTrackerTests(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment()
+        init_global_environment(self.environment)
+        self.tracker = AllocationTracker(self.environment)
+
+    def track(self, program, engine):
+        syntax_tree = scan(program)
+        self.tracker.start()
+        try:
+            evaluate(syntax_tree, self.environment, engine)
+        finally:
+            self.tracker.stop()
+
+    def test_allocations_are_attributed_to_running_procedure(self):
+        for engine in ['interpreter', 'closure', 'vm']:
+            with self.subTest(engine=engine):
+                self.setUp()
+                self.track("""(define (build n)
+                                (if (= n 0) '() (cdr (cons 0 (cons (* n 1000) (build (- n 1)))))))
+                              (define (go) (cons 1 (build 10)) 1)
+                              (go)""", engine)
+                self.assertEqual(20, self.tracker.allocations[('build 1:1', 'SchemePair')][0])
+                self.assertEqual(9, self.tracker.allocations[('build 1:1', 'SchemeNumber')][0])
+                self.assertEqual(1, self.tracker.allocations[('go 3:31', 'SchemePair')][0])
+
+    def test_cached_numbers_are_not_counted(self):
+        self.track("(+ 1 2)", 'interpreter')
+        self.assertNotIn(('top level', 'SchemeNumber'), self.tracker.allocations)
+
+    def test_constructors_are_restored(self):
+        self.track("(cons 1 2)", 'interpreter')
+        self.assertEqual(1, self.tracker.allocations[('top level', 'SchemePair')][0])
+        SchemePair(1, 2)
+        SchemeNumber(5000)
+        self.assertEqual(1, self.tracker.allocations[('top level', 'SchemePair')][0])
+        self.assertNotIn(('top level', 'SchemeNumber'), self.tracker.allocations)
+
+    def test_report_totals(self):
+        self.track("(define (pair) (cons 1 2) 1) (pair) (pair)", 'interpreter')
+        rows = [line.split() for line in self.tracker.report().split('\n')]
+        self.assertIn(['2', '128', 'SchemePair', 'pair', '1:1'], rows)
+        self.assertIn(['2', '128', 'SchemePair', 'total'], rows)
+
+
+class TimingsTests(unittest.TestCase):
+    def setUp(self):
+        self.environment = Environment()
+        init_global_environment(self.environment)
+
+    def test_count_nodes(self):
+        self.assertEqual(7, count_nodes(scan("(define (f x) (+ x 1)) 'a").nodes))
+
+    def test_evaluation_counters(self):
+        interpreter = CountingInterpreter(self.environment)
+        interpreter.interpret_syntax_tree(scan("""(define (loop i) (if (= i 0) 'done (loop (- i 1))))
+                                                  (let ((n 3)) (loop n))"""))
+        counters = interpreter.counters
+        self.assertEqual(5, counters.frames)
+        self.assertEqual(1, counters.peak_frame_depth)
+        self.assertEqual(11, counters.calls)
+        self.assertEqual(10, counters.tail_calls)
+
+    def test_peak_frame_depth_of_nested_procedures(self):
+        interpreter = CountingInterpreter(self.environment)
+        interpreter.interpret_syntax_tree(scan("(((lambda (x) (lambda (y) (let ((z 1)) z))) 1) 2)"))
+        self.assertEqual(3, interpreter.counters.frames)
+        self.assertEqual(3, interpreter.counters.peak_frame_depth)
+
+    def test_timed_scan_evaluate(self):
+        value, timings = timed_scan_evaluate("(define (f x) (+ x 1)) (f (+ 1 2))", self.environment)
+        self.assertEqual("4", str(value))
+        self.assertEqual(['lex', 'parse', 'optimize', 'evaluate'], list(timings))
+        self.assertEqual(20, timings['lex']['tokens'])
+        self.assertEqual(12, timings['parse']['nodes'])
+        self.assertEqual(2, timings['evaluate']['calls'])
+        self.assertTrue(all(phase['seconds'] >= 0 for phase in timings.values()))
+
+    def test_other_engines_are_timed_without_counters(self):
+        value, timings = timed_scan_evaluate("(+ 1 2)", self.environment, 'vm', optimize_syntax_tree=False)
+        self.assertEqual("3", str(value))
+        self.assertEqual(['lex', 'parse', 'evaluate'], list(timings))
+        self.assertEqual(['seconds'], list(timings['evaluate']))
+
+    def test_phases_after_a_scan_error_are_not_timed(self):
+        value, timings = timed_scan_evaluate("(+ 1 2", self.environment)
+        self.assertEqual(['lex'], list(timings))
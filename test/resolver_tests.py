@@ -0,0 +1,40 @@
+import unittest
+
+from resolver import Resolver
+from schemeexpression import *
+
+
+def lambda_with_parameters(parameters, body):
+    formals = FormalParameters()
+    for parameter in parameters:
+        formals.append_parameter(parameter)
+    return Lambda(formals, body)
+
+
+class ResolverTests(unittest.TestCase):
+    def test_free_variable_is_global(self):
+        reference = VariableReference('x')
+        Resolver().resolve(lambda_with_parameters(['y'], [reference]))
+        self.assertTrue(reference.address.is_global)
+
+    def test_parameter_addresses(self):
+        scheme_lambda = lambda_with_parameters(['x', 'y'], [NumberLiteral('1')])
+        Resolver().resolve(scheme_lambda)
+        self.assertEqual([(0, 0), (0, 1)],
+                         [(address.depth, address.slot) for address in scheme_lambda.parameter_addresses])
+
+    def test_inner_parameter_shadows_outer(self):
+        reference = VariableReference('x')
+        inner_lambda = lambda_with_parameters(['x'], [reference])
+        Resolver().resolve(lambda_with_parameters(['y', 'x'], [inner_lambda]))
+        self.assertEqual((0, 0), (reference.address.depth, reference.address.slot))
+
+    def test_assignment_of_outer_variable(self):
+        assignment = Assignment('y', NumberLiteral('1'))
+        inner_lambda = lambda_with_parameters([], [assignment])
+        Resolver().resolve(lambda_with_parameters(['x', 'y'], [inner_lambda]))
+        self.assertEqual((1, 1), (assignment.address.depth, assignment.address.slot))
+
+
+if __name__ == '__main__':
+    unittest.main()
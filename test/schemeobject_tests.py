@@ -0,0 +1,220 @@
+import gc
+import unittest
+
+from schemeobject import *
+
+
+def build_list(length):
+    scheme_list = SchemeEmptyList()
+    for value in range(length):
+        scheme_list = SchemePair(SchemeNumber(value), scheme_list)
+    return scheme_list
+
+
+class ObjectModelTests(unittest.TestCase):
+    def test_small_integers_are_cached(self):
+        self.assertIs(SchemeNumber(7), SchemeNumber(7))
+        self.assertEqual(7, SchemeNumber(7).value)
+
+    def test_large_integers_and_floats_are_not_cached(self):
+        self.assertIsNot(SchemeNumber(100000), SchemeNumber(100000))
+        self.assertEqual(SchemeNumber(100000), SchemeNumber(100000))
+        self.assertNotEqual(SchemeNumber(1), SchemeNumber(1.0))
+        self.assertEqual(float, type(SchemeNumber(1.0).value))
+
+    def test_chars_are_interned(self):
+        self.assertIs(SchemeChar('a'), SchemeChar('a'))
+
+    def test_runtime_objects_have_no_instance_dictionary(self):
+        for scheme_object in [SchemeNumber(1.5), SchemeChar('a'), SchemeString("a"),
+                              SchemePair(SchemeNumber(1), SchemeEmptyList()), SchemePromise(None)]:
+            self.assertFalse(hasattr(scheme_object, '__dict__'))
+
+
+class BuiltInProcedureTests(unittest.TestCase):
+    def test_fixed_arity_arguments_are_positional(self):
+        procedure = BuiltInProcedure(lambda first, second: SchemePair(first, second), arity=2)
+        self.assertEqual("( 1 . 2 )", str(procedure.call([SchemeNumber(1), SchemeNumber(2)])))
+
+    def test_variadic_arguments_are_a_python_list(self):
+        procedure = BuiltInProcedure(lambda args: SchemeNumber(len(args)), variadic=True)
+        self.assertEqual(SchemeNumber(3), procedure.call([SchemeNumber(1), SchemeNumber(2), SchemeNumber(3)]))
+
+    def test_wrong_number_of_arguments(self):
+        procedure = BuiltInProcedure(lambda arg: arg, arity=1)
+        with self.assertRaises(SchemeRuntimeError) as context:
+            procedure.call([])
+        self.assertIn("expects 1 argument", context.exception.message)
+
+    def test_minimum_number_of_arguments(self):
+        procedure = BuiltInProcedure(lambda args: args[0], variadic=True, name='f', minimum_arity=2)
+        with self.assertRaises(SchemeRuntimeError) as context:
+            procedure.call([SchemeNumber(1)])
+        self.assertEqual("procedure f requires at least 2 arguments", context.exception.message)
+
+    def test_argument_type_is_checked_for_every_argument(self):
+        procedure = BuiltInProcedure(lambda args: args[0], variadic=True, argument_type=SchemeNumber,
+                                     fixed_arity_implementations={2: lambda first, second: first})
+        with self.assertRaises(SchemeRuntimeError) as context:
+            procedure.call([SchemeNumber(1), SchemeSymbol('a')])
+        self.assertIn("incorrect type", context.exception.message)
+
+    def test_fixed_arity_implementation_is_preferred(self):
+        procedure = BuiltInProcedure(lambda args: SchemeSymbol('general'), variadic=True,
+                                     fixed_arity_implementations={2: lambda first, second: SchemeSymbol('fixed')})
+        self.assertIs(SchemeSymbol('fixed'), procedure.call([SchemeNumber(1), SchemeNumber(2)]))
+        self.assertIs(SchemeSymbol('general'), procedure.call([SchemeNumber(1)]))
+
+
+class SchemePairTests(unittest.TestCase):
+    def test_proper_list_length(self):
+        self.assertEqual(3, build_list(3).list_length())
+        self.assertEqual(3, scheme_list_length(build_list(3)))
+
+    def test_improper_list(self):
+        pair = SchemePair(SchemeNumber(1), SchemePair(SchemeNumber(2), SchemeNumber(3)))
+        self.assertFalse(pair.is_list())
+        self.assertFalse(is_scheme_list(pair))
+
+    def test_length_of_list_consed_onto_measured_list(self):
+        tail = build_list(5)
+        self.assertEqual(5, tail.list_length())
+        self.assertEqual(6, SchemePair(SchemeNumber(0), tail).list_length())
+
+    def test_set_cdr_invalidates_cached_length(self):
+        scheme_list = build_list(3)
+        self.assertTrue(scheme_list.is_list())
+        scheme_list.cdr().set_cdr(SchemeNumber(1))
+        self.assertFalse(scheme_list.is_list())
+        scheme_list.cdr().set_cdr(SchemeEmptyList())
+        self.assertEqual(2, scheme_list.list_length())
+
+    def test_circular_list_is_not_a_list(self):
+        scheme_list = build_list(3)
+        scheme_list_tail(scheme_list).set_cdr(scheme_list)
+        self.assertFalse(scheme_list.is_list())
+        self.assertFalse(scheme_list.cdr().is_list())
+
+    def test_circular_list_is_printed(self):
+        scheme_list = build_list(3)
+        scheme_list_tail(scheme_list).set_cdr(scheme_list)
+        self.assertEqual("( 2 . ( 1 . ( 0 . ... ) ) )", str(scheme_list))
+        scheme_list.set_car(scheme_list)
+        self.assertEqual("( ... . ( 1 . ( 0 . ... ) ) )", str(scheme_list))
+
+    def test_long_improper_list_is_printed_without_recursion(self):
+        scheme_list = build_list(100000)
+        scheme_list_tail(scheme_list).set_cdr(SchemeNumber(1))
+        self.assertTrue(str(scheme_list).endswith("( 0 . 1 )" + " )" * 99999))
+
+    def test_long_list_does_not_recurse(self):
+        scheme_list = build_list(100000)
+        self.assertEqual(100000, scheme_list.size())
+        self.assertEqual(100000, len(list(scheme_list)))
+        self.assertEqual(scheme_list, build_list(100000))
+
+
+class MakeSchemeListTests(unittest.TestCase):
+    def test_make_scheme_list(self):
+        scheme_list = make_scheme_list([SchemeNumber(1), SchemeNumber(2)])
+        self.assertEqual("( 1 2 )", str(scheme_list))
+
+    def test_make_empty_scheme_list(self):
+        self.assertIs(SchemeEmptyList(), make_scheme_list([]))
+
+    def test_long_list_is_built_without_recursion(self):
+        scheme_list = make_scheme_list([SchemeNumber(value) for value in range(50000)])
+        self.assertEqual(50000, scheme_list.list_length())
+        self.assertEqual(SchemeNumber(49999), scheme_list_tail(scheme_list).car())
+
+    def test_scheme_list_from_iterable(self):
+        scheme_list = scheme_list_from_iterable(SchemeNumber(value) for value in range(3))
+        self.assertEqual(make_scheme_list([SchemeNumber(0), SchemeNumber(1), SchemeNumber(2)]), scheme_list)
+
+
+class SchemeHashTableTests(unittest.TestCase):
+    def test_equal_objects_hash_equal(self):
+        self.assertEqual(hash(build_list(5)), hash(build_list(5)))
+        self.assertEqual(hash(SchemeString("abc")), hash(SchemeString("abc")))
+        self.assertEqual(hash(SchemeVector([build_list(2)])), hash(SchemeVector([build_list(2)])))
+        self.assertEqual(hash(SchemeNumber(100000)), hash(SchemeNumber(100000)))
+
+    def test_long_list_hash_does_not_recurse(self):
+        self.assertEqual(hash(build_list(100000)), hash(build_list(100000)))
+
+    def test_circular_list_hash_terminates(self):
+        scheme_list = build_list(3)
+        scheme_list_tail(scheme_list).set_cdr(scheme_list)
+        hash(scheme_list)
+
+    def test_equal_table_keys_by_structure(self):
+        table = SchemeHashTable(is_structural=True)
+        table.set(build_list(3), SchemeNumber(1))
+        table.set(SchemeString("key"), SchemeNumber(2))
+        self.assertEqual(SchemeNumber(1), table.get(build_list(3)))
+        self.assertEqual(SchemeNumber(2), table.get(SchemeString("key")))
+        self.assertIsNone(table.get(build_list(4)))
+
+    def test_eqv_table_keys_by_identity(self):
+        table = SchemeHashTable(is_structural=False)
+        key = SchemeString("key")
+        table.set(key, SchemeNumber(1))
+        table.set(SchemeNumber(100000), SchemeNumber(2))
+        self.assertEqual(SchemeNumber(1), table.get(key))
+        self.assertIsNone(table.get(SchemeString("key")))
+        self.assertEqual(SchemeNumber(2), table.get(SchemeNumber(100000)))
+        self.assertEqual([key, SchemeNumber(100000)], table.keys())
+
+    def test_integer_and_float_keys_are_distinct(self):
+        table = SchemeHashTable(is_structural=True)
+        table.set(SchemeNumber(1), SchemeSymbol('integer'))
+        self.assertIsNone(table.get(SchemeNumber(1.0)))
+
+
+def apply_built_in(procedure, args):
+    return procedure.call(args)
+
+
+class MemoizedProcedureTests(unittest.TestCase):
+    def setUp(self):
+        self.calls = 0
+
+        def square(number):
+            self.calls += 1
+            return SchemeNumber(number.value * number.value)
+
+        self.square = BuiltInProcedure(square, arity=1)
+
+    def test_repeated_call_is_cached(self):
+        memoized = MemoizedProcedure(self.square, 10)
+        self.assertEqual(SchemeNumber(9), memoized.call([SchemeNumber(3)], apply_built_in))
+        self.assertEqual(SchemeNumber(9), memoized.call([SchemeNumber(3)], apply_built_in))
+        self.assertEqual(1, self.calls)
+        self.assertEqual((1, 1), (memoized.hits, memoized.misses))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        memoized = MemoizedProcedure(self.square, 2)
+        for value in [1, 2, 1, 3]:
+            memoized.call([SchemeNumber(value)], apply_built_in)
+        self.assertEqual(1, memoized.evictions)
+        self.assertEqual([(SchemeNumber(1),), (SchemeNumber(3),)], list(memoized.entries))
+
+    def test_arguments_are_compared_by_structure(self):
+        length = BuiltInProcedure(lambda scheme_list: SchemeNumber(scheme_list.size()), arity=1)
+        memoized = MemoizedProcedure(length, 10)
+        memoized.call([build_list(3)], apply_built_in)
+        memoized.call([build_list(3)], apply_built_in)
+        self.assertEqual(1, memoized.hits)
+
+    def test_weak_entries_are_dropped_by_full_collections(self):
+        memoized = MemoizedProcedure(self.square, 10, weak=True)
+        memoized.call([SchemeNumber(3)], apply_built_in)
+        gc.collect()
+        self.assertEqual(0, len(memoized.entries))
+        self.assertEqual(1, memoized.evictions)
+        memoized.call([SchemeNumber(3)], apply_built_in)
+        self.assertEqual(2, self.calls)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+from bytecode import *
+from interpreter import *
+from resolver import Resolver
+
+false = SchemeBool(False)
+
+
+# runs the bytecode of BytecodeCompiler in one dispatch loop, on a stack of values.
+# calls of compiled procedures push a return record instead of recursing in python, so like the cek machine,
+# non tail recursion is bounded by max_depth calls, tail calls push no record
+class VirtualMachine:
+    default_max_depth = 1000000
+    # the bytecode of every top level form is written there before it runs, when set
+    disassembly_file = None
+
+    def __init__(self, environment=None, max_depth=None):
+        self.environment = Environment() if environment is None else environment
+        self.max_depth = VirtualMachine.default_max_depth if max_depth is None else max_depth
+        self.compiler = BytecodeCompiler()
+
+    def interpret_syntax_tree(self, syntax_tree):
+        result = None
+        resolver = Resolver()
+        try:
+            for expression in syntax_tree.nodes:
+                resolver.resolve(expression)
+                code = self.compiler.compile_top_level(expression)
+                if VirtualMachine.disassembly_file is not None:
+                    print(disassemble(code), file=VirtualMachine.disassembly_file)
+                result = self.execute(code, None)
+            return result
+        except SchemeRuntimeError as error:
+            return SchemeString(error.message)
+
+    # runs a procedure to its value, for built ins calling procedures
+    def apply_procedure(self, procedure, arguments_values):
+        while True:
+            if type(procedure) is BytecodeProcedure and procedure.machine is self:
+                return self.execute(procedure.code,
+                                    Frame(Interpreter.prepare_args(procedure, arguments_values), procedure.environment))
+            value = self.apply_other(procedure, arguments_values)
+            if not isinstance(value, TailCall):
+                return value
+            procedure = value.procedure
+            arguments_values = value.arguments_values
+
+    # procedures not compiled to bytecode by this machine: built ins, procedures made by the other engines, and by
+    # the machines eval runs in other global environments
+    def apply_other(self, procedure, arguments_values):
+        if isinstance(procedure, BuiltInProcedure):
+            value = procedure.call(arguments_values, self.apply_procedure)
+            if type(value) is Evaluation:
+                machine = VirtualMachine(value.environment, self.max_depth)
+                return machine.execute(machine.compiler.compile_top_level(value.expression), None)
+            return value
+        if isinstance(procedure, (CompiledProcedure, BytecodeProcedure)):
+            return procedure.call(Interpreter.prepare_args(procedure, arguments_values))
+        return Interpreter(self.environment).apply_procedure(procedure, arguments_values)
+
+    def execute(self, code, frame):
+        instructions = code.instructions
+        constants = code.constants
+        names = code.names
+        global_dictionary = self.environment.dictionary
+        max_depth = self.max_depth
+        stack = []
+        # (code, offset, frame) to return to, for every call in progress
+        calls = []
+        pc = 0
+        while True:
+            opcode = instructions[pc]
+            if opcode == LOAD_LOCAL:
+                value = frame.slots[instructions[pc + 1]]
+                if type(value) is UnAssigned:
+                    raise SchemeRuntimeError(f"variable {code.local_names[pc]} Unassigned")
+                stack.append(value)
+                pc += 2
+            elif opcode == LOAD_GLOBAL:
+                name = names[instructions[pc + 1]]
+                value = global_dictionary.get(name)
+                if value is None:
+                    value = self.environment.get(name)
+                    if value is None:
+                        raise SchemeRuntimeError(f"variable {name} not found")
+                if type(value) is UnAssigned:
+                    raise SchemeRuntimeError(f"variable {name} Unassigned")
+                stack.append(value)
+                pc += 2
+            elif opcode == CONSTANT:
+                stack.append(constants[instructions[pc + 1]])
+                pc += 2
+            elif opcode == CALL or opcode == TAIL_CALL:
+                number_of_args = instructions[pc + 1]
+                pc += 2
+                callee_index = len(stack) - number_of_args - 1
+                procedure = stack[callee_index]
+                arguments_values = stack[callee_index + 1:]
+                del stack[callee_index:]
+                if not isinstance(procedure, SchemeProcedure):
+                    raise SchemeRuntimeError(f"{procedure} is not a procedure")
+                while type(procedure) is not BytecodeProcedure or procedure.machine is not self:
+                    value = self.apply_other(procedure, arguments_values)
+                    if not isinstance(value, TailCall):
+                        break
+                    procedure = value.procedure
+                    arguments_values = value.arguments_values
+                else:
+                    arguments_values = Interpreter.prepare_args(procedure, arguments_values)
+                    if opcode == CALL:
+                        if len(calls) >= max_depth:
+                            raise SchemeRuntimeError(f"maximum recursion depth of {max_depth} calls exceeded")
+                        calls.append((code, pc, frame))
+                    code = procedure.code
+                    instructions = code.instructions
+                    constants = code.constants
+                    names = code.names
+                    frame = Frame(arguments_values, procedure.environment)
+                    pc = 0
+                    continue
+                if opcode == CALL:
+                    stack.append(value)
+                    continue
+                # the tail call of a procedure that is not bytecode returns its value right away
+                if len(calls) == 0:
+                    return value
+                code, pc, frame = calls.pop()
+                instructions = code.instructions
+                constants = code.constants
+                names = code.names
+                stack.append(value)
+            elif opcode == RETURN:
+                if len(calls) == 0:
+                    return stack.pop()
+                code, pc, frame = calls.pop()
+                instructions = code.instructions
+                constants = code.constants
+                names = code.names
+            elif opcode == JUMP_IF_FALSE:
+                if stack.pop() is false:
+                    pc = instructions[pc + 1]
+                else:
+                    pc += 2
+            elif opcode == JUMP:
+                pc = instructions[pc + 1]
+            elif opcode == LOAD_FREE:
+                depth = instructions[pc + 1]
+                ancestor = frame.parent
+                while depth > 1:
+                    ancestor = ancestor.parent
+                    depth -= 1
+                value = ancestor.slots[instructions[pc + 2]]
+                if type(value) is UnAssigned:
+                    raise SchemeRuntimeError(f"variable {code.local_names[pc]} Unassigned")
+                stack.append(value)
+                pc += 3
+            elif opcode == POP:
+                stack.pop()
+                pc += 1
+            elif opcode == MAKE_CLOSURE:
+                stack.append(BytecodeProcedure(constants[instructions[pc + 1]], frame, self))
+                pc += 2
+            elif opcode == ENTER_FRAME:
+                number_of_variables = instructions[pc + 1]
+                first_value_index = len(stack) - number_of_variables
+                frame = Frame(stack[first_value_index:], frame)
+                del stack[first_value_index:]
+                pc += 2
+            elif opcode == LEAVE_FRAME:
+                frame = frame.parent
+                pc += 1
+            elif opcode == JUMP_IF_FALSE_OR_POP:
+                if stack[-1] is false:
+                    pc = instructions[pc + 1]
+                else:
+                    stack.pop()
+                    pc += 2
+            elif opcode == JUMP_IF_TRUE_OR_POP:
+                if stack[-1] is not false:
+                    pc = instructions[pc + 1]
+                else:
+                    stack.pop()
+                    pc += 2
+            elif opcode == STORE_LOCAL:
+                frame.ancestor(instructions[pc + 1]).slots[instructions[pc + 2]] = stack[-1]
+                stack[-1] = None
+                pc += 3
+            elif opcode == DEFINE_GLOBAL:
+                self.environment.add(names[instructions[pc + 1]], stack[-1])
+                stack[-1] = None
+                pc += 2
+            elif opcode == STORE_GLOBAL:
+                name = names[instructions[pc + 1]]
+                if self.environment.get(name) is None:
+                    raise SchemeRuntimeError(f"variable {name} not bound")
+                self.environment.set(name, stack[-1])
+                stack[-1] = None
+                pc += 2
+            elif opcode == BUILD_LIST or opcode == BUILD_VECTOR:
+                number_of_elements = instructions[pc + 1]
+                first_element_index = len(stack) - number_of_elements
+                elements = stack[first_element_index:]
+                del stack[first_element_index:]
+                stack.append(make_scheme_list(elements) if opcode == BUILD_LIST else SchemeVector(elements))
+                pc += 2
+            else:
+                raise SchemeRuntimeError(f"unknown opcode {opcode} at {pc} in {code_name(code)}")